@@ -2,8 +2,10 @@ from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlmodel import SQLModel
 
-from app.db.session import Base
+import app.db.models  # noqa: F401  регистрация моделей в метаданных
+from app.db.search import SEARCH_TABLES
 
 from alembic import context
 
@@ -16,11 +18,36 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# URL берётся из настроек приложения, если не задан явно (например, в
+# тестах) и приложение не передало своё соединение (app.db.init_db).
+# Настройки читаются только здесь: приложение может выполнять миграции
+# до того, как задан DATABASE_URL.
+if not (
+    config.get_main_option("sqlalchemy.url")
+    or "connection" in config.attributes
+):
+    from app.core.config import settings
+    from app.db.session import sync_database_url
+
+    config.set_main_option(
+        "sqlalchemy.url",
+        sync_database_url(settings.DATABASE_URL).render_as_string(
+            hide_password=False
+        ),
+    )
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
-target_metadata = Base.metadata
+target_metadata = SQLModel.metadata
+
+# Служебные таблицы, которых нет в моделях.
+IGNORED_TABLES = frozenset({"import_progress"}) | SEARCH_TABLES
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and name in IGNORED_TABLES)
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -46,6 +73,8 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -59,6 +88,11 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations_in(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -66,12 +100,19 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+        run_migrations_in(connection)
+
 
-        with context.begin_transaction():
-            context.run_migrations()
+def run_migrations_in(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
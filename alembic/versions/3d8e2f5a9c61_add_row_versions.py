@@ -0,0 +1,37 @@
+"""Add row version counters for ETags
+
+Revision ID: 3d8e2f5a9c61
+Revises: 9b1f6d3c8a47
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d8e2f5a9c61'
+down_revision: Union[str, None] = '9b1f6d3c8a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('user', 'post'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    'version', sa.Integer(), server_default='1',
+                    nullable=False,
+                )
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('post', 'user'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
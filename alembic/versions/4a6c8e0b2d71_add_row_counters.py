@@ -0,0 +1,49 @@
+"""Add row counters for users and posts
+
+Revision ID: 4a6c8e0b2d71
+Revises: b5e1c7d3a924
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.counters import (
+    CREATE_COUNTER_TRIGGERS, DROP_COUNTER_TRIGGERS, reconcile_counts
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a6c8e0b2d71'
+down_revision: Union[str, None] = 'b5e1c7d3a924'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('row_count',
+    sa.Column('name', sa.VARCHAR(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('user_post_count',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    for statement in CREATE_COUNTER_TRIGGERS:
+        op.execute(statement)
+    # Счётчики сразу заполняются по уже существующим строкам.
+    reconcile_counts(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in DROP_COUNTER_TRIGGERS:
+        op.execute(statement)
+    op.drop_table('user_post_count')
+    op.drop_table('row_count')
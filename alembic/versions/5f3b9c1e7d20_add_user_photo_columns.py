@@ -0,0 +1,40 @@
+"""Add user photo hash and variants
+
+Revision ID: 5f3b9c1e7d20
+Revises: a2ce5d5bdd4c
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3b9c1e7d20'
+down_revision: Union[str, None] = 'a2ce5d5bdd4c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('photo_hash', sa.VARCHAR(), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column('photo_variants', sa.JSON(), nullable=True)
+        )
+        batch_op.create_index(
+            batch_op.f('ix_user_photo_hash'), ['photo_hash'], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_photo_hash'))
+        batch_op.drop_column('photo_variants')
+        batch_op.drop_column('photo_hash')
@@ -0,0 +1,43 @@
+"""Add version floor so row ETags are never reused
+
+Revision ID: 6e2b8d4f1a39
+Revises: 4a6c8e0b2d71
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.versions import (
+    CREATE_VERSION_FLOOR_TRIGGERS,
+    DROP_VERSION_FLOOR_TRIGGERS,
+    SEED_VERSION_FLOOR,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2b8d4f1a39'
+down_revision: Union[str, None] = '4a6c8e0b2d71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('version_floor',
+    sa.Column('name', sa.VARCHAR(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    for statement in CREATE_VERSION_FLOOR_TRIGGERS:
+        op.execute(statement)
+    op.execute(SEED_VERSION_FLOOR)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in DROP_VERSION_FLOOR_TRIGGERS:
+        op.execute(statement)
+    op.drop_table('version_floor')
@@ -0,0 +1,30 @@
+"""Add full-text search index for posts
+
+Revision ID: 7c2a9e4f1b58
+Revises: 3d8e2f5a9c61
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.db.search import rebuild_post_search, drop_post_search
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2a9e4f1b58'
+down_revision: Union[str, None] = '3d8e2f5a9c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индекс сразу заполняется уже существующими постами.
+    rebuild_post_search(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_post_search(None, op.get_bind())
@@ -0,0 +1,43 @@
+"""Add entity cache invalidation log
+
+Revision ID: 9b1f6d3c8a47
+Revises: e4d7a2b9c015
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1f6d3c8a47'
+down_revision: Union[str, None] = 'e4d7a2b9c015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cache_invalidation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.VARCHAR(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('cascade', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('cache_invalidation', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_cache_invalidation_created_at'),
+            ['created_at'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('cache_invalidation', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cache_invalidation_created_at'))
+    op.drop_table('cache_invalidation')
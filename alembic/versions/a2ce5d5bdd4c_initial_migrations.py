@@ -19,32 +19,35 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
-    """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_table('user')
-    op.drop_table('post')
-    # ### end Alembic commands ###
+    """Upgrade schema.
+
+    Таблицы, уже созданные приложением через create_all, не
+    пересоздаются.
+    """
+    existing_tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'user' not in existing_tables:
+        op.create_table('user',
+        sa.Column('id', sa.INTEGER(), nullable=False),
+        sa.Column('first_name', sa.VARCHAR(), nullable=True),
+        sa.Column('second_name', sa.VARCHAR(), nullable=True),
+        sa.Column('patronymic', sa.VARCHAR(), nullable=True),
+        sa.Column('email', sa.VARCHAR(), nullable=True),
+        sa.Column('address', sa.VARCHAR(), nullable=True),
+        sa.Column('photo_url', sa.VARCHAR(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'post' not in existing_tables:
+        op.create_table('post',
+        sa.Column('id', sa.INTEGER(), nullable=False),
+        sa.Column('title', sa.VARCHAR(), nullable=True),
+        sa.Column('content', sa.VARCHAR(), nullable=True),
+        sa.Column('user_id', sa.INTEGER(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.create_table('post',
-    sa.Column('id', sa.INTEGER(), nullable=False),
-    sa.Column('title', sa.VARCHAR(), nullable=True),
-    sa.Column('content', sa.VARCHAR(), nullable=True),
-    sa.Column('user_id', sa.INTEGER(), nullable=True),
-    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
-    sa.PrimaryKeyConstraint('id')
-    )
-    op.create_table('user',
-    sa.Column('id', sa.INTEGER(), nullable=False),
-    sa.Column('first_name', sa.VARCHAR(), nullable=True),
-    sa.Column('second_name', sa.VARCHAR(), nullable=True),
-    sa.Column('patronymic', sa.VARCHAR(), nullable=True),
-    sa.Column('email', sa.VARCHAR(), nullable=True),
-    sa.Column('address', sa.VARCHAR(), nullable=True),
-    sa.Column('photo_url', sa.VARCHAR(), nullable=True),
-    sa.PrimaryKeyConstraint('id')
-    )
-    # ### end Alembic commands ###
+    op.drop_table('post')
+    op.drop_table('user')
@@ -0,0 +1,72 @@
+"""Add normalized user columns for prefix search
+
+Revision ID: b5e1c7d3a924
+Revises: 7c2a9e4f1b58
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.search import USER_SEARCH_FIELDS, user_search_keys
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e1c7d3a924'
+down_revision: Union[str, None] = '7c2a9e4f1b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KEY_COLUMNS = [f'{name}_key' for name in USER_SEARCH_FIELDS]
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def backfill() -> None:
+    """Заполняет колонки поиска у существующих пользователей."""
+    user = sa.table(
+        'user',
+        sa.column('id'),
+        *map(sa.column, USER_SEARCH_FIELDS),
+        *map(sa.column, KEY_COLUMNS),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(user.c.id, *(user.c[name] for name in USER_SEARCH_FIELDS))
+    ).mappings().all()
+    statement = (
+        sa.update(user)
+        .where(user.c.id == sa.bindparam('user_id'))
+        .values({name: sa.bindparam(name) for name in KEY_COLUMNS})
+    )
+    for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        connection.execute(
+            statement,
+            [
+                {'user_id': row['id'], **user_search_keys(row)}
+                for row in rows[start:start + BACKFILL_BATCH_SIZE]
+            ],
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        for name in KEY_COLUMNS:
+            batch_op.add_column(sa.Column(name, sa.VARCHAR(), nullable=True))
+    backfill()
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        for name in KEY_COLUMNS:
+            batch_op.create_index(
+                batch_op.f(f'ix_user_{name}'), [name], unique=False
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        for name in KEY_COLUMNS:
+            batch_op.drop_index(batch_op.f(f'ix_user_{name}'))
+        for name in KEY_COLUMNS:
+            batch_op.drop_column(name)
@@ -0,0 +1,41 @@
+"""Add unique user email and post author indexes
+
+Revision ID: c81e4a6f2b93
+Revises: 5f3b9c1e7d20
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81e4a6f2b93'
+down_revision: Union[str, None] = '5f3b9c1e7d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Перед обновлением повторяющиеся email нужно устранить, иначе
+    уникальный индекс не создастся.
+    """
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_user_email'), ['email'], unique=True
+        )
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_post_user_id'), ['user_id'], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_post_user_id'))
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_email'))
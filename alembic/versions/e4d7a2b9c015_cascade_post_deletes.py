@@ -0,0 +1,53 @@
+"""Cascade post deletes with their author
+
+Revision ID: e4d7a2b9c015
+Revises: c81e4a6f2b93
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4d7a2b9c015'
+down_revision: Union[str, None] = 'c81e4a6f2b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def post_table(ondelete: str | None) -> sa.Table:
+    """Таблица post с внешним ключом на автора.
+
+    SQLite не изменяет внешние ключи на месте, поэтому таблица
+    пересоздаётся по этому описанию с копированием строк.
+    """
+    return sa.Table(
+        'post',
+        sa.MetaData(),
+        sa.Column('id', sa.INTEGER(), nullable=False),
+        sa.Column('title', sa.VARCHAR(), nullable=True),
+        sa.Column('content', sa.VARCHAR(), nullable=True),
+        sa.Column('user_id', sa.INTEGER(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete=ondelete),
+        sa.PrimaryKeyConstraint('id'),
+        sa.Index('ix_post_user_id', 'user_id'),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table(
+        'post', copy_from=post_table('CASCADE'), recreate='always'
+    ):
+        pass
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table(
+        'post', copy_from=post_table(None), recreate='always'
+    ):
+        pass
@@ -0,0 +1,177 @@
+"""Модуль для разбора тела массовых запросов и сборки ответа."""
+
+import json
+from typing import Any, Callable, Iterator, Sequence, TypeVar
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel import SQLModel
+
+from app.core.config import settings
+from app.schemas.bulk import BulkItemResult, BulkResult
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+ItemT = TypeVar("ItemT")
+
+
+def bulk_request_body(schema: type[BaseModel]) -> dict[str, Any]:
+    """Описание тела массового запроса для OpenAPI."""
+    items = {"type": "array", "items": schema.model_json_schema()}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": items},
+                NDJSON_MEDIA_TYPES[0]: {
+                    "schema": {
+                        "type": "string",
+                        "description": "По одному JSON-объекту на строку",
+                    }
+                },
+            },
+        }
+    }
+
+
+def _parse_ndjson(body: bytes) -> list[Any]:
+    """Разбирает NDJSON, ошибка в строке относится только к ней."""
+    items = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError as error:
+            items.append(error)
+    return items
+
+
+def _parse_json_array(body: bytes) -> list[Any]:
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Тело запроса не является корректным JSON",
+        )
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ожидается JSON-массив объектов",
+        )
+    return items
+
+
+async def read_bulk_items(
+    request: Request, schema: type[ModelT]
+) -> tuple[list[tuple[int, ModelT]], list[BulkItemResult]]:
+    """Читает и проверяет элементы массового запроса.
+
+    Тело принимается как JSON-массив или NDJSON (по Content-Type).
+    Возвращает прошедшие проверку элементы с их номерами и результаты
+    для элементов, не прошедших её.
+    """
+    media_type = request.headers.get("content-type", "")
+    media_type = media_type.split(";")[0].strip().lower()
+    body = await request.body()
+    if media_type in NDJSON_MEDIA_TYPES:
+        raw_items = _parse_ndjson(body)
+    else:
+        raw_items = _parse_json_array(body)
+    if len(raw_items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=(
+                f"Не более {settings.BULK_MAX_ITEMS} элементов в одном "
+                "запросе"
+            ),
+        )
+    valid, failed = [], []
+    for index, raw_item in enumerate(raw_items):
+        if isinstance(raw_item, ValueError):
+            failed.append(
+                BulkItemResult(
+                    index=index,
+                    status=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Некорректный JSON: {raw_item}",
+                )
+            )
+            continue
+        try:
+            valid.append((index, schema.model_validate(raw_item)))
+        except ValidationError as error:
+            failed.append(
+                BulkItemResult(
+                    index=index,
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=error.errors(
+                        include_url=False, include_context=False
+                    ),
+                )
+            )
+    return valid, failed
+
+
+def chunked(
+    items: Sequence[ItemT], size: int
+) -> Iterator[Sequence[ItemT]]:
+    """Делит последовательность на части не длиннее size."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def insert_returning_ids(
+    session: AsyncSession,
+    model: type[SQLModel],
+    items: list[BaseModel],
+    skip_conflicts_on: InstrumentedAttribute | None = None,
+    extra_values: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+) -> list[int | None]:
+    """Вставляет строки executemany-запросом и возвращает их id по порядку.
+
+    Строки многострочного INSERT ... VALUES получают rowid по возрастанию
+    в порядке VALUES, поэтому отсортированные id совпадают с порядком
+    вставленных элементов. sort_by_parameter_order в SQLite выполнил бы
+    INSERT построчно.
+
+    Если задан skip_conflicts_on, строки, нарушающие уникальный индекс
+    по этой колонке, пропускаются (ON CONFLICT DO NOTHING) и получают
+    None. Значения этой колонки внутри items должны быть уникальны.
+
+    extra_values добавляет к строке вычисляемые колонки.
+    """
+    rows = [item.model_dump() for item in items]
+    if extra_values is not None:
+        rows = [{**row, **extra_values(row)} for row in rows]
+    stmt = sqlite_insert(model)
+    if skip_conflicts_on is None:
+        return sorted(await session.scalars(stmt.returning(model.id), rows))
+    stmt = stmt.on_conflict_do_nothing(index_elements=[skip_conflicts_on])
+    inserted = sorted(
+        (await session.execute(
+            stmt.returning(model.id, skip_conflicts_on), rows
+        )).all()
+    )
+    inserted_keys = {key for _, key in inserted if key is not None}
+    ids = iter(row_id for row_id, _ in inserted)
+    key = skip_conflicts_on.key
+    return [
+        next(ids)
+        if row[key] is None or row[key] in inserted_keys
+        else None
+        for row in rows
+    ]
+
+
+def bulk_result(results: list[BulkItemResult]) -> BulkResult:
+    """Собирает ответ массовой операции в порядке элементов запроса."""
+    results.sort(key=lambda result: result.index)
+    failed = sum(result.status >= 400 for result in results)
+    return BulkResult(
+        succeeded=len(results) - failed, failed=failed, items=results
+    )
@@ -0,0 +1,57 @@
+"""Модуль для ответов с сущностями через кеш сериализованного JSON."""
+
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from app.api.etag import ETAG_HEADER, entity_etag, etag_matches, not_modified
+from app.core.cache import CacheKey, entity_cache
+
+CACHE_STATUS_HEADER = "X-Cache"
+
+
+async def cached_entity_response(
+    key: CacheKey,
+    load: Callable[[], Awaitable[Any]],
+    schema: type[BaseModel],
+    not_found_detail: str,
+    if_none_match: str | None = None,
+    parent: Callable[[Any], CacheKey | None] | None = None,
+) -> Response:
+    """Отдаёт сущность из кеша, при промахе загружает её через load.
+
+    В кеше хранится тело ответа вместе с ETag по версии строки. Тело
+    совпадает с тем, что FastAPI построил бы по response_model; при
+    совпадении If-None-Match оно не строится вовсе (ответ 304).
+    Отсутствующие сущности не кешируются.
+    """
+    cached = entity_cache.get(key)
+    cache_status = "HIT"
+    if cached is not None:
+        body, etag = cached
+    else:
+        cache_status = "MISS"
+        generation = entity_cache.generation
+        entity = await load()
+        if entity is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=not_found_detail,
+            )
+        etag = entity_etag(entity.id, entity.version)
+        if not etag_matches(if_none_match, etag):
+            body = JSONResponse(
+                schema.model_validate(entity).model_dump(mode="json")
+            ).body
+            entity_cache.put(
+                key,
+                (body, etag),
+                generation,
+                parent(entity) if parent else None,
+            )
+    headers = {ETAG_HEADER: etag, CACHE_STATUS_HEADER: cache_status}
+    if etag_matches(if_none_match, etag):
+        return not_modified(headers)
+    return Response(body, media_type="application/json", headers=headers)
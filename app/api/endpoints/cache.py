@@ -0,0 +1,20 @@
+"""Модуль для эндпоинта статистики кеша сущностей."""
+
+from fastapi import APIRouter, status
+
+from app.core.cache import entity_cache
+from app.schemas.cache import CacheStats
+
+cache_router = APIRouter()
+
+
+@cache_router.get(
+    "/stats/",
+    summary="Получить статистику кеша",
+    response_model=CacheStats,
+    response_description="Счётчики кеша текущего воркера",
+    status_code=status.HTTP_200_OK,
+)
+async def get_cache_stats() -> CacheStats:
+    """Возвращает счётчики кеша пользователей и постов этого воркера."""
+    return CacheStats(**entity_cache.stats())
@@ -0,0 +1,24 @@
+"""Модуль для эндпоинта метрик в формате Prometheus."""
+
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
+
+metrics_router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@metrics_router.get(
+    "",
+    summary="Получить метрики",
+    response_class=PlainTextResponse,
+    response_description="Метрики текущего воркера в формате Prometheus",
+    status_code=status.HTTP_200_OK,
+)
+async def get_metrics() -> PlainTextResponse:
+    """Возвращает метрики запросов, БД и загрузок этого воркера."""
+    return PlainTextResponse(
+        registry.render(), media_type=PROMETHEUS_CONTENT_TYPE
+    )
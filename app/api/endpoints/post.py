@@ -1,18 +1,113 @@
 """Модуль для работы с эндпоинтами постов пользователей."""
 
-from typing import Annotated
+from contextlib import contextmanager
+from typing import Annotated, Any, Iterator
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import (
+    APIRouter, Header, HTTPException, Query, Request, Response, status
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
+from app.api.bulk import (
+    bulk_request_body,
+    bulk_result,
+    chunked,
+    insert_returning_ids,
+    read_bulk_items,
+)
+from app.api.cache import cached_entity_response
+from app.api.etag import (
+    ETAG_HEADER, collection_etag, etag_matches, not_modified
+)
+from app.api.export import ExportFormat, export_response
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    check_pagination_mode,
+    decode_cursor,
+    encode_cursor,
+    total_count,
+    user_post_count,
+)
+from app.api.serialization import (
+    FieldsQuery,
+    entity_fields_response,
+    json_list_response,
+    projection,
+    response_fields,
+    row_dicts,
+)
+from app.core.cache import post_key, user_key
+from app.core.config import settings
+from app.db.cache_sync import run_write_invalidating
+from app.db.counters import POST_COUNT
 from app.db.models import Post, User
-from app.db.session import SessionDep
+from app.db.search import (
+    post_fts, post_search_match, post_search_rank, post_search_snippet
+)
+from app.db.session import ReadSessionMakerDep, SessionDep
+from app.db.writer import run_write
+from app.schemas.bulk import BulkItemResult, BulkResult
 from app.schemas.post import (
-    PostCreate, PostRead, PostUpdate, PostPartialUpdate
+    PostBulkUpdate,
+    PostCreate,
+    PostRead,
+    PostSearchResult,
+    PostUpdate,
+    PostPartialUpdate,
 )
 
 post_router = APIRouter()
 
+USER_NOT_FOUND_DETAIL = "Пользователь не найден"
+
+
+@contextmanager
+def existing_author() -> Iterator[None]:
+    """Несуществующий автор при записи поста — ошибка 404.
+
+    Существование автора проверяет внешний ключ БД, а не
+    предварительный SELECT.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        if "FOREIGN KEY" not in str(error.orig):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=USER_NOT_FOUND_DETAIL,
+        )
+
+
+async def flush_post(session: AsyncSession) -> None:
+    """Сохраняет изменения поста, несуществующий автор — ошибка 404."""
+    with existing_author():
+        await session.flush()
+
+
+async def update_post_row(
+    session: AsyncSession, post_id: int, values: dict[str, Any]
+) -> Post:
+    """Обновляет пост одним UPDATE ... RETURNING, нет поста — 404."""
+    with existing_author():
+        db_post = await session.scalar(
+            update(Post)
+            .where(Post.id == post_id)
+            .values(values)
+            .returning(Post)
+        )
+    if db_post is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пост пользователя для обновления не найден",
+        )
+    return db_post
+
 
 @post_router.get(
     "/",
@@ -23,11 +118,165 @@ post_router = APIRouter()
 )
 async def get_posts(
     session: SessionDep,
+    response: Response,
     offset: int = 0,
-    limit: Annotated[int, Query(le=100)] = 100,
-) -> list[Post]:
-    db_posts = await session.execute(select(Post).offset(offset).limit(limit))
-    return db_posts.scalars().all()
+    limit: Annotated[int, Query(ge=1, le=100)] = 100,
+    cursor: Annotated[
+        str | None,
+        Query(description="Курсор следующей страницы из X-Next-Cursor"),
+    ] = None,
+    user_id: Annotated[
+        int | None, Query(description="Только посты этого автора")
+    ] = None,
+    fields: FieldsQuery = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Возвращает страницу постов по offset или по курсору.
+
+    При фильтре по автору курсор строится по паре (user_id, id).
+    Читаются только колонки полей ответа (fields=, по умолчанию все
+    поля PostRead), кортежами, и кодируются в JSON без повторной
+    проверки схемой. ETag строится по версиям постов страницы, при
+    совпадении If-None-Match тело не сериализуется (ответ 304).
+    Общее число постов (X-Total-Count, с фильтром — постов автора)
+    читается из счётчика, а не COUNT(*).
+    """
+    check_pagination_mode(offset, cursor)
+    post_fields = response_fields(PostRead, fields)
+    query = (
+        select(*projection(Post, post_fields))
+        .order_by(Post.id)
+        .limit(limit)
+    )
+    if user_id is not None:
+        query = query.where(Post.user_id == user_id)
+    if cursor is not None:
+        if user_id is not None:
+            after = decode_cursor(cursor, "user_id", "id")
+            if after["user_id"] != user_id:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Курсор получен для другого автора",
+                )
+        else:
+            after = decode_cursor(cursor, "id")
+        query = query.where(Post.id > after["id"])
+    else:
+        query = query.offset(offset)
+    rows = (await session.execute(query)).all()
+    if rows and len(rows) == limit:
+        keys = {"id": rows[-1].row_id}
+        if user_id is not None:
+            keys = {"user_id": user_id, **keys}
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(**keys)
+    if user_id is not None:
+        total = await user_post_count(session, user_id)
+    else:
+        total = await total_count(session, POST_COUNT)
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    response.headers[ETAG_HEADER] = collection_etag(
+        ("posts", offset, limit, cursor, user_id, post_fields, total),
+        ((row.row_id, row.row_version) for row in rows),
+    )
+    if etag_matches(if_none_match, response.headers[ETAG_HEADER]):
+        return not_modified(dict(response.headers))
+    return json_list_response(
+        row_dicts(post_fields, rows), dict(response.headers)
+    )
+
+
+@post_router.get(
+    "/export/",
+    summary="Выгрузить все посты пользователей",
+    response_description="Посты в NDJSON или CSV",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def export_posts(
+    session_maker: ReadSessionMakerDep,
+    export_format: Annotated[
+        ExportFormat, Query(alias="format", description="Формат выгрузки")
+    ] = ExportFormat.ndjson,
+    user_id: Annotated[
+        int | None, Query(description="Только посты этого автора")
+    ] = None,
+) -> StreamingResponse:
+    """Потоково выгружает посты в порядке id."""
+    columns = [getattr(Post, name) for name in PostRead.model_fields]
+    query = select(*columns).order_by(Post.id)
+    if user_id is not None:
+        query = query.where(Post.user_id == user_id)
+    return export_response(
+        session_maker, query, export_format, filename="posts"
+    )
+
+
+@post_router.get(
+    "/search/",
+    summary="Найти посты по словам",
+    response_model=list[PostSearchResult],
+    response_description="Найденные посты, самые релевантные первыми",
+    status_code=status.HTTP_200_OK,
+)
+async def search_posts(
+    session: SessionDep,
+    response: Response,
+    q: Annotated[
+        str,
+        Query(min_length=1, max_length=200, description="Слова для поиска"),
+    ],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Annotated[
+        str | None,
+        Query(description="Курсор следующей страницы из X-Next-Cursor"),
+    ] = None,
+) -> Response:
+    """Ищет посты по названию и тексту в полнотекстовом индексе.
+
+    Результаты упорядочены по рангу BM25, затем по id; курсор следующей
+    страницы строится по этой паре.
+    """
+    match = post_search_match(q)
+    if match is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="В поисковом запросе нет слов",
+        )
+    rank = post_search_rank.label("rank")
+    query = (
+        select(
+            Post.id,
+            Post.user_id,
+            Post.title,
+            post_search_snippet.label("snippet"),
+            rank,
+        )
+        .select_from(post_fts)
+        .join(Post, Post.id == post_fts.c.rowid)
+        .where(match)
+        .order_by(rank, Post.id)
+        .limit(limit)
+    )
+    if cursor is not None:
+        after = decode_cursor(cursor, "rank", "id")
+        query = query.where(
+            or_(
+                post_search_rank > after["rank"],
+                and_(
+                    post_search_rank == after["rank"],
+                    Post.id > after["id"],
+                ),
+            )
+        )
+    rows = (await session.execute(query)).all()
+    if rows and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            rank=rows[-1].rank, id=rows[-1].id
+        )
+    return json_list_response(
+        row_dicts(list(PostSearchResult.model_fields), rows),
+        dict(response.headers),
+    )
 
 
 @post_router.post(
@@ -42,17 +291,190 @@ async def create_post(
     session: SessionDep,
 ):
     """Создаёт новый пост от имени пользователя."""
-    user = await session.get(User, post.user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пользователь не найден",
+
+    async def create(session: AsyncSession) -> Post:
+        db_post = Post.model_validate(post)
+        session.add(db_post)
+        await flush_post(session)
+        return db_post
+
+    return await run_write(session, create)
+
+
+def _missing(index: int, detail: str) -> BulkItemResult:
+    return BulkItemResult(
+        index=index, status=status.HTTP_404_NOT_FOUND, detail=detail
+    )
+
+
+@post_router.post(
+    "/bulk/",
+    summary="Создать посты пачкой",
+    response_model=BulkResult,
+    response_description="Результат создания по каждому посту",
+    status_code=status.HTTP_200_OK,
+    openapi_extra=bulk_request_body(PostCreate),
+)
+async def create_posts_bulk(
+    request: Request,
+    session: SessionDep,
+) -> BulkResult:
+    """Создаёт посты из JSON-массива или NDJSON.
+
+    Посты вставляются пачками по BULK_BATCH_SIZE, одна транзакция на
+    пачку. Посты несуществующих пользователей не создаются.
+    """
+    posts, results = await read_bulk_items(request, PostCreate)
+
+    def insert_batch(batch):
+        async def create(session: AsyncSession) -> list[BulkItemResult]:
+            user_ids = {post.user_id for _, post in batch}
+            existing = set(
+                await session.scalars(
+                    select(User.id).where(User.id.in_(user_ids))
+                )
+            )
+            created, batch_results = [], []
+            for index, post in batch:
+                if post.user_id in existing:
+                    created.append((index, post))
+                else:
+                    batch_results.append(
+                        _missing(index, USER_NOT_FOUND_DETAIL)
+                    )
+            if created:
+                post_ids = await insert_returning_ids(
+                    session, Post, [post for _, post in created]
+                )
+                batch_results.extend(
+                    BulkItemResult(
+                        index=index,
+                        status=status.HTTP_201_CREATED,
+                        id=post_id,
+                    )
+                    for (index, _), post_id in zip(created, post_ids)
+                )
+            return batch_results
+
+        return create
+
+    for batch in chunked(posts, settings.BULK_BATCH_SIZE):
+        results.extend(await run_write(session, insert_batch(batch)))
+    return bulk_result(results)
+
+
+@post_router.patch(
+    "/bulk/",
+    summary="Частично обновить посты пачкой",
+    response_model=BulkResult,
+    response_description="Результат обновления по каждому посту",
+    status_code=status.HTTP_200_OK,
+    openapi_extra=bulk_request_body(PostBulkUpdate),
+)
+async def partial_update_posts_bulk(
+    request: Request,
+    session: SessionDep,
+) -> BulkResult:
+    """Частично обновляет посты из JSON-массива или NDJSON.
+
+    Каждый элемент содержит id поста и изменяемые поля. Обновления
+    выполняются пачками по BULK_BATCH_SIZE через UPDATE по первичному
+    ключу, одна транзакция на пачку.
+    """
+    posts, results = await read_bulk_items(request, PostBulkUpdate)
+
+    def update_batch(batch):
+        async def update_posts(
+            session: AsyncSession,
+        ) -> list[BulkItemResult]:
+            post_ids = {post.id for _, post in batch}
+            existing = set(
+                await session.scalars(
+                    select(Post.id).where(Post.id.in_(post_ids))
+                )
+            )
+            # Автор проверяется заранее: executemany не сообщает, какая
+            # строка нарушила внешний ключ.
+            user_ids = {post.user_id for _, post in batch}
+            users = set(
+                await session.scalars(
+                    select(User.id).where(User.id.in_(user_ids))
+                )
+            )
+            rows, batch_results = [], []
+            for index, post in batch:
+                if post.id not in existing:
+                    batch_results.append(
+                        _missing(
+                            index,
+                            "Пост пользователя для обновления не найден",
+                        )
+                    )
+                    continue
+                if post.user_id not in users:
+                    batch_results.append(
+                        _missing(index, USER_NOT_FOUND_DETAIL)
+                    )
+                    continue
+                rows.append(post.model_dump(exclude_unset=True))
+                batch_results.append(
+                    BulkItemResult(
+                        index=index, status=status.HTTP_200_OK, id=post.id
+                    )
+                )
+            if rows:
+                await session.execute(update(Post), rows)
+            return batch_results
+
+        return update_posts
+
+    for batch in chunked(posts, settings.BULK_BATCH_SIZE):
+        results.extend(
+            await run_write_invalidating(
+                session,
+                update_batch(batch),
+                [post_key(post.id) for _, post in batch],
+            )
         )
-    post = Post.model_validate(post)
-    session.add(post)
-    await session.commit()
-    await session.refresh(post)
-    return post
+    return bulk_result(results)
+
+
+@post_router.get(
+    "/{post_id}/",
+    summary="Получить пост пользователя",
+    response_model=PostRead,
+    response_description="Выбранный пост пользователя",
+    status_code=status.HTTP_200_OK,
+)
+async def get_post(
+    post_id: int,
+    session: SessionDep,
+    fields: FieldsQuery = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Возвращает пост, по возможности из кеша ответов, с ETag.
+
+    С fields= из БД читаются только выбранные колонки, минуя кеш.
+    """
+    if fields is not None:
+        return await entity_fields_response(
+            session,
+            Post,
+            post_id,
+            response_fields(PostRead, fields),
+            not_found_detail="Пост пользователя не найден",
+            if_none_match=if_none_match,
+        )
+    return await cached_entity_response(
+        post_key(post_id),
+        lambda: session.get(Post, post_id),
+        PostRead,
+        not_found_detail="Пост пользователя не найден",
+        if_none_match=if_none_match,
+        parent=lambda db_post: (
+            user_key(db_post.user_id) if db_post.user_id else None
+        ),
+    )
 
 
 @post_router.put(
@@ -68,19 +490,13 @@ async def update_post(
     session: SessionDep,
 ) -> Post:
     """Полностью обновляет данные поста пользователя."""
-    db_post = await session.get(Post, post_id)
-    if not db_post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пост пользователя для обновления не найден",
-        )
-    post_data = post.model_dump()
-    for key, value in post_data.items():
-        setattr(db_post, key, value)
-    session.add(db_post)
-    await session.commit()
-    await session.refresh(db_post)
-    return db_post
+
+    async def update(session: AsyncSession) -> Post:
+        return await update_post_row(session, post_id, post.model_dump())
+
+    return await run_write_invalidating(
+        session, update, [post_key(post_id)]
+    )
 
 
 @post_router.patch(
@@ -96,18 +512,14 @@ async def partial_update_post(
     session: SessionDep,
 ) -> Post:
     """Частично обновляет данные пользователя."""
-    db_post = await session.get(Post, post_id)
-    if not db_post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пост пользователя для обновления не найден",
-        )
     update_post_data = post.model_dump(exclude_unset=True)
-    db_post.sqlmodel_update(update_post_data)
-    session.add(db_post)
-    await session.commit()
-    await session.refresh(db_post)
-    return db_post
+
+    async def update(session: AsyncSession) -> Post:
+        return await update_post_row(session, post_id, update_post_data)
+
+    return await run_write_invalidating(
+        session, update, [post_key(post_id)]
+    )
 
 
 @post_router.delete(
@@ -117,13 +529,17 @@ async def partial_update_post(
     status_code=status.HTTP_204_NO_CONTENT,
 )
 async def delete_post(post_id: int, session: SessionDep):
-    """Удаляет пост пользователя."""
-    db_post = await session.get(Post, post_id)
-    if not db_post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пост пользователя для обновления не найден",
+    """Удаляет пост пользователя одним DELETE ... RETURNING."""
+
+    async def remove(session: AsyncSession) -> None:
+        deleted_id = await session.scalar(
+            delete(Post).where(Post.id == post_id).returning(Post.id)
         )
-    await session.delete(db_post)
-    await session.commit()
+        if deleted_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пост пользователя для обновления не найден",
+            )
+
+    await run_write_invalidating(session, remove, [post_key(post_id)])
     return {"ok": True}
@@ -1,17 +1,60 @@
 """Модуль для работы с эндпоинтами по загрузке фото пользователей."""
 
-import shutil
-from pathlib import Path
+import time
 
-from fastapi import APIRouter, File, HTTPException, Request, UploadFile, status
+from fastapi import APIRouter, HTTPException, Request, status
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.constants import ALLOWED_IMAGE_TYPES
-from app.core.constants import UPLOAD_DIR
+from app.core.cache import user_key
+from app.core.images import (
+    ImageProcessingError,
+    create_photo_variants,
+    variant_static_paths,
+)
+from app.core.metrics import upload_bytes, upload_duration
+from app.core.storage import (
+    MalformedUploadError,
+    UnsupportedImageError,
+    UploadTooLargeError,
+    discard_photo,
+    publish_photo,
+    receive_image_upload,
+)
+from app.db.cache_sync import run_write_invalidating
 from app.db.models import User
+from app.db.photos import release_photo
 from app.db.session import SessionDep
 from app.schemas.user import UserRead
 
+UNSUPPORTED_IMAGE_DETAIL = (
+    "Разрешены только файлы изображений JPEG, PNG, GIF, WEBP"
+)
+UPLOAD_TOO_LARGE_DETAIL = "Размер файла превышает допустимый"
+
+
+MALFORMED_UPLOAD_DETAIL = (
+    "Ожидается файл в поле file формы multipart/form-data"
+)
+# Тело разбирается в эндпоинте по мере чтения, поэтому FastAPI не знает
+# о нём и описание для OpenAPI задаётся явно.
+PHOTO_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"}
+                    },
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
 user_photo_router = APIRouter()
 
 
@@ -21,46 +64,100 @@ user_photo_router = APIRouter()
     response_model=UserRead,
     response_description="Обновленный пользователь с фото",
     status_code=status.HTTP_201_CREATED,
+    openapi_extra=PHOTO_REQUEST_BODY,
 )
 async def upload_user_photo(
         request: Request,
         user_id: int,
         session: SessionDep,
-        file: UploadFile = File(...)
 ) -> User:
-    if file.content_type not in ALLOWED_IMAGE_TYPES:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Разрешены только файлы изображений JPEG, PNG, GIF, WEBP"
-        )
+    """Проверяет изображение по содержимому и публикует его в /static.
+
+    Тело запроса разбирается по мере чтения: слишком большой файл или
+    файл, который по первым байтам не является изображением, отклоняется
+    без чтения остального тела. Фото хранится под хешем содержимого,
+    одинаковые фото разных пользователей не дублируются. Вместе с
+    оригиналом публикуются уменьшенные копии без метаданных.
+    """
+    started = time.perf_counter()
     try:
-        db_user = await session.get(User, user_id)
-        if not db_user:
+        try:
+            if not await session.get(User, user_id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Пользователь для загрузки фото не найден"
+                )
+        except SQLAlchemyError:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Пользователь для загрузки фото не найден"
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Ошибка при запросе к базе данных"
             )
-    except SQLAlchemyError:
+        # Соединение-писатель не должно простаивать, пока идёт запись
+        # файла и обработка изображения.
+        await session.close()
+        staged = await receive_image_upload(request)
+        try:
+            try:
+                staged.variants = await create_photo_variants(
+                    staged.original, staged.digest, staged.directory
+                )
+            except ImageProcessingError:
+                raise UnsupportedImageError
+            photo_url = str(request.url_for("static", path=staged.filename))
+            photo_variants = {
+                size: str(request.url_for("static", path=path))
+                for size, path in variant_static_paths(
+                    staged.variants
+                ).items()
+            }
+
+            async def attach_photo(
+                session: AsyncSession,
+            ) -> tuple[User, str | None]:
+                db_user = await session.get(User, user_id)
+                if not db_user:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Пользователь для загрузки фото не найден"
+                    )
+                previous_hash = db_user.photo_hash
+                db_user.photo_url = photo_url
+                db_user.photo_hash = staged.digest
+                db_user.photo_variants = photo_variants
+                session.add(db_user)
+                await session.flush()
+                # Файлы публикуются под блокировкой записи: удалить их
+                # как неиспользуемые до фиксации ссылки никто не может.
+                await publish_photo(staged)
+                return db_user, previous_hash
+
+            db_user, previous_hash = await run_write_invalidating(
+                session, attach_photo, [user_key(user_id)]
+            )
+        finally:
+            await discard_photo(staged)
+        if previous_hash != staged.digest:
+            await release_photo(session, previous_hash)
+        upload_bytes.inc(amount=staged.size)
+        upload_duration.observe(time.perf_counter() - started)
+        return db_user
+    except UnsupportedImageError:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Ошибка при запросе к базе данных"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=UNSUPPORTED_IMAGE_DETAIL,
+        )
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=UPLOAD_TOO_LARGE_DETAIL,
+        )
+    except MalformedUploadError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=MALFORMED_UPLOAD_DETAIL,
         )
-    file_extension = Path(file.filename).suffix
-    filename = f"photo_user_{user_id}{file_extension}"
-    file_location = UPLOAD_DIR / filename
-    try:
-        with file_location.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        photo_url = str(request.url_for("static", path=filename))
-        db_user.photo_url = photo_url
-        session.add(db_user)
-        await session.commit()
-        await session.refresh(db_user)
-        return db_user
     except IOError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при сохранении файла: {str(e)}"
         )
-    finally:
-        await file.close()
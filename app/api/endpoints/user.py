@@ -1,36 +1,295 @@
 """Модуль для работы с эндпоинтами пользователей."""
 
-from typing import Annotated
+from contextlib import contextmanager
+from typing import Annotated, Any, Iterator, Literal
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import (
+    APIRouter, Header, HTTPException, Query, Request, Response, status
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, case, delete, null, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
-from app.db.models import User
-from app.db.session import SessionDep
+from app.api.bulk import (
+    bulk_request_body,
+    bulk_result,
+    chunked,
+    insert_returning_ids,
+    read_bulk_items,
+)
+from app.api.cache import cached_entity_response
+from app.api.etag import (
+    ETAG_HEADER, collection_etag, etag_matches, not_modified
+)
+from app.api.export import ExportFormat, export_response
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    check_pagination_mode,
+    decode_cursor,
+    encode_cursor,
+    total_count,
+    user_post_count,
+)
+from app.api.serialization import (
+    FieldsQuery,
+    entity_fields_response,
+    json_list_response,
+    projection,
+    response_fields,
+    row_dicts,
+)
+from app.core.cache import user_key
+from app.core.config import settings
+from app.db.cache_sync import run_write_invalidating
+from app.db.counters import USER_COUNT
+from app.db.models import Post, User
+from app.db.photos import release_photo
+from app.db.search import (
+    USER_SEARCH_FIELDS, prefix_condition, search_key, user_search_keys
+)
+from app.db.session import ReadSessionMakerDep, SessionDep
+from app.db.writer import run_write
+from app.schemas.bulk import BulkItemResult, BulkResult
+from app.schemas.post import PostRead
 from app.schemas.user import (
     UserCreate,
     UserPartialUpdate,
     UserRead,
+    UserReadWithPosts,
     UserUpdate,
 )
 
+EMAIL_TAKEN_DETAIL = (
+    "Электронная почта уже используется для другого пользователя"
+)
+
+POST_READ_FIELDS = response_fields(PostRead)
+
 user_router = APIRouter()
 
 
+@contextmanager
+def unique_email(detail: str = EMAIL_TAKEN_DETAIL) -> Iterator[None]:
+    """Занятый email при записи пользователя — ошибка 400.
+
+    Уникальность email обеспечивает индекс БД, а не предварительный
+    SELECT, который не защищает от параллельных запросов.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        if "user.email" not in str(error.orig):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=detail
+        )
+
+
+async def flush_user(
+    session: AsyncSession, detail: str = EMAIL_TAKEN_DETAIL
+) -> None:
+    """Сохраняет изменения пользователя, занятый email — ошибка 400."""
+    with unique_email(detail):
+        await session.flush()
+
+
+async def update_user_row(
+    session: AsyncSession,
+    user_id: int,
+    values: dict[str, Any],
+    detail: str = EMAIL_TAKEN_DETAIL,
+) -> User:
+    """Обновляет пользователя одним UPDATE ... RETURNING.
+
+    Пустой результат означает, что пользователя нет (404). Пустое
+    обновление читает пользователя без UPDATE, не меняя его версию.
+    """
+    if values:
+        statement = (
+            update(User)
+            .where(User.id == user_id)
+            .values(values)
+            .returning(User)
+        )
+    else:
+        statement = select(User).where(User.id == user_id)
+    with unique_email(detail):
+        db_user = await session.scalar(statement)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь для обновления не найден",
+        )
+    return db_user
+
+
 @user_router.get(
     "/",
     summary="Получить всех пользователей",
-    response_model=list[UserRead],
-    response_description="Список всех пользователей",
+    response_model=list[UserRead] | list[UserReadWithPosts],
+    response_description=(
+        "Список всех пользователей, с include=posts — вместе с постами"
+    ),
     status_code=status.HTTP_200_OK,
 )
 async def get_users(
     session: SessionDep,
+    response: Response,
     offset: int = 0,
-    limit: Annotated[int, Query(le=100)] = 100,
-) -> list[User]:
-    db_users = await session.execute(select(User).offset(offset).limit(limit))
-    return db_users.scalars().all()
+    limit: Annotated[int, Query(ge=1, le=100)] = 100,
+    cursor: Annotated[
+        str | None,
+        Query(description="Курсор следующей страницы из X-Next-Cursor"),
+    ] = None,
+    include: Annotated[
+        Literal["posts"] | None,
+        Query(description="posts — добавить посты каждого пользователя"),
+    ] = None,
+    fields: FieldsQuery = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Возвращает страницу пользователей по offset или по курсору.
+
+    Читаются только колонки полей ответа (fields=, по умолчанию все
+    поля UserRead), кортежами, и кодируются в JSON без ORM-объектов и
+    без повторной проверки схемой (см. serialization).
+    С include=posts посты всей страницы загружаются одним запросом,
+    а не отдельным запросом на каждого пользователя. ETag строится по
+    версиям строк страницы (и их постов), при совпадении If-None-Match
+    тело не сериализуется (ответ 304). Общее число пользователей
+    (X-Total-Count) читается из счётчика, а не COUNT(*).
+    """
+    check_pagination_mode(offset, cursor)
+    user_fields = response_fields(UserRead, fields)
+    query = (
+        select(*projection(User, user_fields))
+        .order_by(User.id)
+        .limit(limit)
+    )
+    if cursor is not None:
+        query = query.where(User.id > decode_cursor(cursor, "id")["id"])
+    else:
+        query = query.offset(offset)
+    rows = (await session.execute(query)).all()
+    if rows and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            id=rows[-1].row_id
+        )
+    total = await total_count(session, USER_COUNT)
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    versions = [(row.row_id, row.row_version) for row in rows]
+    post_rows = []
+    if include == "posts" and rows:
+        post_rows = (
+            await session.execute(
+                select(*projection(Post, POST_READ_FIELDS))
+                .where(Post.user_id.in_([row.row_id for row in rows]))
+                .order_by(Post.user_id, Post.id)
+            )
+        ).all()
+        versions += [(row.row_id, row.row_version) for row in post_rows]
+    response.headers[ETAG_HEADER] = collection_etag(
+        ("users", offset, limit, cursor, include, user_fields, total),
+        versions,
+    )
+    if etag_matches(if_none_match, response.headers[ETAG_HEADER]):
+        return not_modified(dict(response.headers))
+    users = row_dicts(user_fields, rows)
+    if include == "posts":
+        posts = {row.row_id: [] for row in rows}
+        for post in row_dicts(POST_READ_FIELDS, post_rows):
+            posts[post["user_id"]].append(post)
+        for user, row in zip(users, rows):
+            user["posts"] = posts[row.row_id]
+    return json_list_response(users, dict(response.headers))
+
+
+@user_router.get(
+    "/export/",
+    summary="Выгрузить всех пользователей",
+    response_description="Пользователи в NDJSON или CSV",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+)
+async def export_users(
+    session_maker: ReadSessionMakerDep,
+    export_format: Annotated[
+        ExportFormat, Query(alias="format", description="Формат выгрузки")
+    ] = ExportFormat.ndjson,
+) -> StreamingResponse:
+    """Потоково выгружает всех пользователей в порядке id."""
+    columns = [getattr(User, name) for name in UserRead.model_fields]
+    return export_response(
+        session_maker,
+        select(*columns).order_by(User.id),
+        export_format,
+        filename="users",
+    )
+
+
+@user_router.get(
+    "/search/",
+    summary="Найти пользователей по началу ФИО или email",
+    response_model=list[UserRead],
+    response_description="Найденные пользователи по алфавиту фамилий",
+    status_code=status.HTTP_200_OK,
+)
+async def search_users(
+    session: SessionDep,
+    q: Annotated[
+        str,
+        Query(
+            min_length=1,
+            max_length=100,
+            description="Начала слов: фамилии, имени, отчества или email",
+        ),
+    ],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    fields: FieldsQuery = None,
+) -> Response:
+    """Ищет пользователей по началу фамилии, имени, отчества или email.
+
+    Каждое слово запроса должно быть началом одного из этих полей,
+    регистр и различие ё/е не учитываются. Префиксы ищутся диапазонами
+    по индексам колонок *_key, без просмотра всей таблицы.
+    """
+    prefixes = [key for key in map(search_key, q.split()) if key]
+    if not prefixes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="В поисковом запросе нет слов",
+        )
+    key_columns = [
+        getattr(User, f"{name}_key") for name in USER_SEARCH_FIELDS
+    ]
+    user_fields = response_fields(UserRead, fields)
+    query = (
+        select(*projection(User, user_fields))
+        .where(
+            and_(
+                *(
+                    or_(
+                        *(
+                            prefix_condition(key_column, prefix)
+                            for key_column in key_columns
+                        )
+                    )
+                    for prefix in prefixes
+                )
+            )
+        )
+        .order_by(
+            User.second_name_key.nulls_last(),
+            User.first_name_key.nulls_last(),
+            User.id,
+        )
+        .limit(limit)
+    )
+    rows = (await session.execute(query)).all()
+    return json_list_response(row_dicts(user_fields, rows), {})
 
 
 @user_router.post(
@@ -45,20 +304,81 @@ async def create_user(
     session: SessionDep,
 ) -> User:
     """Создаёт нового пользователя."""
-    stmt = await session.execute(select(User).where(User.email == user.email))
-    existing_user = stmt.scalars().first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=(
-                "Электронная почта уже используется для другого пользователя"
-            ),
+
+    async def create(session: AsyncSession) -> User:
+        db_user = User.model_validate(
+            user, update=user_search_keys(user.model_dump())
         )
-    user = User.model_validate(user)
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
-    return user
+        session.add(db_user)
+        await flush_user(session)
+        return db_user
+
+    return await run_write(session, create)
+
+
+@user_router.post(
+    "/bulk/",
+    summary="Создать пользователей пачкой",
+    response_model=BulkResult,
+    response_description="Результат создания по каждому пользователю",
+    status_code=status.HTTP_200_OK,
+    openapi_extra=bulk_request_body(UserCreate),
+)
+async def create_users_bulk(
+    request: Request,
+    session: SessionDep,
+) -> BulkResult:
+    """Создаёт пользователей из JSON-массива или NDJSON.
+
+    Пользователи вставляются пачками по BULK_BATCH_SIZE, одна транзакция
+    на пачку. Ошибка элемента (невалидные данные, занятая почта) не
+    мешает созданию остальных и возвращается в его результате.
+    """
+    users, results = await read_bulk_items(request, UserCreate)
+    seen_emails = set()
+    pending = []
+    for index, user in users:
+        if user.email is not None and user.email in seen_emails:
+            results.append(
+                BulkItemResult(
+                    index=index,
+                    status=status.HTTP_400_BAD_REQUEST,
+                    detail=EMAIL_TAKEN_DETAIL,
+                )
+            )
+            continue
+        seen_emails.add(user.email)
+        pending.append((index, user))
+
+    def insert_batch(batch):
+        async def create(session: AsyncSession) -> list[BulkItemResult]:
+            user_ids = await insert_returning_ids(
+                session,
+                User,
+                [user for _, user in batch],
+                skip_conflicts_on=User.email,
+                extra_values=user_search_keys,
+            )
+            return [
+                BulkItemResult(
+                    index=index,
+                    status=status.HTTP_201_CREATED,
+                    id=user_id,
+                )
+                if user_id is not None
+                else BulkItemResult(
+                    index=index,
+                    status=status.HTTP_400_BAD_REQUEST,
+                    detail=EMAIL_TAKEN_DETAIL,
+                )
+                for (index, _), user_id in zip(batch, user_ids)
+            ]
+
+        return create
+
+    for batch in chunked(pending, settings.BULK_BATCH_SIZE):
+        results.extend(await run_write(session, insert_batch(batch)))
+    return bulk_result(results)
 
 
 @user_router.get(
@@ -68,11 +388,86 @@ async def create_user(
     response_description="Выбранный пользователь",
     status_code=status.HTTP_200_OK,
 )
-async def get_user(user_id: int, session: SessionDep) -> User:
-    db_user = await session.get(User, user_id)
-    if not db_user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
-    return db_user
+async def get_user(
+    user_id: int,
+    session: SessionDep,
+    fields: FieldsQuery = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Возвращает пользователя, по возможности из кеша ответов.
+
+    С fields= из БД читаются только выбранные колонки, минуя кеш.
+    ETag строится по версии строки; при совпадении If-None-Match
+    возвращается 304 без тела.
+    """
+    if fields is not None:
+        return await entity_fields_response(
+            session,
+            User,
+            user_id,
+            response_fields(UserRead, fields),
+            not_found_detail="Пользователь не найден",
+            if_none_match=if_none_match,
+        )
+    return await cached_entity_response(
+        user_key(user_id),
+        lambda: session.get(User, user_id),
+        UserRead,
+        not_found_detail="Пользователь не найден",
+        if_none_match=if_none_match,
+    )
+
+
+@user_router.get(
+    "/{user_id}/posts/",
+    summary="Получить посты пользователя",
+    response_model=list[PostRead],
+    response_description="Страница постов пользователя",
+    status_code=status.HTTP_200_OK,
+)
+async def get_user_posts(
+    user_id: int,
+    session: SessionDep,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=100)] = 100,
+    cursor: Annotated[
+        str | None,
+        Query(description="Курсор следующей страницы из X-Next-Cursor"),
+    ] = None,
+    fields: FieldsQuery = None,
+) -> Response:
+    """Возвращает страницу постов пользователя по курсору в порядке id.
+
+    Страница читается по индексу post.user_id; существование
+    пользователя проверяется, только если постов на странице нет.
+    Читаются только колонки полей ответа (fields=). Число постов
+    пользователя (X-Total-Count) читается из счётчика.
+    """
+    post_fields = response_fields(PostRead, fields)
+    query = (
+        select(*projection(Post, post_fields))
+        .where(Post.user_id == user_id)
+        .order_by(Post.id)
+        .limit(limit)
+    )
+    if cursor is not None:
+        query = query.where(Post.id > decode_cursor(cursor, "id")["id"])
+    rows = (await session.execute(query)).all()
+    if not rows and not await session.get(User, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден",
+        )
+    if rows and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            id=rows[-1].row_id
+        )
+    response.headers[TOTAL_COUNT_HEADER] = str(
+        await user_post_count(session, user_id)
+    )
+    return json_list_response(
+        row_dicts(post_fields, rows), dict(response.headers)
+    )
 
 
 @user_router.put(
@@ -87,20 +482,35 @@ async def update_user(
     user: UserUpdate,
     session: SessionDep,
 ) -> User:
-    """Полностью обновляет данные пользователя."""
-    db_user = await session.get(User, user_id)
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пользователь для обновления не найден",
+    """Полностью обновляет данные пользователя.
+
+    Загруженное фото и его копии сбрасываются, если меняется photo_url;
+    условие проверяет сам UPDATE по прежнему значению строки. Файлы
+    фото, на которое больше никто не ссылается, удаляются после
+    фиксации изменения.
+    """
+    values = user.model_dump()
+    values.update(user_search_keys(values))
+    photo_changed = User.photo_url.is_distinct_from(values["photo_url"])
+    values.update(
+        photo_hash=case((photo_changed, None), else_=User.photo_hash),
+        photo_variants=case(
+            (photo_changed, null()), else_=User.photo_variants
+        ),
+    )
+
+    async def update(session: AsyncSession) -> tuple[User, str | None]:
+        previous_hash = await session.scalar(
+            select(User.photo_hash).where(User.id == user_id)
         )
-    update_user_data = user.model_dump()
-    user.sqlmodel_update(update_user_data)
-    for key, value in update_user_data.items():
-        setattr(db_user, key, value)
-    session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
+        db_user = await update_user_row(session, user_id, values)
+        return db_user, previous_hash
+
+    db_user, previous_hash = await run_write_invalidating(
+        session, update, [user_key(user_id)]
+    )
+    if previous_hash != db_user.photo_hash:
+        await release_photo(session, previous_hash)
     return db_user
 
 
@@ -117,27 +527,20 @@ async def partial_update_user(
     session: SessionDep,
 ) -> User:
     """Частично обновляет данные пользователя."""
-    db_user = await session.get(User, user_id)
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пользователь для обновления не найден",
-        )
     update_data = user.model_dump(exclude_unset=True)
-    if "email" in update_data:
-        existing = await session.execute(
-            select(User).where(User.email == update_data["email"])
+    update_data.update(user_search_keys(update_data))
+
+    async def update(session: AsyncSession) -> User:
+        return await update_user_row(
+            session,
+            user_id,
+            update_data,
+            detail="Email уже используется другим пользователем",
         )
-        if existing.scalars().first():
-            raise HTTPException(
-                status_code=400,
-                detail="Email уже используется другим пользователем",
-            )
-    db_user.sqlmodel_update(update_data)
-    session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
-    return db_user
+
+    return await run_write_invalidating(
+        session, update, [user_key(user_id)]
+    )
 
 
 @user_router.delete(
@@ -147,13 +550,30 @@ async def partial_update_user(
     status_code=status.HTTP_204_NO_CONTENT,
 )
 async def delete_user(user_id: int, session: SessionDep):
-    """Удаляет пользователя."""
-    db_user = await session.get(User, user_id)
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Пользователь для удаления не был найден",
-        )
-    await session.delete(db_user)
-    await session.commit()
+    """Удаляет пользователя одним DELETE.
+
+    Посты пользователя удаляет сама БД (ON DELETE CASCADE), не загружая
+    их в память. Файлы фото, на которое больше никто не ссылается,
+    удаляются после фиксации.
+    """
+
+    async def remove(session: AsyncSession) -> str | None:
+        deleted = (
+            await session.execute(
+                delete(User)
+                .where(User.id == user_id)
+                .returning(User.id, User.photo_hash)
+            )
+        ).first()
+        if deleted is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь для удаления не был найден",
+            )
+        return deleted.photo_hash
+
+    photo_hash = await run_write_invalidating(
+        session, remove, [user_key(user_id)], cascade=True
+    )
+    await release_photo(session, photo_hash)
     return {"ok": True}
@@ -0,0 +1,52 @@
+"""Модуль для ETag и условных GET-запросов (If-None-Match)."""
+
+import hashlib
+from typing import Any, Iterable, Sequence
+
+from fastapi import Response, status
+
+ETAG_HEADER = "ETag"
+
+
+def entity_etag(
+    entity_id: int, version: int, fields: Sequence[str] | None = None
+) -> str:
+    """ETag одной записи по её id и версии строки.
+
+    У ответа с частью полей (fields=) свой ETag.
+    """
+    if fields is None:
+        return f'"{entity_id}-{version}"'
+    return f'"{entity_id}-{version}-{"+".join(fields)}"'
+
+
+def collection_etag(
+    params: Iterable[Any], versions: Iterable[tuple[int, int]]
+) -> str:
+    """ETag страницы списка по параметрам запроса и версиям её строк.
+
+    Меняется при изменении, добавлении или удалении любой строки
+    страницы; тело ответа для этого строить не нужно.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(tuple(params)).encode())
+    for entity_id, version in versions:
+        digest.update(b"%d:%d;" % (entity_id, version))
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Совпадает ли ETag с заголовком If-None-Match (слабое сравнение)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    """Ответ 304 без тела с заголовками, которые были бы у ответа 200."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,96 @@
+"""Модуль для потоковой выгрузки таблиц в NDJSON и CSV."""
+
+import csv
+import io
+import json
+from enum import Enum
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+
+
+class ExportFormat(str, Enum):
+    """Формат выгрузки."""
+
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+}
+
+
+def _ndjson_chunk(columns: list[str], rows) -> bytes:
+    # Те же параметры, что у JSONResponse, чтобы строки выгрузки
+    # совпадали с ответами API.
+    return "".join(
+        json.dumps(
+            dict(zip(columns, row)),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return value
+
+
+def _csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_rows(
+    session_maker: async_sessionmaker[AsyncSession],
+    query: Select,
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    """Отдаёт строки запроса частями через серверный курсор.
+
+    В памяти одновременно находится не больше EXPORT_BATCH_SIZE строк.
+    Вся выгрузка читается в одной транзакции, то есть из одного снимка
+    БД.
+    """
+    columns = list(query.selected_columns.keys())
+    if export_format is ExportFormat.csv:
+        yield _csv_chunk([columns])
+    async with session_maker() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            if export_format is ExportFormat.csv:
+                yield _csv_chunk(rows)
+            else:
+                yield _ndjson_chunk(columns, rows)
+
+
+def export_response(
+    session_maker: async_sessionmaker[AsyncSession],
+    query: Select,
+    export_format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """Потоковый ответ с выгрузкой запроса в выбранном формате."""
+    return StreamingResponse(
+        stream_rows(session_maker, query, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{filename}.{export_format.value}"'
+            )
+        },
+    )
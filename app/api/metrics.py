@@ -0,0 +1,59 @@
+"""Модуль для middleware, измеряющего время HTTP-запросов."""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import http_request_duration, http_requests_in_flight
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_label(scope: Scope) -> str:
+    """Шаблон пути маршрута, а не сам путь: число меток ограничено.
+
+    Запросы к смонтированным приложениям (статике) получают путь
+    монтирования, запросы без маршрута — общую метку.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return scope.get("root_path") or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI-middleware с метриками времени и числа HTTP-запросов.
+
+    Написано на чистом ASGI, без BaseHTTPMiddleware, чтобы не добавлять
+    задачу и очередь на каждый запрос и не буферизовать потоковые ответы.
+    Время считается до отправки последней части тела ответа.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status_code = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = str(message["status"])
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                method,
+                route_label(scope),
+                status_code,
+            )
+            http_requests_in_flight.dec(method)
@@ -0,0 +1,61 @@
+"""Модуль для курсорной (keyset) пагинации списков."""
+
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import RowCount, UserPostCount
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def encode_cursor(**keys: int) -> str:
+    """Кодирует ключи последней записи страницы в непрозрачный курсор."""
+    raw = json.dumps(keys, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *names: str) -> dict[str, int]:
+    """Декодирует курсор и возвращает значения ожидаемых ключей."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        keys = json.loads(raw)
+        values = {name: keys[name] for name in names}
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        values = None
+    if not values or not all(type(v) is int for v in values.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации",
+        )
+    return values
+
+
+def check_pagination_mode(offset: int, cursor: str | None) -> None:
+    """Запрещает одновременное использование offset и cursor."""
+    if cursor is not None and offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Параметры offset и cursor нельзя использовать вместе",
+        )
+
+
+async def total_count(session: AsyncSession, name: str) -> int:
+    """Число строк таблицы из счётчика, без COUNT(*)."""
+    count = await session.scalar(
+        select(RowCount.count).where(RowCount.name == name)
+    )
+    return count or 0
+
+
+async def user_post_count(session: AsyncSession, user_id: int) -> int:
+    """Число постов пользователя из счётчика, без COUNT(*)."""
+    count = await session.scalar(
+        select(UserPostCount.count).where(UserPostCount.user_id == user_id)
+    )
+    return count or 0
@@ -0,0 +1,92 @@
+"""Модуль для middleware с учётом SQL-запросов каждого HTTP-запроса.
+
+Число и время SQL-запросов возвращаются в заголовке Server-Timing.
+У каждого маршрута есть бюджет числа запросов: в строгом режиме
+(QUERY_BUDGET_STRICT, включается в тестах) превышение бюджета — ошибка
+запроса, так тесты ловят появившиеся N+1 запросы.
+"""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.metrics import route_label
+from app.core.config import settings
+from app.db.profiling import QueryStats, query_stats
+
+SERVER_TIMING_HEADER = b"server-timing"
+
+# Бюджеты маршрутов, которым хватает меньше QUERY_BUDGET_DEFAULT.
+# Изменениям оставлен запрос на запись сброса кеша для других воркеров
+# (ENTITY_CACHE_SHARED), изменениям пользователя — ещё чтение прежнего
+# фото и проверка, что оно больше не нужно.
+STATEMENT_BUDGETS: dict[tuple[str, str], int] = {
+    ("GET", "/users/"): 3,
+    ("GET", "/users/search/"): 1,
+    ("GET", "/users/{user_id}/"): 1,
+    ("GET", "/users/{user_id}/posts/"): 3,
+    ("PUT", "/users/{user_id}/"): 4,
+    ("PATCH", "/users/{user_id}/"): 2,
+    ("DELETE", "/users/{user_id}/"): 3,
+    ("GET", "/posts/"): 2,
+    ("GET", "/posts/search/"): 1,
+    ("GET", "/posts/{post_id}/"): 1,
+    ("PUT", "/posts/{post_id}/"): 2,
+    ("PATCH", "/posts/{post_id}/"): 2,
+    ("DELETE", "/posts/{post_id}/"): 2,
+}
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Запрос выполнил больше SQL-запросов, чем разрешено маршруту."""
+
+
+def statement_budget(method: str, route: str) -> int:
+    return STATEMENT_BUDGETS.get(
+        (method, route), settings.QUERY_BUDGET_DEFAULT
+    )
+
+
+def server_timing(stats: QueryStats) -> bytes:
+    """Значение Server-Timing: время SQL в мс и число запросов."""
+    return (
+        f'db;dur={stats.duration * 1000:.3f};desc="SQL: {stats.statements}"'
+    ).encode()
+
+
+class QueryProfilingMiddleware:
+    """ASGI-middleware, считающее SQL-запросы каждого HTTP-запроса.
+
+    Server-Timing отправляется с заголовками ответа, поэтому запросы
+    потоковой выгрузки после начала ответа в него не попадают.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = query_stats.set(stats)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (SERVER_TIMING_HEADER, server_timing(stats)),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.reset(token)
+        if settings.QUERY_BUDGET_STRICT:
+            method = scope["method"]
+            route = route_label(scope)
+            budget = statement_budget(method, route)
+            if stats.statements > budget:
+                raise QueryBudgetExceeded(
+                    f"{method} {route}: {stats.statements} SQL-запросов "
+                    f"при бюджете {budget}"
+                )
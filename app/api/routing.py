@@ -2,6 +2,8 @@
 
 from fastapi import APIRouter
 
+from app.api.endpoints.cache import cache_router
+from app.api.endpoints.metrics import metrics_router
 from app.api.endpoints.post import post_router
 from app.api.endpoints.user import user_router
 from app.api.endpoints.upload_photo import user_photo_router
@@ -24,3 +26,13 @@ main_router.include_router(
     prefix="/users_photo",
     tags=["Фото пользователей"],
 )
+main_router.include_router(
+    cache_router,
+    prefix="/cache",
+    tags=["Кеш"],
+)
+main_router.include_router(
+    metrics_router,
+    prefix="/metrics",
+    tags=["Метрики"],
+)
@@ -0,0 +1,118 @@
+"""Модуль для быстрой сериализации ответов с выбранными полями в JSON.
+
+Строки выбираются из БД кортежами нужных колонок и кодируются в JSON
+напрямую, без построения ORM-объектов и без повторной проверки каждой
+строки схемой ответа. Данные в БД уже проверены схемами при записи.
+Параметр fields= ограничивает и SELECT, и тело ответа.
+"""
+
+import json
+from typing import Annotated, Any, Iterable, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel, select
+
+from app.api.etag import ETAG_HEADER, entity_etag, etag_matches, not_modified
+
+FieldsQuery = Annotated[
+    str | None,
+    Query(
+        description=(
+            "Поля ответа через запятую, например id,first_name; "
+            "по умолчанию все"
+        )
+    ),
+]
+
+
+def render_json(content: Any) -> bytes:
+    """Кодирует JSON с теми же параметрами, что и JSONResponse."""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def response_fields(
+    schema: type[BaseModel], fields: str | None = None
+) -> list[str]:
+    """Поля ответа из параметра fields= в порядке полей схемы."""
+    if fields is None:
+        return list(schema.model_fields)
+    requested = {name.strip() for name in fields.split(",")} - {""}
+    unknown = requested - schema.model_fields.keys()
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Неизвестные поля: {', '.join(sorted(unknown))}"
+                if unknown
+                else "Не указано ни одного поля"
+            ),
+        )
+    return [name for name in schema.model_fields if name in requested]
+
+
+def projection(model: type[SQLModel], fields: Sequence[str]) -> list[Any]:
+    """Колонки полей ответа и служебные row_id и row_version в конце.
+
+    По row_id строится курсор, по row_version — ETag, даже если сами
+    id и версия в ответ не входят.
+    """
+    return [
+        *(getattr(model, name) for name in fields),
+        model.id.label("row_id"),
+        model.version.label("row_version"),
+    ]
+
+
+def row_dicts(
+    fields: Sequence[str], rows: Iterable[Sequence[Any]]
+) -> list[dict[str, Any]]:
+    """Словари полей ответа из кортежей строк.
+
+    Служебные колонки в конце строки (см. projection) отбрасываются.
+    """
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def json_list_response(
+    content: list[dict[str, Any]], headers: dict[str, str]
+) -> Response:
+    """Ответ со списком, побайтно совпадающий с ответом по response_model."""
+    return Response(
+        render_json(content), media_type="application/json", headers=headers
+    )
+
+
+async def entity_fields_response(
+    session: AsyncSession,
+    model: type[SQLModel],
+    entity_id: int,
+    fields: Sequence[str],
+    not_found_detail: str,
+    if_none_match: str | None = None,
+) -> Response:
+    """Отдаёт выбранные поля одной записи, читая из БД только их."""
+    row = (
+        await session.execute(
+            select(*projection(model, fields)).where(model.id == entity_id)
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail
+        )
+    headers = {ETAG_HEADER: entity_etag(row.row_id, row.row_version, fields)}
+    if etag_matches(if_none_match, headers[ETAG_HEADER]):
+        return not_modified(headers)
+    return Response(
+        render_json(dict(zip(fields, row))),
+        media_type="application/json",
+        headers=headers,
+    )
@@ -0,0 +1,135 @@
+"""Модуль для кеша сериализованных ответов с пользователями и постами."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+
+from app.core.config import settings
+
+CacheKey = tuple[str, int]
+
+
+def user_key(user_id: int) -> CacheKey:
+    return ("user", user_id)
+
+
+def post_key(post_id: int) -> CacheKey:
+    return ("post", post_id)
+
+
+class EntityCache:
+    """LRU-кеш с TTL для готовых ответов, ключ — сущность и её id.
+
+    Запись может иметь родителя (пост — автора), чтобы удаление родителя
+    с каскадом в БД сбрасывало и записи потомков.
+
+    Чтение из БД и сохранение результата в кеш не атомарны: между ними
+    запись может изменить сущность и сбросить кеш. Поэтому put принимает
+    поколение кеша, взятое до чтения из БД, и ничего не сохраняет, если
+    с тех пор был хоть один сброс.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[
+            CacheKey, tuple[Any, float, CacheKey | None]
+        ] = OrderedDict()
+        self._children: dict[CacheKey, set[CacheKey]] = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Any | None:
+        """Возвращает сохранённый ответ или None при промахе."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, expires_at, _ = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(
+        self,
+        key: CacheKey,
+        payload: Any,
+        generation: int,
+        parent: CacheKey | None = None,
+    ) -> bool:
+        """Сохраняет ответ, если с чтения из БД не было сбросов кеша."""
+        if not self.enabled or generation != self.generation:
+            return False
+        self._remove(key)
+        self._entries[key] = (payload, self._clock() + self.ttl, parent)
+        if parent is not None:
+            self._children.setdefault(parent, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return True
+
+    def invalidate(
+        self, keys: Iterable[CacheKey], cascade: bool = False
+    ) -> None:
+        """Сбрасывает записи, с cascade — и записи их потомков."""
+        self.generation += 1
+        for key in keys:
+            self.invalidations += 1
+            self._remove(key)
+            if cascade:
+                for child in self._children.pop(key, ()):
+                    self._remove(child)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._children.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[2] is None:
+            return
+        siblings = self._children.get(entry[2])
+        if siblings is not None:
+            siblings.discard(key)
+            if not siblings:
+                del self._children[entry[2]]
+
+
+entity_cache = EntityCache(
+    max_size=settings.ENTITY_CACHE_MAX_SIZE, ttl=settings.ENTITY_CACHE_TTL
+)
@@ -1,5 +1,7 @@
 """Модуль для основных настроек веб-приложения."""
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -12,6 +14,36 @@ class Settings(BaseSettings):
     )
     DATABASE_URL: str = "sqlite+aiosqlite:///test_moscow_metro.db"
     TEST_DATABASE_URL: str = "sqlite+aiosqlite:///:memory:"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_TIMEOUT: int = 30
+    SQLITE_JOURNAL_MODE: Literal["WAL", "DELETE", "TRUNCATE", "MEMORY"] = "WAL"
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    SQLITE_CACHE_SIZE: int = -64000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    MIGRATION_LOCK_TIMEOUT: float = 600.0
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_WINDOW_MS: float = 2.0
+    GROUP_COMMIT_MAX_BATCH: int = 64
+    BULK_MAX_ITEMS: int = 10_000
+    BULK_BATCH_SIZE: int = 1_000
+    EXPORT_BATCH_SIZE: int = 1_000
+    ENTITY_CACHE_MAX_SIZE: int = 10_000
+    ENTITY_CACHE_TTL: float = 60.0
+    ENTITY_CACHE_SHARED: bool = False
+    ENTITY_CACHE_SYNC_INTERVAL_MS: float = 100.0
+    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 256 * 1024
+    PHOTO_VARIANT_FORMAT: Literal["WEBP", "JPEG"] = "WEBP"
+    PHOTO_VARIANT_QUALITY: int = 80
+    IMAGE_WORKERS: int | None = None
+    METRICS_ENABLED: bool = True
+    QUERY_PROFILING_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 100.0
+    QUERY_BUDGET_STRICT: bool = False
+    QUERY_BUDGET_DEFAULT: int = 10
 
 
 settings = Settings()
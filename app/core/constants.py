@@ -2,10 +2,16 @@
 
 from pathlib import Path
 
-ALLOWED_IMAGE_TYPES = [
-    "image/jpeg",
-    "image/png",
-    "image/gif",
-    "image/webp",
-]
+IMAGE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+IMAGE_SIGNATURE_SIZE = 12
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MULTIPART_OVERHEAD_SIZE = 64 * 1024
+PHOTO_VARIANT_SIZES = (64, 256, 1024)
+PHOTO_VARIANT_EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg"}
 UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
+VARIANTS_DIR = UPLOAD_DIR / "variants"
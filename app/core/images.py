@@ -0,0 +1,132 @@
+"""Модуль для работы с изображениями пользователей."""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+from app.core.constants import (
+    PHOTO_VARIANT_EXTENSIONS,
+    PHOTO_VARIANT_SIZES,
+    UPLOAD_DIR,
+    VARIANTS_DIR,
+)
+
+_executor: ProcessPoolExecutor | None = None
+
+
+class ImageProcessingError(Exception):
+    """Изображение не удалось декодировать."""
+
+
+def detect_image_type(head: bytes) -> str | None:
+    """Определяет MIME-тип изображения по сигнатуре первых байт файла."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def variant_filename(stem: str, size: int, image_format: str) -> str:
+    """Имя файла уменьшенной копии изображения."""
+    return f"{stem}_{size}{PHOTO_VARIANT_EXTENSIONS[image_format]}"
+
+
+def variant_static_paths(variants: dict[int, str]) -> dict[str, str]:
+    """Пути уменьшенных копий относительно точки монтирования /static."""
+    prefix = VARIANTS_DIR.relative_to(UPLOAD_DIR).as_posix()
+    return {str(size): f"{prefix}/{name}" for size, name in variants.items()}
+
+
+def render_variants(
+    source: Path,
+    target_dir: Path,
+    stem: str,
+    sizes: tuple[int, ...],
+    image_format: str,
+    quality: int,
+) -> dict[int, str]:
+    """Создаёт уменьшенные копии изображения без метаданных.
+
+    Выполняется в дочернем процессе. Копии не увеличиваются сверх размера
+    оригинала и пишутся во временную папку фото target_dir, откуда их
+    публикует app.core.storage.publish_photo.
+    """
+    try:
+        with Image.open(source) as original:
+            original.draft("RGB", (max(sizes), max(sizes)))
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ImageProcessingError(source.name)
+    has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+    if image_format == "WEBP" and has_alpha:
+        image = image.convert("RGBA")
+    else:
+        image = image.convert("RGB")
+    variants = {}
+    for size in sizes:
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+        filename = variant_filename(stem, size, image_format)
+        variant.save(
+            target_dir / filename,
+            format=image_format,
+            quality=quality,
+            optimize=True,
+        )
+        variants[size] = filename
+    return variants
+
+
+def get_image_executor() -> ProcessPoolExecutor:
+    """Пул процессов для обработки изображений, создаётся один раз."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_image_executor() -> None:
+    """Останавливает пул процессов обработки изображений."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def create_photo_variants(
+    source: Path, stem: str, target_dir: Path
+) -> dict[int, str]:
+    """Создаёт уменьшенные копии фото в пуле процессов.
+
+    Копии создаются заново, даже если такие уже опубликованы: их могут
+    удалить до публикации этого фото, поэтому фото публикуется только
+    со своими файлами. Возвращает имена файлов копий по размерам.
+    """
+    image_format = settings.PHOTO_VARIANT_FORMAT
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_image_executor(),
+        partial(
+            render_variants,
+            source,
+            target_dir,
+            stem,
+            PHOTO_VARIANT_SIZES,
+            image_format,
+            settings.PHOTO_VARIANT_QUALITY,
+        ),
+    )
@@ -0,0 +1,220 @@
+"""Модуль для метрик приложения в текстовом формате Prometheus.
+
+Метрики собираются в памяти процесса, без внешнего агента и
+зависимостей. Обновляются они из цикла событий (middleware, события
+движка SQLAlchemy, которые выполняются в его потоке), поэтому
+блокировки не нужны. У каждого воркера uvicorn свои значения, как и у
+клиента Prometheus без multiprocess-режима.
+"""
+
+from bisect import bisect_left
+from typing import Iterator, Sequence
+
+LabelValues = tuple[str, ...]
+
+# Границы по умолчанию клиента Prometheus, для времени HTTP-запросов.
+REQUEST_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Запросы к SQLite и ожидание соединения обычно короче миллисекунды.
+DB_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 1.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+class Metric:
+    """Метрика с набором меток; значения хранятся по кортежу меток."""
+
+    type = ""
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: dict[LabelValues, object] = {}
+        self.clear()
+
+    def clear(self) -> None:
+        """Сбрасывает значения; метрика без меток выводится с нулём."""
+        self._values.clear()
+        if not self.label_names:
+            self._values[()] = self._empty()
+
+    def _empty(self) -> object:
+        return 0
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        for label_values, value in self._values.items():
+            labels = _labels(self.label_names, label_values)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    type = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = (
+            self._values.get(label_values, 0) + amount
+        )
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и убывать."""
+
+    type = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами корзин.
+
+    Хранит некумулятивные счётчики корзин, накопленные суммы считаются
+    только при выводе.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = REQUEST_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labels)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        state = self._values.get(label_values)
+        if state is None:
+            state = self._values[label_values] = self._empty()
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def _empty(self) -> list:
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def count(self, *label_values: str) -> int:
+        state = self._values.get(label_values)
+        return state[2] if state else 0
+
+    def _samples(self) -> Iterator[str]:
+        bounds = (*self.buckets, float("inf"))
+        names = (*self.label_names, "le")
+        for label_values, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _labels(
+                    names, (*label_values, _format_value(bound))
+                )
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.label_names, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    """Набор метрик, выводимых эндпоинтом /metrics."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже есть")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def __iter__(self) -> Iterator[Metric]:
+        return iter(self._metrics.values())
+
+    def render(self) -> str:
+        """Текст всех метрик в формате Prometheus 0.0.4."""
+        lines = [line for metric in self for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Время обработки HTTP-запроса",
+        ("method", "route", "status"),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge(
+        "http_requests_in_flight",
+        "Число обрабатываемых HTTP-запросов",
+        ("method",),
+    )
+)
+db_statement_duration = registry.register(
+    Histogram(
+        "db_statement_duration_seconds",
+        "Время выполнения SQL-запроса",
+        ("engine", "operation"),
+        buckets=DB_BUCKETS,
+    )
+)
+db_pool_checkout_wait = registry.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Ожидание соединения из пула",
+        ("engine",),
+        buckets=DB_BUCKETS,
+    )
+)
+upload_bytes = registry.register(
+    Counter(
+        "photo_upload_bytes_total",
+        "Байт в загруженных фото; rate() — байт в секунду",
+    )
+)
+upload_duration = registry.register(
+    Histogram(
+        "photo_upload_duration_seconds",
+        "Время сохранения и обработки загруженного фото",
+    )
+)
@@ -0,0 +1,297 @@
+"""Модуль для сохранения загруженных файлов в хранилище."""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.staticfiles import StaticFiles
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.core.constants import (
+    IMAGE_EXTENSIONS,
+    IMAGE_SIGNATURE_SIZE,
+    IMMUTABLE_CACHE_CONTROL,
+    MULTIPART_OVERHEAD_SIZE,
+    UPLOAD_DIR,
+    VARIANTS_DIR,
+)
+from app.core.images import detect_image_type
+
+CONTENT_ADDRESSED_NAME = re.compile(r"[0-9a-f]{64}(_\d+)?\.[a-z]+")
+
+
+class UnsupportedImageError(Exception):
+    """Содержимое файла не является поддерживаемым изображением."""
+
+
+class UploadTooLargeError(Exception):
+    """Размер файла превышает допустимый."""
+
+
+class MalformedUploadError(Exception):
+    """В теле запроса нет файла в форме multipart/form-data."""
+
+
+@dataclass
+class StagedPhoto:
+    """Файлы фото, подготовленные к публикации в хранилище.
+
+    Оригинал (filename) и уменьшенные копии (variants, имена по
+    размерам) лежат в отдельной временной папке directory рядом с
+    хранилищем и переносятся в UPLOAD_DIR и VARIANTS_DIR только в
+    publish_photo. Пока фото не опубликовано, удаление файлов того же
+    содержимого ему не мешает.
+    """
+
+    directory: Path
+    digest: str
+    filename: str | None = None
+    size: int = 0
+    variants: dict[int, str] = field(default_factory=dict)
+
+    @property
+    def original(self) -> Path:
+        return self.directory / self.filename
+
+
+def _make_staging_directory() -> Path:
+    """Создаёт временную папку в хранилище.
+
+    Папка на той же файловой системе, поэтому перенос файлов атомарен.
+    """
+    return Path(tempfile.mkdtemp(dir=UPLOAD_DIR, prefix=".upload-"))
+
+
+async def stage_photo(digest: str = "") -> StagedPhoto:
+    """Новое неопубликованное фото с пустой временной папкой."""
+    directory = await run_in_threadpool(_make_staging_directory)
+    return StagedPhoto(directory=directory, digest=digest)
+
+
+def _publish_photo(staged: StagedPhoto) -> None:
+    """Переносит файлы фото в хранилище с заменой существующих.
+
+    Файлы с тем же именем имеют то же содержимое, поэтому замена
+    безопасна для тех, кто их уже читает.
+    """
+    if staged.filename is not None:
+        os.replace(staged.original, UPLOAD_DIR / staged.filename)
+    if staged.variants:
+        VARIANTS_DIR.mkdir(parents=True, exist_ok=True)
+    for name in staged.variants.values():
+        os.replace(staged.directory / name, VARIANTS_DIR / name)
+
+
+async def publish_photo(staged: StagedPhoto) -> None:
+    """Публикует фото; вызывается в транзакции записи, см. app.db.photos."""
+    await run_in_threadpool(_publish_photo, staged)
+
+
+async def discard_photo(staged: StagedPhoto) -> None:
+    """Удаляет временную папку фото вместе с неопубликованными файлами."""
+    await run_in_threadpool(shutil.rmtree, staged.directory, True)
+
+
+def _write_chunks(buffer: BinaryIO, digest, chunks: list[bytes]) -> None:
+    for chunk in chunks:
+        digest.update(chunk)
+        buffer.write(chunk)
+
+
+def _close_temp(buffer: BinaryIO) -> None:
+    buffer.flush()
+    os.fsync(buffer.fileno())
+    buffer.close()
+
+
+class _ImagePart:
+    """Колбэки потокового парсера multipart для поля с изображением.
+
+    Данные поля накапливаются в pending и записываются в файл после
+    каждого фрагмента тела. Сигнатура проверяется по первым байтам
+    поля, размер — по мере чтения, поэтому неподходящий файл
+    отклоняется, не дочитывая запрос.
+    """
+
+    def __init__(self, field_name: str) -> None:
+        self.field_name = field_name.encode()
+        self.header_field = b""
+        self.header_value = b""
+        self.headers: dict[bytes, bytes] = {}
+        self.is_target = False
+        self.head = b""
+        self.content_type: str | None = None
+        self.size = 0
+        self.complete = False
+        self.pending: list[bytes] = []
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self.headers = {}
+        self.is_target = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self.header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field = self.header_value = b""
+
+    def on_headers_finished(self) -> None:
+        disposition, options = parse_options_header(
+            self.headers.get(b"content-disposition")
+        )
+        self.is_target = (
+            disposition == b"form-data"
+            and options.get(b"name") == self.field_name
+            and b"filename" in options
+            and not self.complete
+        )
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self.is_target:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > settings.MAX_UPLOAD_SIZE:
+            raise UploadTooLargeError
+        if self.content_type is None:
+            self.head += chunk[:IMAGE_SIGNATURE_SIZE - len(self.head)]
+            if len(self.head) == IMAGE_SIGNATURE_SIZE:
+                self.detect_type()
+        self.pending.append(chunk)
+
+    def on_part_end(self) -> None:
+        if self.is_target:
+            if self.content_type is None:
+                self.detect_type()
+            self.complete = True
+            self.is_target = False
+
+    def detect_type(self) -> None:
+        self.content_type = detect_image_type(self.head)
+        if self.content_type is None:
+            raise UnsupportedImageError
+
+
+async def receive_image_upload(
+    request: Request, field_name: str = "file"
+) -> StagedPhoto:
+    """Принимает изображение из тела multipart-запроса по мере чтения.
+
+    Тело не буферизуется целиком: запрос длиннее допустимого (по
+    Content-Length или по уже прочитанным байтам) и файл с сигнатурой
+    не изображения отклоняются сразу. Файл пишется во временный файл, не
+    блокируя цикл событий, и получает имя по SHA-256 содержимого;
+    одинаковые изображения хранятся в одном экземпляре. Возвращает
+    неопубликованное фото (см. StagedPhoto).
+    """
+    max_body_size = settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD_SIZE
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_body_size:
+        raise UploadTooLargeError
+    media_type, options = parse_options_header(
+        request.headers.get("content-type")
+    )
+    if media_type != b"multipart/form-data" or b"boundary" not in options:
+        raise MalformedUploadError
+    part = _ImagePart(field_name)
+    parser = MultipartParser(options[b"boundary"], part.callbacks())
+    staged = await stage_photo()
+    temp_path = staged.directory / "upload.part"
+    buffer = await run_in_threadpool(temp_path.open, "wb")
+    digest = hashlib.sha256()
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body_size:
+                raise UploadTooLargeError
+            parser.write(chunk)
+            if part.pending:
+                chunks, part.pending = part.pending, []
+                await run_in_threadpool(
+                    _write_chunks, buffer, digest, chunks
+                )
+        parser.finalize()
+        if not part.complete:
+            raise MalformedUploadError
+        await run_in_threadpool(_close_temp, buffer)
+        staged.digest = digest.hexdigest()
+        staged.filename = (
+            f"{staged.digest}{IMAGE_EXTENSIONS[part.content_type]}"
+        )
+        staged.size = part.size
+        await run_in_threadpool(temp_path.rename, staged.original)
+    except BaseException:
+        buffer.close()
+        await discard_photo(staged)
+        raise
+    return staged
+
+
+def _remove_photo_files(digest: str) -> None:
+    """Удаляет оригинал и уменьшенные копии изображения."""
+    originals = UPLOAD_DIR.glob(f"{digest}.*")
+    variants = VARIANTS_DIR.glob(f"{digest}_*")
+    for path in [*originals, *variants]:
+        path.unlink(missing_ok=True)
+
+
+async def remove_photo_files(digest: str) -> None:
+    """Удаляет файлы изображения; проверку ссылок см. в app.db.photos."""
+    await run_in_threadpool(_remove_photo_files, digest)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Раздача статики с долгим кэшированием контентно-адресуемых файлов.
+
+    Файл с именем-хешем никогда не меняется, поэтому отдаётся с
+    Cache-Control: immutable и сильным ETag, равным имени файла.
+    """
+
+    def file_response(
+        self,
+        full_path: os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        filename = os.path.basename(full_path)
+        if not CONTENT_ADDRESSED_NAME.fullmatch(filename):
+            return super().file_response(
+                full_path, stat_result, scope, status_code
+            )
+        response = FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result
+        )
+        response.headers["etag"] = f'"{filename}"'
+        response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
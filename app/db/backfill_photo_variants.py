@@ -0,0 +1,170 @@
+"""Модуль для создания уменьшенных копий уже загруженных фото.
+
+Пользователи без копий выбираются пачками через соединения только для
+чтения, копии создаются вне транзакций, а результат каждого
+пользователя записывается отдельной короткой транзакцией. Блокировка
+записи не удерживается, пока идёт обработка изображений, поэтому
+команду можно запускать при работающем приложении.
+
+Запуск из папки с проектом:
+    python -m app.db.backfill_photo_variants
+"""
+
+import asyncio
+import re
+from pathlib import Path
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from app.core.constants import IMAGE_EXTENSIONS, UPLOAD_DIR
+from app.core.images import (
+    ImageProcessingError,
+    create_photo_variants,
+    shutdown_image_executor,
+    variant_static_paths,
+)
+from app.core.storage import (
+    StagedPhoto,
+    discard_photo,
+    publish_photo,
+    stage_photo,
+)
+from app.db.models import User
+from app.db.session import async_read_session_maker, async_session_maker
+from app.db.writer import run_write
+
+STATIC_PREFIX = "/static/"
+UPLOADED_ORIGINAL_NAME = re.compile(
+    r"[0-9a-f]{64}(%s)"
+    % "|".join(re.escape(extension) for extension in IMAGE_EXTENSIONS.values())
+)
+
+
+def uploaded_original(photo_url: str) -> Path | None:
+    """Оригинал загруженного фото, на который указывает photo_url.
+
+    photo_url задаёт сам пользователь, поэтому принимаются только имена
+    загруженных оригиналов (хеш содержимого и расширение изображения)
+    прямо в UPLOAD_DIR: иначе команда читала бы любые файлы сервера и
+    публиковала копии под выбранным пользователем именем.
+    """
+    _, separator, static_path = photo_url.rpartition(STATIC_PREFIX)
+    if not separator or not UPLOADED_ORIGINAL_NAME.fullmatch(static_path):
+        return None
+    upload_dir = UPLOAD_DIR.resolve()
+    source = (upload_dir / static_path).resolve()
+    if not source.is_relative_to(upload_dir) or not source.is_file():
+        return None
+    return source
+
+
+async def render_user_variants(photo_url: str) -> StagedPhoto | None:
+    """Создаёт копии фото во временной папке, если оригинал лежит локально.
+
+    Копии называются по хешу содержимого оригинала. Выполняется вне
+    транзакций; опубликовать копии нужно в save_user_variants.
+    """
+    source = uploaded_original(photo_url)
+    if source is None:
+        return None
+    staged = await stage_photo(source.stem)
+    try:
+        staged.variants = await create_photo_variants(
+            source, staged.digest, staged.directory
+        )
+    except ImageProcessingError:
+        await discard_photo(staged)
+        return None
+    return staged
+
+
+async def save_user_variants(
+    session: AsyncSession,
+    user_id: int,
+    photo_url: str,
+    staged: StagedPhoto,
+) -> bool:
+    """Публикует копии и записывает их пользователю одной транзакцией.
+
+    Если за время обработки фото пользователя сменилось или копии уже
+    появились, ничего не меняется.
+    """
+    base_url = photo_url.rpartition(STATIC_PREFIX)[0]
+    photo_variants = {
+        size: f"{base_url}{STATIC_PREFIX}{path}"
+        for size, path in variant_static_paths(staged.variants).items()
+    }
+
+    async def save(session: AsyncSession) -> bool:
+        updated_id = await session.scalar(
+            update(User)
+            .where(
+                User.id == user_id,
+                User.photo_url == photo_url,
+                User.photo_variants.is_(None),
+            )
+            .values(photo_variants=photo_variants)
+            .returning(User.id)
+        )
+        if updated_id is None:
+            return False
+        await publish_photo(staged)
+        return True
+
+    return await run_write(session, save)
+
+
+async def backfill_photo_variants(
+    batch_size: int = 100,
+    session_maker: async_sessionmaker[AsyncSession] = async_session_maker,
+    read_session_maker: async_sessionmaker[AsyncSession] = (
+        async_read_session_maker
+    ),
+) -> int:
+    """Заполняет photo_variants у пользователей с фото без копий."""
+    filled = 0
+    last_id = 0
+    while True:
+        async with read_session_maker() as read_session:
+            users = (
+                await read_session.execute(
+                    select(User.id, User.photo_url)
+                    .where(
+                        User.id > last_id,
+                        User.photo_url.is_not(None),
+                        User.photo_variants.is_(None),
+                    )
+                    .order_by(User.id)
+                    .limit(batch_size)
+                )
+            ).all()
+        if not users:
+            return filled
+        rendered = await asyncio.gather(
+            *(render_user_variants(user.photo_url) for user in users)
+        )
+        async with session_maker() as session:
+            for user, staged in zip(users, rendered):
+                if staged is None:
+                    continue
+                try:
+                    filled += await save_user_variants(
+                        session, user.id, user.photo_url, staged
+                    )
+                finally:
+                    await discard_photo(staged)
+        last_id = users[-1].id
+
+
+def main() -> None:
+    try:
+        filled = asyncio.run(backfill_photo_variants())
+    finally:
+        shutdown_image_executor()
+    print(f"Созданы копии фото для пользователей: {filled}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Модуль для сброса кеша сущностей после записи, в том числе в воркерах.
+
+Каждый воркер uvicorn держит свой кеш. При ENTITY_CACHE_SHARED сбросы
+записываются в таблицу cache_invalidation в той же транзакции, что и
+изменение, а фоновая задача каждого воркера читает новые строки и
+сбрасывает у себя те же записи. Так ответ другого воркера устаревает
+не дольше чем на ENTITY_CACHE_SYNC_INTERVAL_MS.
+"""
+
+import asyncio
+import time
+from typing import Iterable, TypeVar
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import CacheKey, EntityCache, entity_cache
+from app.core.config import settings
+from app.db.models import CacheInvalidation
+from app.db.session import async_read_session_maker, async_session_maker
+from app.db.writer import WriteOperation, run_write
+
+T = TypeVar("T")
+
+
+async def record_invalidation(
+    session: AsyncSession, keys: Iterable[CacheKey], cascade: bool = False
+) -> None:
+    """Записывает сбросы для других воркеров в текущую транзакцию."""
+    if not settings.ENTITY_CACHE_SHARED or not entity_cache.enabled:
+        return
+    created_at = time.time()
+    rows = [
+        {
+            "entity": entity,
+            "entity_id": entity_id,
+            "cascade": cascade,
+            "created_at": created_at,
+        }
+        for entity, entity_id in keys
+    ]
+    if rows:
+        await session.execute(insert(CacheInvalidation), rows)
+
+
+async def run_write_invalidating(
+    session: AsyncSession,
+    operation: WriteOperation[T],
+    keys: Iterable[CacheKey],
+    cascade: bool = False,
+) -> T:
+    """Выполняет запись через run_write и сбрасывает записи кеша.
+
+    Локальный кеш сбрасывается после commit и при ошибке тоже: лишний
+    сброс безопасен, а исход неудачного commit неизвестен.
+    """
+    keys = list(keys)
+
+    async def write(session: AsyncSession) -> T:
+        result = await operation(session)
+        await record_invalidation(session, keys, cascade)
+        return result
+
+    try:
+        return await run_write(session, write)
+    finally:
+        entity_cache.invalidate(keys, cascade)
+
+
+class CacheInvalidationSync:
+    """Фоновая задача, применяющая сбросы кеша, записанные другими воркерами.
+
+    Строки журнала старше TTL кеша удаляются: записи, сохранённые до
+    такого сброса, к этому времени уже истекли. Если опрос не удался или
+    задержался дольше TTL, кеш воркера очищается целиком.
+    """
+
+    def __init__(
+        self,
+        cache: EntityCache,
+        read_session_maker: async_sessionmaker[AsyncSession],
+        write_session_maker: async_sessionmaker[AsyncSession],
+        interval: float,
+    ) -> None:
+        self._cache = cache
+        self._read_session_maker = read_session_maker
+        self._write_session_maker = write_session_maker
+        self._interval = interval
+        self._last_id = 0
+        self._last_poll = 0.0
+        self._last_prune = 0.0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Запоминает конец журнала и запускает опрос.
+
+        Кеш воркера при старте пуст, поэтому более ранние сбросы ему не
+        нужны; конец журнала читается до приёма запросов.
+        """
+        async with self._read_session_maker() as session:
+            self._last_id = await session.scalar(
+                select(func.max(CacheInvalidation.id))
+            ) or 0
+        self._last_poll = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def poll(self) -> int:
+        """Применяет новые сбросы из журнала и возвращает их число."""
+        if time.monotonic() - self._last_poll > self._cache.ttl:
+            # Нужные строки журнала могли быть уже удалены.
+            self._cache.clear()
+        async with self._read_session_maker() as session:
+            rows = (
+                await session.execute(
+                    select(
+                        CacheInvalidation.id,
+                        CacheInvalidation.entity,
+                        CacheInvalidation.entity_id,
+                        CacheInvalidation.cascade,
+                    )
+                    .where(CacheInvalidation.id > self._last_id)
+                    .order_by(CacheInvalidation.id)
+                )
+            ).all()
+        self._last_poll = time.monotonic()
+        for row_id, entity, entity_id, cascade in rows:
+            self._cache.invalidate([(entity, entity_id)], cascade)
+            self._last_id = row_id
+        return len(rows)
+
+    async def prune(self) -> None:
+        """Удаляет строки журнала, которые уже не могут понадобиться."""
+        async with self._write_session_maker() as session:
+            await session.execute(
+                delete(CacheInvalidation).where(
+                    CacheInvalidation.created_at
+                    < time.time() - self._cache.ttl - self._interval
+                )
+            )
+            await session.commit()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.poll()
+                if time.monotonic() - self._last_prune > self._cache.ttl:
+                    self._last_prune = time.monotonic()
+                    await self.prune()
+            except Exception:
+                # Без журнала нельзя знать, что изменилось в других
+                # воркерах: безопаснее начать с пустого кеша.
+                self._cache.clear()
+
+
+cache_invalidation_sync = CacheInvalidationSync(
+    entity_cache,
+    async_read_session_maker,
+    async_session_maker,
+    interval=settings.ENTITY_CACHE_SYNC_INTERVAL_MS / 1000,
+)
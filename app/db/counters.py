@@ -0,0 +1,179 @@
+"""Модуль для счётчиков строк пользователей и постов.
+
+Общее число пользователей и постов хранится в таблице row_count, число
+постов каждого пользователя — в user_post_count. Счётчики меняют
+триггеры на INSERT, DELETE и смену автора поста, поэтому они
+обновляются в той же транзакции, что и сами строки, при любой записи:
+из эндпоинтов, массовых операций, каскадного удаления и импорта.
+Чтение счётчика — один поиск по первичному ключу вместо COUNT(*).
+
+Сверка счётчиков с таблицами (из папки с проектом):
+    python -m app.db.counters reconcile
+"""
+
+import argparse
+
+from sqlalchemy import Connection, create_engine
+
+USER_COUNT = "user"
+POST_COUNT = "post"
+COUNTER_TABLES = frozenset({"row_count", "user_post_count"})
+
+CREATE_COUNTER_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS user_count_insert AFTER INSERT ON user
+    BEGIN
+        INSERT INTO row_count (name, count) VALUES ('{USER_COUNT}', 1)
+        ON CONFLICT (name) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS user_count_delete AFTER DELETE ON user
+    BEGIN
+        UPDATE row_count SET count = count - 1 WHERE name = '{USER_COUNT}';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS post_count_insert AFTER INSERT ON post
+    BEGIN
+        INSERT INTO row_count (name, count) VALUES ('{POST_COUNT}', 1)
+        ON CONFLICT (name) DO UPDATE SET count = count + 1;
+        INSERT INTO user_post_count (user_id, count)
+        SELECT new.user_id, 1 WHERE new.user_id IS NOT NULL
+        ON CONFLICT (user_id) DO UPDATE SET count = count + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS post_count_delete AFTER DELETE ON post
+    BEGIN
+        UPDATE row_count SET count = count - 1 WHERE name = '{POST_COUNT}';
+        UPDATE user_post_count SET count = count - 1
+        WHERE user_id = old.user_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS post_count_update
+    AFTER UPDATE OF user_id ON post
+    WHEN old.user_id IS NOT new.user_id
+    BEGIN
+        UPDATE user_post_count SET count = count - 1
+        WHERE user_id = old.user_id;
+        INSERT INTO user_post_count (user_id, count)
+        SELECT new.user_id, 1 WHERE new.user_id IS NOT NULL
+        ON CONFLICT (user_id) DO UPDATE SET count = count + 1;
+    END
+    """,
+)
+
+DROP_COUNTER_TRIGGERS = (
+    "DROP TRIGGER IF EXISTS post_count_update",
+    "DROP TRIGGER IF EXISTS post_count_delete",
+    "DROP TRIGGER IF EXISTS post_count_insert",
+    "DROP TRIGGER IF EXISTS user_count_delete",
+    "DROP TRIGGER IF EXISTS user_count_insert",
+)
+
+# Точные значения счётчиков, посчитанные по самим таблицам.
+ACTUAL_COUNTS = f"""
+    SELECT '{USER_COUNT}' AS name, NULL AS user_id, COUNT(*) AS count
+    FROM user
+    UNION ALL
+    SELECT '{POST_COUNT}', NULL, COUNT(*) FROM post
+    UNION ALL
+    SELECT NULL, user_id, COUNT(*) FROM post
+    WHERE user_id IS NOT NULL GROUP BY user_id
+"""
+STORED_COUNTS = """
+    SELECT name, NULL AS user_id, count FROM row_count
+    UNION ALL
+    SELECT NULL, user_id, count FROM user_post_count WHERE count != 0
+"""
+
+
+def _counter_tables_in(kw: dict) -> bool:
+    return any(
+        table.name in COUNTER_TABLES for table in kw.get("tables", ())
+    )
+
+
+def create_counter_triggers(target, connection: Connection, **kw) -> None:
+    """Создаёт триггеры и сверяет счётчики с уже имеющимися строками.
+
+    Вызывается после create_all схемы, но срабатывает, только если
+    таблицы счётчиков были созданы этим вызовом.
+    """
+    if not _counter_tables_in(kw):
+        return
+    for statement in CREATE_COUNTER_TRIGGERS:
+        connection.exec_driver_sql(statement)
+    reconcile_counts(connection)
+
+
+def drop_counter_triggers(target, connection: Connection, **kw) -> None:
+    if not _counter_tables_in(kw):
+        return
+    for statement in DROP_COUNTER_TRIGGERS:
+        connection.exec_driver_sql(statement)
+
+
+def reconcile_counts(connection: Connection) -> int:
+    """Пересчитывает счётчики по таблицам, возвращает число исправленных.
+
+    Таблицы читаются целиком, поэтому сверка нужна только после записи
+    в обход триггеров (например, восстановления из дампа).
+    """
+    actual = {
+        (name, user_id): count
+        for name, user_id, count in connection.exec_driver_sql(ACTUAL_COUNTS)
+    }
+    stored = {
+        (name, user_id): count
+        for name, user_id, count in connection.exec_driver_sql(STORED_COUNTS)
+    }
+    drift = {
+        key: actual.get(key, 0)
+        for key in actual.keys() | stored.keys()
+        if actual.get(key, 0) != stored.get(key, 0)
+    }
+    connection.exec_driver_sql("DELETE FROM user_post_count")
+    connection.exec_driver_sql(
+        "INSERT INTO user_post_count (user_id, count) "
+        "SELECT user_id, COUNT(*) FROM post "
+        "WHERE user_id IS NOT NULL GROUP BY user_id"
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO row_count (name, count) VALUES (?, ?), (?, ?) "
+        "ON CONFLICT (name) DO UPDATE SET count = excluded.count",
+        (
+            USER_COUNT,
+            actual[(USER_COUNT, None)],
+            POST_COUNT,
+            actual[(POST_COUNT, None)],
+        ),
+    )
+    return len(drift)
+
+
+def main(argv: list[str] | None = None) -> None:
+    # Модуль импортируется из моделей, поэтому настройки читаются только
+    # при запуске команды, а не при импорте.
+    from app.core.config import settings
+    from app.db.session import sync_database_url
+
+    parser = argparse.ArgumentParser(
+        description="Обслуживание счётчиков пользователей и постов."
+    )
+    parser.add_argument("command", choices=("reconcile",))
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args(argv)
+    engine = create_engine(sync_database_url(args.database_url))
+    try:
+        with engine.begin() as connection:
+            fixed = reconcile_counts(connection)
+    finally:
+        engine.dispose()
+    print(f"Исправлено счётчиков: {fixed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,92 @@
-"""Модуль для настройки движка и создания сессий для работы с БД."""
+"""Модуль для приведения схемы БД к последней миграции Alembic.
 
-from app.db.session import async_engine
-from sqlmodel import SQLModel
+Схема создаётся и меняется только миграциями, в том числе при запуске
+приложения: create_all не изменяет существующие таблицы и не
+записывает версию в alembic_version, поэтому после него цепочка
+миграций ломается. БД, созданная прежней версией приложения через
+create_all (таблицы user и post без alembic_version), обновляется с
+первой ревизии.
 
+Модуль не читает настройки при импорте, поэтому его можно использовать
+до того, как задан DATABASE_URL (например, в бенчмарках).
+"""
 
-async def create_db_and_tables():
-    """Асинхронное создание всех таблиц в БД."""
-    async with async_engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+import asyncio
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent.parent / "alembic"
+# Пауза между попытками взять блокировку записи для миграций.
+MIGRATION_RETRY_DELAY = 0.5
+
+
+def alembic_config(connection: Connection | None = None) -> Config:
+    """Конфигурация Alembic без alembic.ini.
+
+    Если передано соединение, миграции выполняются в нём (см.
+    alembic/env.py), а не в отдельном движке по DATABASE_URL.
+    """
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_database(connection: Connection) -> None:
+    """Применяет миграции до последней ревизии в переданном соединении."""
+    command.upgrade(alembic_config(connection), "head")
+
+
+def is_database_current(connection: Connection) -> bool:
+    """Проверяет, что БД уже на последней ревизии миграций."""
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    current = MigrationContext.configure(connection).get_current_revision()
+    return current == head
+
+
+def is_database_locked(error: OperationalError) -> bool:
+    return "database is locked" in str(error.orig)
+
+
+async def upgrade_db(
+    engine: AsyncEngine,
+    read_engine: AsyncEngine | None = None,
+    lock_timeout: float = 0.0,
+) -> None:
+    """Приводит схему БД к последней миграции при запуске приложения.
+
+    Сначала ревизия проверяется соединением read_engine: если БД уже на
+    последней миграции, блокировка записи не берётся и запуск воркеров
+    не ждёт друг друга. Иначе все миграции выполняются в одной
+    транзакции соединения-писателя (BEGIN IMMEDIATE). Если блокировку
+    держит другой воркер, который сам выполняет миграции (на большой
+    БД дольше busy_timeout), попытки повторяются до lock_timeout секунд;
+    следующий воркер видит уже обновлённую версию и ничего не меняет.
+    """
+    if read_engine is not None:
+        try:
+            async with read_engine.connect() as connection:
+                if await connection.run_sync(is_database_current):
+                    return
+        except OperationalError:
+            # Файла БД ещё нет, открыть его только для чтения нельзя.
+            pass
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + lock_timeout
+    while True:
+        try:
+            async with engine.begin() as connection:
+                await connection.run_sync(upgrade_database)
+            return
+        except OperationalError as error:
+            if not is_database_locked(error) or loop.time() >= deadline:
+                raise
+        await asyncio.sleep(MIGRATION_RETRY_DELAY)
@@ -0,0 +1,53 @@
+"""Модуль для метрик работы с БД: время SQL-запросов и ожидание пула."""
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import db_pool_checkout_wait, db_statement_duration
+
+OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE"})
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, измеряющий ожидание свободного соединения.
+
+    У пула нет события до выдачи соединения, поэтому ожидание меряется
+    вокруг _do_get. Метка движка — logging_name пула, она сохраняется
+    при пересоздании пула.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(
+                time.perf_counter() - started, self.logging_name or ""
+            )
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    elapsed = time.perf_counter() - context._metrics_started
+    operation = statement.lstrip()[:6].upper()
+    db_statement_duration.observe(
+        elapsed,
+        conn.engine.pool.logging_name or "",
+        operation if operation in OPERATIONS else "OTHER",
+    )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Подключает к движку замер времени каждого SQL-запроса."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
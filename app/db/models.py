@@ -2,32 +2,148 @@
 
 from typing import List, Optional
 
+from sqlalchemy import JSON, Column, event, literal_column
 from sqlmodel import Field, Relationship, SQLModel
 
+from app.db.counters import create_counter_triggers, drop_counter_triggers
+from app.db.search import create_post_search, drop_post_search
+from app.db.versions import (
+    create_version_floor_triggers,
+    drop_version_floor_triggers,
+    initial_version,
+)
+
+
+def version_field(table: str) -> int:
+    """Счётчик версии строки для ETag, растёт при каждом UPDATE.
+
+    Увеличивается самой БД в том же UPDATE, в том числе в массовых;
+    новое значение ORM получает через RETURNING (eager_defaults).
+    Новая строка начинает с версии выше версий удалённых строк таблицы
+    (см. app.db.versions), поэтому повторно выданный id не повторяет
+    прежний ETag.
+    """
+    return Field(
+        default=None,
+        nullable=False,
+        sa_column_kwargs={
+            "default": initial_version(table),
+            "server_default": "1",
+            "onupdate": literal_column("version + 1"),
+        },
+    )
+
 
 class User(SQLModel, table=True):
     """Модель пользователя."""
 
+    __mapper_args__ = {"eager_defaults": True}
+
     id: Optional[int] = Field(default=None, primary_key=True)
     first_name: Optional[str] = Field(nullable=True)
     second_name: Optional[str] = Field(nullable=True)
     patronymic: Optional[str] = Field(nullable=True)
-    email: Optional[str] = Field(nullable=True)
+    email: Optional[str] = Field(nullable=True, unique=True, index=True)
     address: Optional[str] = Field(nullable=True)
     photo_url: Optional[str] = Field(nullable=True)
+    photo_hash: Optional[str] = Field(
+        default=None, nullable=True, index=True
+    )
+    photo_variants: Optional[dict] = Field(
+        default=None,
+        sa_column=Column(JSON(none_as_null=True), nullable=True),
+    )
+    # Нормализованные значения для поиска по префиксу, см. app.db.search.
+    second_name_key: Optional[str] = Field(
+        default=None, nullable=True, index=True
+    )
+    first_name_key: Optional[str] = Field(
+        default=None, nullable=True, index=True
+    )
+    patronymic_key: Optional[str] = Field(
+        default=None, nullable=True, index=True
+    )
+    email_key: Optional[str] = Field(default=None, nullable=True, index=True)
+    version: int = version_field("user")
     posts: List["Post"] = Relationship(
         back_populates="user",
-        sa_relationship_kwargs={"cascade": "all, delete"}
+        sa_relationship_kwargs={
+            "cascade": "all, delete",
+            "passive_deletes": True,
+        },
     )
 
 
 class Post(SQLModel, table=True):
     """Модель поста пользователя."""
 
+    __mapper_args__ = {"eager_defaults": True}
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: Optional[str] = Field(nullable=True)
     content: Optional[str] = Field(nullable=True)
     user_id: Optional[int] = Field(
-        default=None, foreign_key="user.id", nullable=True
+        default=None,
+        foreign_key="user.id",
+        ondelete="CASCADE",
+        nullable=True,
+        index=True,
     )
+    version: int = version_field("post")
     user: Optional[User] = Relationship(back_populates="posts")
+
+
+# Полнотекстовый индекс постов создаётся и удаляется вместе с таблицей.
+event.listen(Post.__table__, "after_create", create_post_search)
+event.listen(Post.__table__, "before_drop", drop_post_search)
+
+
+class CacheInvalidation(SQLModel, table=True):
+    """Сброс записи кеша сущностей, который должны увидеть другие воркеры."""
+
+    __tablename__ = "cache_invalidation"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    entity: str
+    entity_id: int
+    cascade: bool = False
+    created_at: float = Field(index=True)
+
+
+class RowCount(SQLModel, table=True):
+    """Число строк таблицы, его поддерживают триггеры (app.db.counters)."""
+
+    __tablename__ = "row_count"
+
+    name: str = Field(primary_key=True)
+    count: int = 0
+
+
+class UserPostCount(SQLModel, table=True):
+    """Число постов пользователя, его поддерживают триггеры."""
+
+    __tablename__ = "user_post_count"
+
+    user_id: int = Field(
+        primary_key=True, foreign_key="user.id", ondelete="CASCADE"
+    )
+    count: int = 0
+
+
+class VersionFloor(SQLModel, table=True):
+    """Наибольшая версия удалённых строк таблицы, см. app.db.versions."""
+
+    __tablename__ = "version_floor"
+
+    name: str = Field(primary_key=True)
+    version: int = 0
+
+
+# Триггеры счётчиков и версий ссылаются на несколько таблиц, поэтому
+# создаются после всех таблиц схемы.
+event.listen(SQLModel.metadata, "after_create", create_counter_triggers)
+event.listen(SQLModel.metadata, "before_drop", drop_counter_triggers)
+event.listen(
+    SQLModel.metadata, "after_create", create_version_floor_triggers
+)
+event.listen(SQLModel.metadata, "before_drop", drop_version_floor_triggers)
@@ -0,0 +1,53 @@
+"""Модуль для публикации и удаления файлов фото с учётом ссылок на них.
+
+Файлы фото хранятся под хешем содержимого и общие у всех пользователей
+с одинаковым фото. Публикация файлов и проверка «фото больше никому не
+нужно» с удалением выполняются только в транзакции записи: писатель
+держит блокировку записи SQLite (BEGIN IMMEDIATE), поэтому, пока идут
+проверка и удаление, ни одна другая запись не может сослаться на это
+фото. Загрузка публикует свои файлы заново в своей транзакции, так что
+удаление, выполненное до неё, не оставит ссылку на отсутствующие файлы.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.core.storage import remove_photo_files
+from app.db.models import User
+from app.db.writer import run_write
+
+
+async def is_photo_unused(session: AsyncSession, digest: str) -> bool:
+    """Проверяет, что на фото не ссылается ни один пользователь."""
+    still_used = await session.scalar(
+        select(User.id).where(User.photo_hash == digest).limit(1)
+    )
+    return still_used is None
+
+
+async def remove_photo_if_unused(session: AsyncSession, digest: str) -> bool:
+    """Удаляет файлы фото, если на него никто не ссылается.
+
+    Вызывается внутри транзакции записи, до её фиксации.
+    """
+    if not await is_photo_unused(session, digest):
+        return False
+    await remove_photo_files(digest)
+    return True
+
+
+async def release_photo(session: AsyncSession, digest: str | None) -> None:
+    """Удаляет файлы фото, на которое перестали ссылаться, если оно никому
+    больше не нужно.
+
+    Вызывается после фиксации изменения, убравшего ссылку, отдельной
+    короткой транзакцией записи: файлы не удаляются, пока изменение
+    может откатиться.
+    """
+    if digest is None:
+        return
+
+    async def release(session: AsyncSession) -> bool:
+        return await remove_photo_if_unused(session, digest)
+
+    await run_write(session, release)
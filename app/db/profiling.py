@@ -0,0 +1,93 @@
+"""Модуль для учёта SQL-запросов каждого HTTP-запроса и медленных запросов.
+
+События движка добавляют число и время SQL-запросов в статистику
+текущего HTTP-запроса (контекстная переменная, её задаёт middleware из
+app.api.profiling). Запросы дольше SLOW_QUERY_MS пишутся в лог вместе
+с параметрами и планом EXPLAIN QUERY PLAN.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Управление транзакцией не считается запросом: его число зависит от
+# того, чья это сессия, а не от работы эндпоинта.
+TRANSACTION_STATEMENTS = frozenset(
+    {"BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA"}
+)
+
+
+@dataclass
+class QueryStats:
+    """Число SQL-запросов и их суммарное время в одном HTTP-запросе."""
+
+    statements: int = 0
+    duration: float = 0.0
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def explain_query_plan(
+    conn, statement: str, parameters, executemany: bool
+) -> str:
+    """План запроса одной строкой; при ошибке — её текст."""
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return "; ".join(row[-1] for row in cursor.fetchall())
+    except Exception as error:
+        return f"не получен: {error}"
+    finally:
+        cursor.close()
+
+
+def _format_parameters(parameters, executemany: bool) -> str:
+    if executemany and parameters:
+        return f"{len(parameters)} наборов, первый {parameters[0]!r}"
+    return repr(parameters)
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    context._profiling_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    elapsed = time.perf_counter() - context._profiling_started
+    operation = statement.lstrip().split(None, 1)[0].upper()
+    if operation in TRANSACTION_STATEMENTS:
+        return
+    stats = query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.duration += elapsed
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "Медленный SQL-запрос (%.1f мс): %s; параметры: %s; план: %s",
+            elapsed * 1000,
+            " ".join(statement.split()),
+            _format_parameters(parameters, executemany),
+            explain_query_plan(conn, statement, parameters, executemany),
+        )
+
+
+def profile_engine(engine: Engine) -> None:
+    """Подключает к движку учёт запросов и лог медленных запросов."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
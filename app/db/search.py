@@ -0,0 +1,199 @@
+"""Модуль для поиска постов (SQLite FTS5) и пользователей по префиксу.
+
+Индекс post_fts хранит только токены (external content): текст берётся
+из таблицы post, а триггеры обновляют индекс при каждой вставке,
+изменении и удалении поста, в том числе каскадном.
+
+Перестроение индекса по существующим данным (из папки с проектом):
+    python -m app.db.search rebuild
+
+Пользователи ищутся по префиксу в колонках <поле>_key с нормализованными
+значениями. SQLite lower() и NOCASE сворачивают регистр только у ASCII,
+поэтому значения нормализуются в Python при каждой записи, а префикс
+ищется диапазоном по обычному индексу.
+"""
+
+import argparse
+import re
+import time
+import unicodedata
+from typing import Any, Mapping
+
+from sqlalchemy import (
+    ColumnElement,
+    Connection,
+    Integer,
+    and_,
+    cast,
+    column,
+    create_engine,
+    func,
+    literal_column,
+    table,
+)
+
+POST_FTS_TABLE = "post_fts"
+# Таблицы, которые FTS5 создаёт для индекса; в моделях их нет.
+SEARCH_TABLES = frozenset(
+    {
+        POST_FTS_TABLE,
+        f"{POST_FTS_TABLE}_data",
+        f"{POST_FTS_TABLE}_idx",
+        f"{POST_FTS_TABLE}_docsize",
+        f"{POST_FTS_TABLE}_config",
+    }
+)
+
+CREATE_POST_SEARCH = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {POST_FTS_TABLE} USING fts5(
+        title, content,
+        content='post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS post_fts_insert AFTER INSERT ON post
+    BEGIN
+        INSERT INTO {POST_FTS_TABLE} (rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS post_fts_delete AFTER DELETE ON post
+    BEGIN
+        INSERT INTO {POST_FTS_TABLE} ({POST_FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS post_fts_update
+    AFTER UPDATE OF title, content ON post
+    BEGIN
+        INSERT INTO {POST_FTS_TABLE} ({POST_FTS_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {POST_FTS_TABLE} (rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+)
+
+post_fts = table(POST_FTS_TABLE, column("rowid"))
+_post_fts_ref = literal_column(POST_FTS_TABLE)
+
+# Ранг BM25 (чем меньше, тем релевантнее; совпадение в заголовке весит
+# больше, чем в тексте) в миллионных долях: целое значение однозначно
+# повторяется в курсоре страницы и в условии следующей страницы.
+post_search_rank = cast(
+    func.bm25(_post_fts_ref, 4.0, 1.0) * 1_000_000, Integer
+)
+post_search_snippet = func.snippet(
+    _post_fts_ref, -1, "<mark>", "</mark>", "…", 12
+)
+_SEARCH_TERM = re.compile(r"\w+")
+
+
+def post_search_match(query: str):
+    """Условие MATCH по словам запроса или None, если слов нет.
+
+    Каждое слово берётся в кавычки, поэтому операторы FTS5 и кавычки
+    во вводе пользователя не ломают синтаксис запроса; ищутся посты,
+    в которых есть все слова.
+    """
+    terms = _SEARCH_TERM.findall(query)
+    if not terms:
+        return None
+    return _post_fts_ref.op("MATCH")(
+        " ".join(f'"{term}"' for term in terms)
+    )
+
+
+USER_SEARCH_FIELDS = ("second_name", "first_name", "patronymic", "email")
+
+
+def search_key(value: str | None) -> str | None:
+    """Значение для поиска без учёта регистра, формы символов и ё/е."""
+    if value is None:
+        return None
+    folded = unicodedata.normalize("NFKC", value).casefold()
+    return unicodedata.normalize("NFKC", folded).replace("ё", "е").strip()
+
+
+def user_search_keys(values: Mapping[str, Any]) -> dict[str, Any]:
+    """Колонки поиска для полей пользователя, которые есть в values."""
+    return {
+        f"{name}_key": search_key(values[name])
+        for name in USER_SEARCH_FIELDS
+        if name in values
+    }
+
+
+def prefix_condition(key_column: Any, prefix: str) -> ColumnElement[bool]:
+    """Условие «начинается с prefix» в виде диапазона по индексу.
+
+    LIKE с бинарной сортировкой SQLite индекс не использует, а диапазон
+    [prefix, следующая строка) — использует.
+    """
+    if ord(prefix[-1]) == 0x10FFFF:
+        return key_column >= prefix
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(key_column >= prefix, key_column < upper)
+
+
+DROP_POST_SEARCH = (
+    "DROP TRIGGER IF EXISTS post_fts_update",
+    "DROP TRIGGER IF EXISTS post_fts_delete",
+    "DROP TRIGGER IF EXISTS post_fts_insert",
+    f"DROP TABLE IF EXISTS {POST_FTS_TABLE}",
+)
+
+
+def create_post_search(target, connection: Connection, **kw) -> None:
+    """Создаёт индекс и триггеры; вызывается после CREATE TABLE post."""
+    for statement in CREATE_POST_SEARCH:
+        connection.exec_driver_sql(statement)
+
+
+def drop_post_search(target, connection: Connection, **kw) -> None:
+    """Удаляет индекс и триггеры; вызывается перед DROP TABLE post."""
+    for statement in DROP_POST_SEARCH:
+        connection.exec_driver_sql(statement)
+
+
+def rebuild_post_search(connection: Connection) -> None:
+    """Перестраивает индекс по текущему содержимому таблицы post."""
+    create_post_search(None, connection)
+    connection.exec_driver_sql(
+        f"INSERT INTO {POST_FTS_TABLE} ({POST_FTS_TABLE}) VALUES ('rebuild')"
+    )
+    connection.exec_driver_sql(
+        f"INSERT INTO {POST_FTS_TABLE} ({POST_FTS_TABLE}) "
+        "VALUES ('optimize')"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    # Модуль импортируется из моделей, поэтому настройки читаются только
+    # при запуске команды, а не при импорте.
+    from app.core.config import settings
+    from app.db.session import sync_database_url
+
+    parser = argparse.ArgumentParser(
+        description="Обслуживание полнотекстового индекса постов."
+    )
+    parser.add_argument("command", choices=("rebuild",))
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args(argv)
+    engine = create_engine(sync_database_url(args.database_url))
+    started = time.perf_counter()
+    try:
+        with engine.begin() as connection:
+            rebuild_post_search(connection)
+    finally:
+        engine.dispose()
+    elapsed = time.perf_counter() - started
+    print(f"Индекс постов перестроен за {elapsed:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
 """Модуль для настройки движка и создания сессий для работы с БД."""
 
+from functools import partial
 from typing import Annotated
 
-from fastapi import Depends
-from sqlalchemy import Column, Integer
+from fastapi import Depends, Request
+from sqlalchemy import Column, Integer, event
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.asyncio import (
-    AsyncSession, async_sessionmaker, create_async_engine
+    AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 )
 from sqlalchemy.orm import declarative_base, declared_attr
 
 from app.core.config import settings
+from app.db.metrics import TimedAsyncAdaptedQueuePool, instrument_engine
+from app.db.profiling import profile_engine
 
 
 class PreBase:
@@ -20,18 +24,151 @@ class PreBase:
     id = Column(Integer, primary_key=True)
 
 
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def set_sqlite_pragmas(
+    dbapi_connection, connection_record, read_only: bool = False
+) -> None:
+    """Настраивает PRAGMA SQLite для каждого нового соединения.
+
+    Внешние ключи (и ON DELETE CASCADE) SQLite проверяет, только если они
+    включены в соединении. Режим журнала хранится в файле БД, поэтому его
+    задаёт только писатель.
+    Неявные транзакции драйвера отключаются: транзакции начинает
+    SQLAlchemy (см. begin_sqlite_transaction), иначе не работают SAVEPOINT.
+    """
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    if not read_only:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def begin_sqlite_transaction(conn, immediate: bool = False) -> None:
+    """Явно начинает транзакцию SQLite.
+
+    Писатель сразу берёт блокировку записи (BEGIN IMMEDIATE), чтобы при
+    нескольких процессах ожидать её по busy_timeout, а не получать ошибку
+    при повышении блокировки посреди транзакции.
+    """
+    conn.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+
+def is_file_database(url: str | URL) -> bool:
+    """Проверяет, что URL указывает на файловую БД, а не на БД в памяти."""
+    return make_url(url).database not in (None, "", ":memory:")
+
+
+def sync_database_url(url: str | URL) -> URL:
+    """URL той же БД для синхронного драйвера sqlite3."""
+    return make_url(url).set(drivername="sqlite")
+
+
+def read_only_url(url: str | URL) -> URL:
+    """URL того же файла БД, открываемого SQLite только для чтения."""
+    database_url = make_url(url)
+    return database_url.set(
+        database=f"file:{database_url.database}",
+        query={**database_url.query, "mode": "ro", "uri": "true"},
+    )
+
+
+def build_async_engine(
+    url: str | URL, writer: bool = False, **kwargs
+) -> AsyncEngine:
+    """Создаёт асинхронный движок с настройками пула и PRAGMA из Settings.
+
+    Движок-писатель держит единственное соединение и начинает транзакции
+    с BEGIN IMMEDIATE. Для БД в памяти используется пул по умолчанию
+    с одним соединением.
+    """
+    database_url = make_url(url)
+    read_only = database_url.query.get("mode") == "ro"
+    engine_kwargs = {
+        "connect_args": {"check_same_thread": False},
+        # Метка движка в метриках БД.
+        "pool_logging_name": (
+            "writer" if writer else "reader" if read_only else "shared"
+        ),
+    }
+    if is_file_database(database_url):
+        if settings.METRICS_ENABLED:
+            engine_kwargs["poolclass"] = TimedAsyncAdaptedQueuePool
+        engine_kwargs.update(
+            pool_size=1 if writer else settings.DB_POOL_SIZE,
+            max_overflow=0 if writer else settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    engine_kwargs.update(kwargs)
+    engine = create_async_engine(database_url, **engine_kwargs)
+    event.listen(
+        engine.sync_engine,
+        "connect",
+        partial(set_sqlite_pragmas, read_only=read_only),
+    )
+    event.listen(
+        engine.sync_engine,
+        "begin",
+        partial(begin_sqlite_transaction, immediate=writer),
+    )
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine.sync_engine)
+    if settings.QUERY_PROFILING_ENABLED:
+        profile_engine(engine.sync_engine)
+    return engine
+
+
 Base = declarative_base(cls=PreBase)
-async_engine = create_async_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
+if is_file_database(settings.DATABASE_URL):
+    async_engine = build_async_engine(settings.DATABASE_URL, writer=True)
+    async_read_engine = build_async_engine(
+        read_only_url(settings.DATABASE_URL)
+    )
+else:
+    async_engine = async_read_engine = build_async_engine(
+        settings.DATABASE_URL
+    )
+async_session_maker = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+async_read_session_maker = async_sessionmaker(
+    async_read_engine, autoflush=False, expire_on_commit=False
 )
 
 
-async def get_async_session():
-    """Асинхронный генератор сессий."""
-    async_session = async_sessionmaker(
-        async_engine, autoflush=False, expire_on_commit=False
-    )
-    async with async_session() as session:
+async def get_async_session(request: Request):
+    """Асинхронный генератор сессий.
+
+    Запросы на чтение получают сессию пула соединений только для чтения,
+    остальные — сессию единственного соединения-писателя, так что чтения
+    в режиме WAL идут параллельно с записью.
+    """
+    if request.method in READ_METHODS:
+        session_maker = async_read_session_maker
+    else:
+        session_maker = async_session_maker
+    async with session_maker() as session:
         yield session
 
 SessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+
+
+def get_read_session_maker() -> async_sessionmaker[AsyncSession]:
+    """Фабрика сессий чтения для потоковых ответов.
+
+    Сессия из get_async_session закрывается до отправки тела ответа,
+    поэтому StreamingResponse открывает свою сессию на время передачи.
+    """
+    return async_read_session_maker
+
+
+ReadSessionMakerDep = Annotated[
+    async_sessionmaker[AsyncSession], Depends(get_read_session_maker)
+]
@@ -0,0 +1,76 @@
+"""Модуль для версий строк пользователей и постов, по которым строятся ETag.
+
+ETag записи — её id и версия (см. app.api.etag). Таблицы не
+AUTOINCREMENT, поэтому после удаления строки с наибольшим id SQLite
+выдаёт тот же id новой строке; если бы версия новой строки начиналась
+с 1, её ETag совпал бы с ETag удалённой и условный GET вернул бы 304
+с чужими данными.
+
+Поэтому наибольшая версия удалённых строк каждой таблицы хранится в
+version_floor (её обновляют триггеры на DELETE, в том числе при
+каскадном удалении), а версия новой строки начинается выше неё: пара
+(id, версия) никогда не повторяется. UPDATE по-прежнему увеличивает
+версию строки на 1 без обращения к version_floor.
+"""
+
+from sqlalchemy import Connection, literal_column
+
+VERSIONED_TABLES = ("user", "post")
+
+CREATE_VERSION_FLOOR_TRIGGERS = tuple(
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_version_floor AFTER DELETE ON {table}
+    BEGIN
+        INSERT INTO version_floor (name, version)
+        VALUES ('{table}', old.version)
+        ON CONFLICT (name) DO UPDATE
+        SET version = max(version, excluded.version);
+    END
+    """
+    for table in VERSIONED_TABLES
+)
+
+DROP_VERSION_FLOOR_TRIGGERS = tuple(
+    f"DROP TRIGGER IF EXISTS {table}_version_floor"
+    for table in reversed(VERSIONED_TABLES)
+)
+
+# Версии уже удалённых строк неизвестны, поэтому нижняя граница
+# начинается с наибольшей версии имеющихся строк.
+SEED_VERSION_FLOOR = """
+    INSERT INTO version_floor (name, version)
+    SELECT 'user', COALESCE(MAX(version), 0) FROM user
+    UNION ALL
+    SELECT 'post', COALESCE(MAX(version), 0) FROM post
+"""
+
+
+def initial_version(table: str):
+    """Версия новой строки: на 1 больше версий удалённых строк таблицы."""
+    return literal_column(
+        "COALESCE((SELECT version FROM version_floor "
+        f"WHERE name = '{table}'), 0) + 1"
+    )
+
+
+def create_version_floor_triggers(
+    target, connection: Connection, **kw
+) -> None:
+    """Создаёт триггеры после create_all схемы с таблицей version_floor."""
+    if not any(
+        table.name == "version_floor" for table in kw.get("tables", ())
+    ):
+        return
+    for statement in CREATE_VERSION_FLOOR_TRIGGERS:
+        connection.exec_driver_sql(statement)
+
+
+def drop_version_floor_triggers(
+    target, connection: Connection, **kw
+) -> None:
+    if not any(
+        table.name == "version_floor" for table in kw.get("tables", ())
+    ):
+        return
+    for statement in DROP_VERSION_FLOOR_TRIGGERS:
+        connection.exec_driver_sql(statement)
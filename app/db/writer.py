@@ -0,0 +1,144 @@
+"""Модуль для группового коммита операций записи в БД."""
+
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+
+T = TypeVar("T")
+WriteOperation = Callable[[AsyncSession], Awaitable[T]]
+
+
+class GroupCommitWriter:
+    """Собирает параллельные операции записи в одну транзакцию.
+
+    Операции, пришедшие в течение короткого окна (или до заполнения
+    пачки), выполняются одна за другой в общей сессии. Каждая операция
+    выполняется в своей точке сохранения (SAVEPOINT): ошибка откатывает
+    только её и возвращается её вызывающему, остальные фиксируются одним
+    commit.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        window: float,
+        max_batch: int,
+    ) -> None:
+        self._session_maker = session_maker
+        self._window = window
+        self._max_batch = max_batch
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Запущен ли фоновый писатель."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запускает фоновую задачу писателя в текущем цикле событий."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Дожидается выполнения поставленных операций и останавливается."""
+        if not self.running:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, operation: WriteOperation[T]) -> T:
+        """Ставит операцию в очередь и возвращает её результат или ошибку."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        """Собирает пачку операций за окно ожидания."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self._window
+        while len(batch) < self._max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._queue.get(), timeout)
+                )
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            try:
+                await self._commit_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit_batch(self, batch: list) -> None:
+        """Выполняет пачку операций и фиксирует её одной транзакцией."""
+        outcomes = []
+        try:
+            async with self._session_maker() as session:
+                async with session.begin():
+                    for operation, future in batch:
+                        if future.cancelled():
+                            continue
+                        try:
+                            async with session.begin_nested():
+                                result = await operation(session)
+                        except Exception as error:
+                            outcomes.append((future, error, False))
+                        else:
+                            outcomes.append((future, result, True))
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for future, value, succeeded in outcomes:
+            if future.done():
+                continue
+            if succeeded:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+group_commit_writer = GroupCommitWriter(
+    async_session_maker,
+    window=settings.GROUP_COMMIT_WINDOW_MS / 1000,
+    max_batch=settings.GROUP_COMMIT_MAX_BATCH,
+)
+
+
+async def run_write(
+    session: AsyncSession, operation: WriteOperation[T]
+) -> T:
+    """Выполняет операцию записи и фиксирует её.
+
+    При включённом групповом коммите операция передаётся писателю, иначе
+    выполняется и фиксируется в сессии запроса.
+    """
+    if group_commit_writer.running:
+        return await group_commit_writer.submit(operation)
+    try:
+        result = await operation(session)
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    return result
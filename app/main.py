@@ -3,18 +3,34 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 
+from app.api.metrics import MetricsMiddleware
+from app.api.profiling import QueryProfilingMiddleware
 from app.api.routing import main_router
 from app.core.config import settings
 from app.core.constants import UPLOAD_DIR
-from app.db.init_db import create_db_and_tables
+from app.core.images import get_image_executor, shutdown_image_executor
+from app.core.storage import ImmutableStaticFiles
+from app.db.cache_sync import cache_invalidation_sync
+from app.db.init_db import upgrade_db
+from app.db.session import async_engine, async_read_engine
+from app.db.writer import group_commit_writer
 
 
 @asynccontextmanager
 async def lifespan(current_app: FastAPI):
-    await create_db_and_tables()
+    await upgrade_db(
+        async_engine, async_read_engine, settings.MIGRATION_LOCK_TIMEOUT
+    )
+    get_image_executor()
+    if settings.GROUP_COMMIT_ENABLED:
+        group_commit_writer.start()
+    if settings.ENTITY_CACHE_SHARED:
+        await cache_invalidation_sync.start()
     yield
+    await cache_invalidation_sync.stop()
+    await group_commit_writer.stop()
+    shutdown_image_executor()
 
 
 app = FastAPI(
@@ -23,5 +39,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 app.include_router(main_router)
+if settings.QUERY_PROFILING_ENABLED:
+    app.add_middleware(QueryProfilingMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/static", StaticFiles(directory=UPLOAD_DIR), name="static")
+app.mount(
+    "/static", ImmutableStaticFiles(directory=UPLOAD_DIR), name="static"
+)
@@ -0,0 +1,37 @@
+"""Модуль для настройки Pydantic-схем ответов массовых операций."""
+
+from typing import Any
+
+from pydantic import Field
+from sqlmodel import SQLModel
+
+
+class BulkItemResult(SQLModel):
+    """Результат обработки одного элемента массового запроса."""
+
+    index: int = Field(
+        ..., description="Порядковый номер элемента в запросе", examples=[0]
+    )
+    status: int = Field(
+        ..., description="HTTP-статус обработки элемента", examples=[201]
+    )
+    id: int | None = Field(
+        None, description="ID созданной или обновлённой записи", examples=[1]
+    )
+    detail: str | list[dict[str, Any]] | None = Field(
+        None, description="Причина ошибки", examples=[None]
+    )
+
+
+class BulkResult(SQLModel):
+    """Схема ответа массовой операции."""
+
+    succeeded: int = Field(
+        ..., description="Число успешно обработанных элементов", examples=[2]
+    )
+    failed: int = Field(
+        ..., description="Число элементов с ошибкой", examples=[0]
+    )
+    items: list[BulkItemResult] = Field(
+        ..., description="Результаты по элементам в порядке запроса"
+    )
@@ -0,0 +1,24 @@
+"""Модуль для настройки Pydantic-схемы статистики кеша."""
+
+from pydantic import Field
+from sqlmodel import SQLModel
+
+
+class CacheStats(SQLModel):
+    """Счётчики кеша сущностей текущего воркера."""
+
+    size: int = Field(..., description="Записей в кеше", examples=[120])
+    max_size: int = Field(
+        ..., description="Наибольшее число записей", examples=[10000]
+    )
+    hits: int = Field(..., description="Попадания", examples=[9500])
+    misses: int = Field(..., description="Промахи", examples=[500])
+    evictions: int = Field(
+        ..., description="Вытеснения по размеру (LRU)", examples=[0]
+    )
+    expirations: int = Field(
+        ..., description="Записи, истёкшие по TTL", examples=[30]
+    )
+    invalidations: int = Field(
+        ..., description="Сбросы записей после изменений", examples=[12]
+    )
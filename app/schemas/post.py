@@ -69,3 +69,24 @@ class PostPartialUpdate(SQLModel):
         description="Содержание поста 4",
         examples=["Best of the best"],
     )
+
+
+class PostBulkUpdate(PostPartialUpdate):
+    """Схема элемента массового частичного обновления постов."""
+
+    id: int = Field(..., description="ID поста", examples=[2])
+
+
+class PostSearchResult(SQLModel):
+    """Схема найденного поста с фрагментом текста."""
+
+    id: int = Field(..., description="ID поста", examples=[2])
+    user_id: int = Field(..., description="Автор поста", examples=[2])
+    title: str | None = Field(
+        None, description="Название поста", examples=["Заголовок 2"]
+    )
+    snippet: str = Field(
+        ...,
+        description="Фрагмент с найденными словами в <mark>",
+        examples=["…ещё один <mark>топовый</mark> контент"],
+    )
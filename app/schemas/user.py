@@ -3,6 +3,8 @@
 from pydantic import EmailStr, Field
 from sqlmodel import SQLModel
 
+from app.schemas.post import PostRead
+
 
 class UserCreate(SQLModel):
     """Схема для создания пользователя."""
@@ -49,6 +51,21 @@ class UserRead(SQLModel):
     photo_url: str | None = Field(
         None, examples=["http://127.0.0.1:8000/static/photo_user_2.jpg"]
     )
+    photo_variants: dict[str, str] | None = Field(
+        None,
+        description="Уменьшенные копии фото по размеру стороны в пикселях",
+        examples=[
+            {"64": "http://127.0.0.1:8000/static/variants/photo_2_64.webp"}
+        ],
+    )
+
+
+class UserReadWithPosts(UserRead):
+    """Схема для чтения данных пользователя вместе с его постами."""
+
+    posts: list[PostRead] = Field(
+        default_factory=list, description="Посты пользователя"
+    )
 
 
 class UserUpdate(SQLModel):
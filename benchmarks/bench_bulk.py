@@ -0,0 +1,96 @@
+"""Бенчмарк загрузки данных: запрос на строку против массовых эндпоинтов.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_bulk --rows 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import seed_database
+
+USERS = 100
+
+
+def user_rows(count: int, offset: int) -> list[dict]:
+    return [
+        {
+            "first_name": f"Имя{i}",
+            "second_name": f"Фамилия{i}",
+            "email": f"bulk{i}@example.ru",
+            "address": f"ул. Массовая, д.{i}",
+        }
+        for i in range(offset, offset + count)
+    ]
+
+
+def post_rows(count: int) -> list[dict]:
+    return [
+        {"user_id": i % USERS + 1, "title": f"Пост {i}", "content": "Текст"}
+        for i in range(count)
+    ]
+
+
+async def per_row(client: httpx.AsyncClient, path: str, rows) -> None:
+    for row in rows:
+        response = await client.post(path, json=row)
+        response.raise_for_status()
+
+
+async def bulk(client: httpx.AsyncClient, path: str, rows) -> None:
+    body = "\n".join(json.dumps(row) for row in rows)
+    response = await client.post(
+        path,
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    response.raise_for_status()
+    assert response.json()["failed"] == 0
+
+
+async def run(rows: int) -> None:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        cases = (
+            ("users", "/users/", user_rows(rows, 0), "/users/bulk/",
+             user_rows(rows, rows)),
+            ("posts", "/posts/", post_rows(rows), "/posts/bulk/",
+             post_rows(rows)),
+        )
+        for name, path, single_rows, bulk_path, bulk_rows in cases:
+            started = time.perf_counter()
+            await per_row(client, path, single_rows)
+            single = rows / (time.perf_counter() - started)
+            started = time.perf_counter()
+            await bulk(client, bulk_path, bulk_rows)
+            batched = rows / (time.perf_counter() - started)
+            print(
+                f"{name}: per-row {single:>8.0f} rows/s, "
+                f"bulk {batched:>8.0f} rows/s, x{batched / single:.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "bench_bulk.db"
+        seed_database(path, users=USERS)
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+        asyncio.run(run(args.rows))
+
+
+if __name__ == "__main__":
+    main()
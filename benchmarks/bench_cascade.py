@@ -0,0 +1,104 @@
+"""Бенчмарк удаления пользователя с большим числом постов.
+
+Сравнивается прежнее каскадное удаление средствами ORM (посты
+загружаются в сессию и удаляются по одному) с одним DELETE и
+ON DELETE CASCADE в БД. Пиковая память считается через tracemalloc
+отдельным прогоном на новой БД, чтобы трассировка не искажала время.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_cascade --posts 100000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import selectinload
+
+from app.db.models import Post, User
+from benchmarks.common import seed_database
+
+USER_ID = 1
+
+
+async def orm_cascade(session: AsyncSession) -> None:
+    user = await session.scalar(
+        select(User).where(User.id == USER_ID).options(
+            selectinload(User.posts)
+        )
+    )
+    await session.delete(user)
+    await session.commit()
+
+
+async def db_cascade(session: AsyncSession) -> None:
+    await session.execute(delete(User).where(User.id == USER_ID))
+    await session.commit()
+
+
+async def measure(
+    path: Path, posts: int, engine_factory, operation, trace: bool = False
+) -> float:
+    """Удаляет пользователя на новой БД: время или пик памяти."""
+    seed_database(path, users=1, posts=posts)
+    engine = engine_factory(f"sqlite+aiosqlite:///{path}")
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        await operation(session)
+        result = time.perf_counter() - started
+        if trace:
+            result = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        left = await session.scalar(select(func.count()).select_from(Post))
+    assert left == 0, left
+    await engine.dispose()
+    path.unlink()
+    return result
+
+
+async def run(posts: int, workdir: Path) -> None:
+    from app.db.session import build_async_engine
+
+    cases = (
+        # Соединения без PRAGMA foreign_keys: каскад выполняет только ORM.
+        ("ORM cascade", create_async_engine, orm_cascade),
+        ("ON DELETE CASCADE", build_async_engine, db_cascade),
+    )
+    path = workdir / "cascade.db"
+    for name, engine_factory, operation in cases:
+        elapsed = await measure(path, posts, engine_factory, operation)
+        peak = await measure(
+            path, posts, engine_factory, operation, trace=True
+        )
+        print(
+            f"{name:>18}: {posts} posts in {elapsed * 1000:>8.1f} ms, "
+            f"peak memory {peak / 1024 / 1024:.1f} MiB"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["DATABASE_URL"] = (
+            f"sqlite+aiosqlite:///{Path(workdir) / 'app.db'}"
+        )
+        asyncio.run(run(args.posts, Path(workdir)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Бенчмарк смешанной нагрузки чтения/записи на движок БД.
+
+Сравнивает прежнюю настройку (движок с параметрами по умолчанию и новая
+фабрика сессий на каждый запрос) с движком из app.db.session.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_engine --workers 32 --ops 200
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import select
+
+from app.db.models import Post, User
+from app.db.session import build_async_engine
+from benchmarks.common import seed_database
+
+USERS = 10_000
+POSTS = 50_000
+
+
+def legacy_setup(url: str):
+    """Движок и фабрика сессий в том виде, как они были до настройки."""
+    engine = create_async_engine(
+        url, connect_args={"check_same_thread": False}
+    )
+
+    def new_session():
+        return async_sessionmaker(
+            engine, autoflush=False, expire_on_commit=False
+        )()
+
+    return engine, new_session
+
+
+def tuned_setup(url: str):
+    """Движок с пулом и PRAGMA из Settings и общая фабрика сессий."""
+    engine = build_async_engine(url)
+    return engine, async_sessionmaker(
+        engine, autoflush=False, expire_on_commit=False
+    )
+
+
+async def run_operation(new_session, rng: random.Random, write_ratio: float):
+    """Одна операция, имитирующая запрос к API."""
+    async with new_session() as session:
+        roll = rng.random()
+        if roll < write_ratio:
+            session.add(
+                Post(
+                    user_id=rng.randint(1, USERS),
+                    title="Бенчмарк",
+                    content="Содержание",
+                )
+            )
+            await session.commit()
+        elif roll < (1 + write_ratio) / 2:
+            await session.get(User, rng.randint(1, USERS))
+        else:
+            start = rng.randint(1, POSTS)
+            await session.execute(
+                select(Post).where(Post.id > start).order_by(Post.id).limit(50)
+            )
+
+
+async def run_setup(setup, url: str, workers: int, ops: int, ratio: float):
+    """Прогон нагрузки, возвращает операций в секунду и число ошибок."""
+    engine, new_session = setup(url)
+    errors = 0
+
+    async def worker(seed: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed)
+        for _ in range(ops):
+            try:
+                await run_operation(new_session, rng, ratio)
+            except OperationalError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(seed) for seed in range(workers)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return workers * ops / elapsed, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, setup in (("legacy", legacy_setup), ("tuned", tuned_setup)):
+            path = Path(workdir) / f"{name}.db"
+            seed_database(path, users=USERS, posts=POSTS)
+            ops_per_second, errors = asyncio.run(
+                run_setup(
+                    setup,
+                    f"sqlite+aiosqlite:///{path}",
+                    args.workers,
+                    args.ops,
+                    args.write_ratio,
+                )
+            )
+            print(
+                f"{name:>7}: {ops_per_second:>8.0f} ops/s, "
+                f"errors: {errors}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Бенчмарк опроса списков с If-None-Match против полной загрузки.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_etag --requests 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import seed_database
+
+USERS = 1_000
+POSTS = 10_000
+URLS = ("/users/?limit=100", "/posts/?limit=100", "/users/1/")
+
+
+async def poll(
+    client: httpx.AsyncClient, url: str, requests: int, conditional: bool
+) -> tuple[float, int]:
+    """Опрашивает URL, возвращает запросов в секунду и байт на ответ."""
+    etag = (await client.get(url)).headers["ETag"]
+    headers = {"If-None-Match": etag} if conditional else {}
+    size = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(url, headers=headers)
+        size += len(response.content)
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, size // requests
+
+
+async def run(requests: int) -> None:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for url in URLS:
+            full, full_size = await poll(client, url, requests, False)
+            cond, cond_size = await poll(client, url, requests, True)
+            print(
+                f"{url:>20}: 200 {full:>7.0f} req/s {full_size:>6} B, "
+                f"304 {cond:>7.0f} req/s {cond_size:>6} B, "
+                f"x{cond / full:.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "bench_etag.db"
+        seed_database(path, users=USERS, posts=POSTS)
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+        asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
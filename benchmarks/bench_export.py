@@ -0,0 +1,122 @@
+"""Бенчмарк потоковой выгрузки постов: первый байт, скорость и память.
+
+Пиковая память считается через tracemalloc отдельным прогоном, чтобы
+трассировка не искажала время.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_export --sizes 10000,100000,1000000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.common import seed_database
+
+USERS = 1_000
+
+
+async def export(app, export_format: str):
+    """Читает выгрузку по частям, возвращает время первого байта и объём.
+
+    Приложение вызывается напрямую по ASGI: httpx.ASGITransport собирает
+    всё тело ответа в памяти и не показывает потоковую передачу.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("bench", 80),
+        "path": "/posts/export/",
+        "raw_path": b"/posts/export/",
+        "root_path": "",
+        "query_string": f"format={export_format}".encode(),
+        "headers": [(b"host", b"bench")],
+    }
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_byte, size
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+        elif message["type"] == "http.response.body" and message["body"]:
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size += len(message["body"])
+        if message["type"] == "http.response.body" and not message.get(
+            "more_body"
+        ):
+            finished.set()
+
+    await app(scope, receive, send)
+    return first_byte, time.perf_counter() - started, size
+
+
+async def run(sizes: list[int], workdir: Path) -> None:
+    from app.db.session import (
+        build_async_engine,
+        get_read_session_maker,
+        read_only_url,
+    )
+    from app.main import app
+
+    for size in sizes:
+        path = workdir / f"export_{size}.db"
+        seed_database(path, users=USERS, posts=size)
+        engine = build_async_engine(
+            read_only_url(f"sqlite+aiosqlite:///{path}")
+        )
+        maker = async_sessionmaker(engine, expire_on_commit=False)
+        app.dependency_overrides[get_read_session_maker] = lambda: maker
+        for export_format in ("ndjson", "csv"):
+            first_byte, elapsed, total = await export(app, export_format)
+            tracemalloc.start()
+            await export(app, export_format)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{size:>9} posts {export_format:>6}: "
+                f"first byte {first_byte * 1000:>6.1f} ms, "
+                f"{size / elapsed:>8.0f} rows/s, "
+                f"{total / 1024 / 1024:>7.1f} MiB, "
+                f"peak memory {peak / 1024 / 1024:.1f} MiB"
+            )
+        await engine.dispose()
+        path.unlink()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["DATABASE_URL"] = (
+            f"sqlite+aiosqlite:///{Path(workdir) / 'app.db'}"
+        )
+        asyncio.run(run(sizes, Path(workdir)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Бенчмарк параллельных коротких записей: commit на запрос и групповой.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_group_commit --clients 64 --ops 50
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models import Post
+from app.db.session import build_async_engine
+from app.db.writer import GroupCommitWriter
+from benchmarks.common import seed_database, summarize
+
+USERS = 1_000
+
+
+def new_post(rng: random.Random) -> Post:
+    return Post(
+        user_id=rng.randint(1, USERS), title="Бенчмарк", content="Содержание"
+    )
+
+
+async def run_mode(url: str, grouped: bool, args) -> None:
+    engine = build_async_engine(url, writer=True)
+    maker = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    writer = GroupCommitWriter(
+        maker, window=args.window / 1000, max_batch=args.max_batch
+    )
+    if grouped:
+        writer.start()
+    samples = []
+
+    async def insert(session: AsyncSession, rng: random.Random) -> None:
+        session.add(new_post(rng))
+        await session.flush()
+
+    async def client(seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(args.ops):
+            started = time.perf_counter()
+            if grouped:
+                await writer.submit(lambda session: insert(session, rng))
+            else:
+                async with maker() as session:
+                    await insert(session, rng)
+                    await session.commit()
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(seed) for seed in range(args.clients)))
+    elapsed = time.perf_counter() - started
+    await writer.stop()
+    await engine.dispose()
+    stats = summarize(samples)
+    name = "group" if grouped else "per-request"
+    print(
+        f"{name:>11}: {len(samples) / elapsed:>8.0f} writes/s, "
+        f"p50={stats['p50']:.1f} ms p99={stats['p99']:.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--ops", type=int, default=50)
+    parser.add_argument("--window", type=float, default=2.0, help="мс")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument(
+        "--synchronous",
+        choices=("NORMAL", "FULL"),
+        default=settings.SQLITE_SYNCHRONOUS,
+        help="FULL делает fsync на каждый commit",
+    )
+    args = parser.parse_args()
+    settings.SQLITE_SYNCHRONOUS = args.synchronous
+    with tempfile.TemporaryDirectory() as workdir:
+        for grouped in (False, True):
+            path = Path(workdir) / f"group_{grouped}.db"
+            seed_database(path, users=USERS)
+            asyncio.run(run_mode(f"sqlite+aiosqlite:///{path}", grouped, args))
+
+
+if __name__ == "__main__":
+    main()
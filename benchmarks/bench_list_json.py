@@ -0,0 +1,99 @@
+"""Микробенчмарк сериализации страниц списков пользователей и постов.
+
+Сравнивается прежний путь (ORM-объекты, проверка каждой строки схемой
+ответа, JSONResponse) с быстрым путём app.api.serialization на одних и
+тех же строках из БД. Выводится число сериализованных строк в секунду.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_list_json --rows 100 --repeat 200
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from app.api.serialization import (
+    projection,
+    render_json,
+    response_fields,
+    row_dicts,
+)
+from app.db.models import Post, User
+from app.schemas.post import PostRead
+from app.schemas.user import UserRead
+from benchmarks.common import seed_database
+
+
+def response_model_path(session: Session, model, schema, rows: int):
+    adapter = TypeAdapter(list[schema])
+
+    def serialize() -> bytes:
+        objects = session.scalars(
+            select(model).order_by(model.id).limit(rows)
+        ).all()
+        return JSONResponse(
+            adapter.dump_python(
+                adapter.validate_python(objects, from_attributes=True),
+                mode="json",
+            )
+        ).body
+
+    return serialize
+
+
+def fast_path(session: Session, model, schema, rows: int):
+    fields = response_fields(schema)
+    columns = projection(model, fields)
+
+    def serialize() -> bytes:
+        result = session.execute(
+            select(*columns).order_by(model.id).limit(rows)
+        ).all()
+        return render_json(row_dicts(fields, result))
+
+    return serialize
+
+
+def measure(serialize, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        serialize()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "bench_list_json.db"
+        seed_database(path, users=args.rows, posts=args.rows)
+        engine = create_engine(f"sqlite:///{path}")
+        with Session(engine) as session:
+            for model, schema in ((User, UserRead), (Post, PostRead)):
+                slow = response_model_path(session, model, schema, args.rows)
+                fast = fast_path(session, model, schema, args.rows)
+                assert slow() == fast()
+                session.expunge_all()
+                slow_time = measure(slow, args.repeat)
+                fast_time = measure(fast, args.repeat)
+                total = args.rows * args.repeat
+                print(
+                    f"{model.__name__:>4}: response_model "
+                    f"{total / slow_time:>9.0f} rows/s, fast path "
+                    f"{total / fast_time:>9.0f} rows/s, "
+                    f"x{slow_time / fast_time:.1f}"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+"""Нагрузочный бенчмарк всех эндпоинтов пользователей, постов и фото.
+
+БД наполняется детерминированным набором данных (1k, 100k или 1m —
+столько же пользователей и постов) в файле SQLite. Каждый сценарий —
+один эндпоинт из user.py, post.py и upload_photo.py — выполняется
+параллельными асинхронными клиентами httpx прямо через ASGI-приложение.
+Для сценария выводятся RPS и перцентили задержки p50/p95/p99.
+
+Результаты сравниваются с сохранённой базовой линией
+(benchmarks/baselines/load-<набор>.json по умолчанию). Если RPS упал
+или p95 вырос больше допуска --tolerance, сценарий считается
+регрессией и бенчмарк завершается с кодом 1; так же завершается прогон
+с ошибочными ответами. Базовую линию нужно записывать на той же машине,
+где она проверяется.
+
+Сценарии выполняются по очереди на одной копии БД: сначала чтения,
+затем записи, последними — удаления созданных в прогоне записей, поэтому
+повторные прогоны на одном наборе данных сравнимы между собой.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_load --dataset 100k --save-baseline
+    python -m benchmarks.bench_load --dataset 100k --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import httpx
+from PIL import Image
+
+from benchmarks.common import seed_database, summarize
+
+DATASETS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+BASELINE_DIR = Path(__file__).parent / "baselines"
+BULK_SIZE = 100
+EXPORT_REQUESTS = 10
+
+
+@dataclass
+class LoadState:
+    """Данные прогона, общие для сценариев."""
+
+    size: int
+    photo: bytes
+    created_users: list[int] = field(default_factory=list)
+    created_posts: list[int] = field(default_factory=list)
+
+    def spread(self, i: int) -> int:
+        """id сохранённой записи, раскиданный по всему набору данных."""
+        return i * 7919 % self.size + 1
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Один эндпоинт: как построить i-й запрос и какой ждать ответ."""
+
+    name: str
+    method: str
+    request: Callable[[int, LoadState], dict[str, Any]]
+    status: int = 200
+    record: Callable[[httpx.Response, LoadState], None] | None = None
+    max_requests: int | None = None
+
+
+def user_body(i: int, prefix: str) -> dict[str, str]:
+    return {
+        "first_name": f"Имя{i}",
+        "second_name": f"Нагрузкин{i}",
+        "patronymic": f"Отчество{i}",
+        "email": f"{prefix}{i}@load.example.ru",
+        "address": f"ул. Нагрузочная, д.{i}",
+    }
+
+
+def post_body(i: int, state: LoadState) -> dict[str, Any]:
+    return {
+        "user_id": state.spread(i),
+        "title": f"Нагрузка {i}",
+        "content": f"Содержание нагрузочного поста {i}",
+    }
+
+
+def record_user(response: httpx.Response, state: LoadState) -> None:
+    state.created_users.append(response.json()["id"])
+
+
+def record_post(response: httpx.Response, state: LoadState) -> None:
+    state.created_posts.append(response.json()["id"])
+
+
+SCENARIOS = (
+    Scenario(
+        "GET /users/",
+        "GET",
+        lambda i, s: {
+            "url": "/users/",
+            "params": {"offset": s.spread(i) % 1000, "limit": 20},
+        },
+    ),
+    Scenario(
+        "GET /users/?include=posts",
+        "GET",
+        lambda i, s: {
+            "url": "/users/",
+            "params": {"offset": s.spread(i) % 1000, "limit": 20,
+                       "include": "posts"},
+        },
+    ),
+    Scenario(
+        "GET /users/export/",
+        "GET",
+        lambda i, s: {"url": "/users/export/"},
+        max_requests=EXPORT_REQUESTS,
+    ),
+    Scenario(
+        "GET /users/search/",
+        "GET",
+        lambda i, s: {
+            "url": "/users/search/",
+            "params": {"q": f"фамилия{s.spread(i)}", "limit": 20},
+        },
+    ),
+    Scenario(
+        "GET /users/{id}/",
+        "GET",
+        lambda i, s: {"url": f"/users/{s.spread(i)}/"},
+    ),
+    Scenario(
+        "GET /users/{id}/posts/",
+        "GET",
+        lambda i, s: {"url": f"/users/{s.spread(i)}/posts/"},
+    ),
+    Scenario(
+        "GET /posts/",
+        "GET",
+        lambda i, s: {
+            "url": "/posts/",
+            "params": {"offset": s.spread(i) % 1000, "limit": 20},
+        },
+    ),
+    Scenario(
+        "GET /posts/?user_id",
+        "GET",
+        lambda i, s: {"url": "/posts/", "params": {"user_id": s.spread(i)}},
+    ),
+    Scenario(
+        "GET /posts/export/?user_id",
+        "GET",
+        lambda i, s: {
+            "url": "/posts/export/", "params": {"user_id": s.spread(i)}
+        },
+    ),
+    Scenario(
+        "GET /posts/search/",
+        "GET",
+        lambda i, s: {
+            "url": "/posts/search/", "params": {"q": f"пост {s.spread(i)}"}
+        },
+    ),
+    Scenario(
+        "GET /posts/{id}/",
+        "GET",
+        lambda i, s: {"url": f"/posts/{s.spread(i)}/"},
+    ),
+    Scenario(
+        "POST /users/",
+        "POST",
+        lambda i, s: {"url": "/users/", "json": user_body(i, "single")},
+        status=201,
+        record=record_user,
+    ),
+    Scenario(
+        "POST /users/bulk/",
+        "POST",
+        lambda i, s: {
+            "url": "/users/bulk/",
+            "json": [
+                user_body(i * BULK_SIZE + n, "bulk") for n in range(BULK_SIZE)
+            ],
+        },
+    ),
+    Scenario(
+        "PUT /users/{id}/",
+        "PUT",
+        lambda i, s: {
+            "url": f"/users/{s.spread(i)}/",
+            "json": {
+                **user_body(s.spread(i), "put"), "photo_url": None
+            },
+        },
+    ),
+    Scenario(
+        "PATCH /users/{id}/",
+        "PATCH",
+        lambda i, s: {
+            "url": f"/users/{s.spread(i)}/",
+            "json": {"address": f"ул. Изменённая, д.{i}"},
+        },
+    ),
+    Scenario(
+        "POST /users_photo/{id}/",
+        "POST",
+        lambda i, s: {
+            "url": f"/users_photo/{s.spread(i)}/",
+            "files": {"file": ("photo.jpg", s.photo, "image/jpeg")},
+        },
+        status=201,
+    ),
+    Scenario(
+        "POST /posts/",
+        "POST",
+        lambda i, s: {"url": "/posts/", "json": post_body(i, s)},
+        status=201,
+        record=record_post,
+    ),
+    Scenario(
+        "POST /posts/bulk/",
+        "POST",
+        lambda i, s: {
+            "url": "/posts/bulk/",
+            "json": [
+                post_body(i * BULK_SIZE + n, s) for n in range(BULK_SIZE)
+            ],
+        },
+    ),
+    Scenario(
+        "PATCH /posts/bulk/",
+        "PATCH",
+        lambda i, s: {
+            "url": "/posts/bulk/",
+            "json": [
+                {
+                    "id": s.spread(i * BULK_SIZE + n),
+                    "user_id": s.spread(i * BULK_SIZE + n),
+                    "content": f"Массовая правка {i}",
+                }
+                for n in range(BULK_SIZE)
+            ],
+        },
+    ),
+    Scenario(
+        "PUT /posts/{id}/",
+        "PUT",
+        lambda i, s: {
+            "url": f"/posts/{s.spread(i)}/", "json": post_body(i, s)
+        },
+    ),
+    Scenario(
+        "PATCH /posts/{id}/",
+        "PATCH",
+        lambda i, s: {
+            "url": f"/posts/{s.spread(i)}/",
+            "json": {"user_id": s.spread(i), "content": f"Правка {i}"},
+        },
+    ),
+    Scenario(
+        "DELETE /posts/{id}/",
+        "DELETE",
+        lambda i, s: {"url": f"/posts/{s.created_posts[i]}/"},
+        status=204,
+    ),
+    Scenario(
+        "DELETE /users/{id}/",
+        "DELETE",
+        lambda i, s: {"url": f"/users/{s.created_users[i]}/"},
+        status=204,
+    ),
+)
+
+
+def make_photo(side: int = 512) -> bytes:
+    """Детерминированное JPEG-изображение (одинаковое в каждом прогоне)."""
+    image = Image.radial_gradient("L").resize((side, side)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+async def run_scenario(
+    transport: httpx.ASGITransport,
+    scenario: Scenario,
+    state: LoadState,
+    requests: int,
+    warmup: int,
+    concurrency: int,
+) -> dict[str, float]:
+    """Выполняет сценарий параллельными клиентами и сводит замеры.
+
+    Прогрев идёт по номерам запросов после измеряемых, чтобы запросы
+    прогрева и замера не обращались к одним и тем же записям.
+    """
+    if scenario.max_requests is not None:
+        requests = min(requests, scenario.max_requests)
+        warmup = min(warmup, 1)
+    samples: list[float] = []
+    errors = 0
+
+    async def worker(indices: list[int], measured: bool) -> None:
+        nonlocal errors
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            while indices:
+                i = indices.pop()
+                kwargs = scenario.request(i, state)
+                started = time.perf_counter()
+                response = await client.request(scenario.method, **kwargs)
+                elapsed = time.perf_counter() - started
+                if response.status_code != scenario.status:
+                    errors += 1
+                    continue
+                if scenario.record is not None:
+                    scenario.record(response, state)
+                if measured:
+                    samples.append(elapsed)
+
+    async def run(indices: list[int], measured: bool) -> float:
+        indices.reverse()
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(worker(indices, measured) for _ in range(concurrency))
+        )
+        return time.perf_counter() - started
+
+    await run(list(range(requests, requests + warmup)), measured=False)
+    errors = 0
+    elapsed = await run(list(range(requests)), measured=True)
+    result = {"requests": requests, "errors": errors}
+    if samples:
+        result["rps"] = len(samples) / elapsed
+        stats = summarize(samples)
+        result.update(p50=stats["p50"], p95=stats["p95"], p99=stats["p99"])
+    return result
+
+
+async def run_load(
+    requests: int, warmup: int, concurrency: int, size: int
+) -> dict[str, dict[str, float]]:
+    """Прогоняет все сценарии внутри lifespan приложения."""
+    from app.core.storage import remove_photo_files
+    from app.main import app
+
+    state = LoadState(size=size, photo=make_photo())
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with app.router.lifespan_context(app):
+        for scenario in SCENARIOS:
+            results[scenario.name] = await run_scenario(
+                transport, scenario, state, requests, warmup, concurrency
+            )
+            print(format_result(scenario.name, results[scenario.name]))
+    await remove_photo_files(hashlib.sha256(state.photo).hexdigest())
+    return results
+
+
+def format_result(name: str, result: dict[str, float]) -> str:
+    if "rps" not in result:
+        return f"{name:<28} ошибок: {result['errors']}"
+    line = (
+        f"{name:<28} {result['rps']:>9.1f} rps  "
+        f"p50={result['p50']:>8.2f} ms  p95={result['p95']:>8.2f} ms  "
+        f"p99={result['p99']:>8.2f} ms"
+    )
+    if result["errors"]:
+        line += f"  ошибок: {result['errors']}"
+    return line
+
+
+def find_regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Сценарии, которые хуже базовой линии больше чем на tolerance."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if result["errors"] or base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: RPS {result['rps']:.1f} < {base['rps']:.1f}"
+            )
+        if result["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result['p95']:.2f} ms > {base['p95']:.2f} ms"
+            )
+    return regressions
+
+
+def prepare_dataset(dataset: str, data_dir: Path | None, target: Path):
+    """Копирует наполненную БД набора в target, наполняя её при надобности.
+
+    С --data-dir наполненная БД сохраняется и переиспользуется: набор
+    1m наполняется несколько минут, а прогон изменяет свою копию.
+    """
+    size = DATASETS[dataset]
+    if data_dir is None:
+        seed_database(target, users=size, posts=size)
+        return
+    data_dir.mkdir(parents=True, exist_ok=True)
+    template = data_dir / f"load-{dataset}.db"
+    if not template.exists():
+        partial = template.with_suffix(".partial")
+        partial.unlink(missing_ok=True)
+        seed_database(partial, users=size, posts=size)
+        partial.rename(template)
+    shutil.copyfile(template, target)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dataset", choices=DATASETS, default="1k")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Допустимое ухудшение RPS и p95 (доля)",
+    )
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Записать результаты как базовую линию вместо сравнения",
+    )
+    parser.add_argument(
+        "--data-dir", type=Path, help="Папка для наполненных наборов данных"
+    )
+    parser.add_argument("--output", type=Path, help="JSON с результатами")
+    args = parser.parse_args()
+    baseline_path = args.baseline or (
+        BASELINE_DIR / f"load-{args.dataset}.json"
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "bench_load.db"
+        prepare_dataset(args.dataset, args.data_dir, path)
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+        results = asyncio.run(
+            run_load(
+                args.requests,
+                args.warmup,
+                args.concurrency,
+                DATASETS[args.dataset],
+            )
+        )
+    failed = [name for name, result in results.items() if result["errors"]]
+    if failed:
+        sys.exit(f"Ошибочные ответы в сценариях: {', '.join(failed)}")
+    report = {
+        "dataset": args.dataset,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Базовая линия записана в {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"Базовой линии {baseline_path} нет, сравнение пропущено")
+        return
+    baseline = json.loads(baseline_path.read_text())
+    settings = ("dataset", "requests", "concurrency")
+    if any(baseline[name] != report[name] for name in settings):
+        sys.exit(
+            "Базовая линия записана с другими --dataset, --requests "
+            "или --concurrency"
+        )
+    regressions = find_regressions(
+        results, baseline["results"], args.tolerance
+    )
+    if regressions:
+        print(f"Регрессии (допуск {args.tolerance:.0%}):")
+        print("\n".join(f"  {line}" for line in regressions))
+        sys.exit(1)
+    print(f"Регрессий нет (допуск {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Бенчмарк накладных расходов метрик (/metrics) на время запроса.
+
+Один и тот же набор запросов выполняется в отдельных процессах с
+METRICS_ENABLED=true и false (настройка читается при импорте), прогоны
+чередуются, сравниваются медианы. Приложение вызывается напрямую по
+ASGI, чтобы время клиента не размывало разницу.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_metrics --requests 5000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import seed_database
+
+USERS = 1_000
+POSTS = 10_000
+CONCURRENCY = 8
+URLS = (
+    ("/users/1/", b""),
+    ("/users/", b"limit=20"),
+    ("/posts/", b"limit=20"),
+    ("/posts/1/", b""),
+    ("/users/search/", "q=фамилия1".encode()),
+)
+
+
+async def call(app, path: str, query_string: bytes) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("bench", 80),
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(b"host", b"bench")],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    await app(scope, receive, send)
+
+
+async def child(requests: int) -> float:
+    """Секунд на запрос в этом процессе."""
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        async def worker(offset: int, count: int) -> None:
+            for i in range(count):
+                await call(app, *URLS[(offset + i) % len(URLS)])
+
+        await worker(0, len(URLS) * 10)
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                worker(n, requests // CONCURRENCY)
+                for n in range(CONCURRENCY)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    return elapsed / (requests // CONCURRENCY * CONCURRENCY)
+
+
+def run_child(path: Path, enabled: bool, requests: int) -> float:
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{path}",
+        "METRICS_ENABLED": str(enabled).lower(),
+    }
+    output = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.bench_metrics",
+            "--child", "--requests", str(requests),
+        ],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])["seconds_per_request"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        seconds = asyncio.run(child(args.requests))
+        print(json.dumps({"seconds_per_request": seconds}))
+        return
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "bench_metrics.db"
+        seed_database(path, users=USERS, posts=POSTS)
+        samples = {True: [], False: []}
+        for _ in range(args.rounds):
+            for enabled in (False, True):
+                samples[enabled].append(
+                    run_child(path, enabled, args.requests)
+                )
+    off = statistics.median(samples[False]) * 1e6
+    on = statistics.median(samples[True]) * 1e6
+    print(f"без метрик: {off:>8.1f} мкс/запрос")
+    print(f"с метриками: {on:>7.1f} мкс/запрос")
+    print(f"накладные расходы: {(on - off) / off * 100:+.2f}%")
+
+
+if __name__ == "__main__":
+    main()
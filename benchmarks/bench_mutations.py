@@ -0,0 +1,112 @@
+"""Бенчмарк изменения и удаления постов: get + flush против RETURNING.
+
+Для каждого способа считается число SQL-запросов на операцию (без BEGIN)
+и задержка p50/p95. Каждая операция выполняется в своей сессии, как
+запрос к API.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_mutations --operations 2000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import delete, event, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models import Post
+from benchmarks.common import seed_database, summarize
+
+USERS = 1_000
+
+
+async def legacy_update(session: AsyncSession, post_id: int) -> Post:
+    db_post = await session.get(Post, post_id)
+    db_post.content = f"Изменено {post_id}"
+    session.add(db_post)
+    await session.commit()
+    await session.refresh(db_post)
+    return db_post
+
+
+async def returning_update(session: AsyncSession, post_id: int) -> Post:
+    db_post = await session.scalar(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(content=f"Изменено {post_id}")
+        .returning(Post)
+    )
+    await session.commit()
+    return db_post
+
+
+async def legacy_delete(session: AsyncSession, post_id: int) -> None:
+    db_post = await session.get(Post, post_id)
+    await session.delete(db_post)
+    await session.commit()
+
+
+async def returning_delete(session: AsyncSession, post_id: int) -> None:
+    await session.scalar(
+        delete(Post).where(Post.id == post_id).returning(Post.id)
+    )
+    await session.commit()
+
+
+async def run(operations: int, workdir: Path) -> None:
+    from app.db.session import build_async_engine
+
+    path = workdir / "mutations.db"
+    seed_database(path, users=USERS, posts=operations * 4)
+    engine = build_async_engine(f"sqlite+aiosqlite:///{path}", writer=True)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: (
+            statement.startswith("BEGIN") or statements.append(statement)
+        ),
+    )
+    cases = (
+        ("update", "get + refresh", legacy_update),
+        ("update", "RETURNING", returning_update),
+        ("delete", "get + delete", legacy_delete),
+        ("delete", "RETURNING", returning_delete),
+    )
+    post_ids = iter(range(1, operations * 4 + 1))
+    for name, method, operation in cases:
+        ids = [next(post_ids) for _ in range(operations)]
+        samples = []
+        statements.clear()
+        for post_id in ids:
+            started = time.perf_counter()
+            async with maker() as session:
+                await operation(session, post_id)
+            samples.append(time.perf_counter() - started)
+        stats = summarize(samples)
+        print(
+            f"{name} {method:>16}: "
+            f"{len(statements) / operations:.1f} statements, "
+            f"p50 {stats['p50']:.3f} ms, p95 {stats['p95']:.3f} ms"
+        )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operations", type=int, default=2000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["DATABASE_URL"] = (
+            f"sqlite+aiosqlite:///{Path(workdir) / 'app.db'}"
+        )
+        asyncio.run(run(args.operations, Path(workdir)))
+
+
+if __name__ == "__main__":
+    main()
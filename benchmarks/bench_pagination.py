@@ -0,0 +1,72 @@
+"""Бенчмарк задержки страницы GET /users/: offset против курсора.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_pagination --sizes 10000,100000,1000000
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import Response
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.endpoints.user import get_users
+from app.api.pagination import encode_cursor
+from benchmarks.common import seed_database, summarize
+
+DEPTHS = (0.1, 0.5, 0.9)
+
+
+async def measure_page(session_maker, repeats: int, **params) -> float:
+    """Медианная задержка получения одной страницы, мс."""
+    samples = []
+    async with session_maker() as session:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            await get_users(session=session, response=Response(), **params)
+            samples.append(time.perf_counter() - started)
+            session.expunge_all()
+    return summarize(samples)["p50"]
+
+
+async def run_size(path: Path, size: int, limit: int, repeats: int) -> None:
+    """Замеры для таблицы заданного размера."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    for depth in DEPTHS:
+        position = int(size * depth)
+        offset_ms = await measure_page(
+            session_maker, repeats, offset=position, limit=limit, cursor=None
+        )
+        cursor_ms = await measure_page(
+            session_maker,
+            repeats,
+            offset=0,
+            limit=limit,
+            cursor=encode_cursor(id=position),
+        )
+        print(
+            f"{size:>10} {depth:>6.0%} {offset_ms:>12.2f} {cursor_ms:>12.2f}"
+        )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    print(f"{'rows':>10} {'depth':>6} {'offset, ms':>12} {'cursor, ms':>12}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in map(int, args.sizes.split(",")):
+            path = Path(workdir) / f"users_{size}.db"
+            seed_database(path, users=size)
+            asyncio.run(run_size(path, size, args.limit, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
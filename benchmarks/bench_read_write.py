@@ -0,0 +1,120 @@
+"""Бенчмарк параллельных долгих чтений и записей в SQLite.
+
+Сравнивает общий движок для всех запросов с разделением на пул только
+для чтения и единственное соединение-писатель.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_read_write --readers 8 --writers 8
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import func, select
+
+from app.db.models import Post, User
+from app.db.session import build_async_engine, read_only_url
+from benchmarks.common import seed_database, summarize
+
+USERS = 10_000
+POSTS = 200_000
+
+
+def shared_setup(url: str):
+    """Один движок с общим пулом для чтения и записи."""
+    engine = build_async_engine(url)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    return [engine], maker, maker
+
+
+def split_setup(url: str):
+    """Пул только для чтения и единственное соединение-писатель."""
+    writer = build_async_engine(url, writer=True)
+    reader = build_async_engine(read_only_url(url))
+    return (
+        [writer, reader],
+        async_sessionmaker(reader, expire_on_commit=False),
+        async_sessionmaker(writer, expire_on_commit=False),
+    )
+
+
+async def long_read(read_session, rng: random.Random) -> None:
+    """Долгое чтение: агрегат по постам диапазона авторов."""
+    start = rng.randint(1, USERS - 1000)
+    async with read_session() as session:
+        await session.execute(
+            select(Post.user_id, func.count(Post.id))
+            .where(Post.user_id.between(start, start + 1000))
+            .group_by(Post.user_id)
+        )
+
+
+async def read_modify_write(write_session, rng: random.Random) -> None:
+    """Запись в стиле эндпоинтов: чтение строки, изменение и commit."""
+    async with write_session() as session:
+        user = await session.get(User, rng.randint(1, USERS))
+        user.address = f"ул. Новая, д.{rng.randint(1, 100)}"
+        await session.commit()
+
+
+async def run_setup(setup, url: str, args) -> None:
+    engines, read_session, write_session = setup(url)
+    read_samples = []
+    writes = errors = 0
+
+    async def reader(seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(args.ops):
+            started = time.perf_counter()
+            await long_read(read_session, rng)
+            read_samples.append(time.perf_counter() - started)
+
+    async def writer(seed: int) -> None:
+        nonlocal writes, errors
+        rng = random.Random(seed)
+        for _ in range(args.ops):
+            try:
+                await read_modify_write(write_session, rng)
+                writes += 1
+            except OperationalError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(reader(seed) for seed in range(args.readers)),
+        *(writer(-seed - 1) for seed in range(args.writers)),
+    )
+    elapsed = time.perf_counter() - started
+    for engine in engines:
+        await engine.dispose()
+    reads = ""
+    if read_samples:
+        stats = summarize(read_samples)
+        reads = f"read p50={stats['p50']:.1f} ms p99={stats['p99']:.1f} ms, "
+    print(
+        f"{setup.__name__:>12}: {reads}writes {writes / elapsed:.0f}/s, "
+        f"locked errors: {errors}, total {elapsed:.2f} s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=50)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        for setup in (shared_setup, split_setup):
+            path = Path(workdir) / f"{setup.__name__}.db"
+            seed_database(path, users=USERS, posts=POSTS)
+            asyncio.run(run_setup(setup, f"sqlite+aiosqlite:///{path}", args))
+
+
+if __name__ == "__main__":
+    main()
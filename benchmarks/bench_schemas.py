@@ -0,0 +1,208 @@
+"""Микробенчмарк проверки и сериализации схем пользователей и постов.
+
+Замеряются отдельные шаги обработки запроса без БД и HTTP:
+проверка входных данных UserCreate (с EmailStr и без почты, чтобы была
+видна цена проверки адреса) и PostCreate, User.model_validate из
+UserCreate с ключами поиска, как в POST /users/, преобразование
+ORM-объектов в UserRead и PostRead и кодирование ответа в JSON схемой
+pydantic и через render_json. Сравнение путей списков вместе с чтением
+из БД — в bench_list_json.
+
+Каждый случай выполняется на пачках разного размера. Для пачки
+берётся лучшее из --rounds замеров, каждый не короче --min-time секунд.
+Результат — JSON Lines в stdout, по строке на случай и размер пачки,
+чтобы сравнивать стоимость схем до и после изменений, например:
+    python -m benchmarks.bench_schemas > before.jsonl
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_schemas --batches 1,10,100,1000
+"""
+
+import argparse
+import json
+import platform
+import time
+from typing import Any, Callable
+
+import pydantic
+from pydantic import TypeAdapter
+
+from app.api.serialization import render_json
+from app.db.models import Post, User
+from app.db.search import user_search_keys
+from app.schemas.post import PostCreate, PostRead
+from app.schemas.user import UserCreate, UserRead
+
+
+def user_payload(i: int) -> dict[str, Any]:
+    return {
+        "first_name": f"Имя{i}",
+        "second_name": f"Фамилия{i}",
+        "patronymic": f"Отчество{i}",
+        "email": f"user{i}@example.ru",
+        "address": f"ул. Тестовая, д.{i}",
+    }
+
+
+def post_payload(i: int) -> dict[str, Any]:
+    return {
+        "user_id": i,
+        "title": f"Пост {i}",
+        "content": f"Содержание поста {i} " * 8,
+    }
+
+
+def orm_users(batch: int) -> list[User]:
+    return [
+        User(id=i, **user_payload(i), version=1)
+        for i in range(1, batch + 1)
+    ]
+
+
+def orm_posts(batch: int) -> list[Post]:
+    return [
+        Post(id=i, **post_payload(i), version=1)
+        for i in range(1, batch + 1)
+    ]
+
+
+def user_create_validate(batch: int) -> Callable[[], Any]:
+    payloads = [user_payload(i) for i in range(batch)]
+    return lambda: [UserCreate.model_validate(item) for item in payloads]
+
+
+def user_create_validate_without_email(batch: int) -> Callable[[], Any]:
+    payloads = [
+        {**user_payload(i), "email": None} for i in range(batch)
+    ]
+    return lambda: [UserCreate.model_validate(item) for item in payloads]
+
+
+def post_create_validate(batch: int) -> Callable[[], Any]:
+    payloads = [post_payload(i) for i in range(batch)]
+    return lambda: [PostCreate.model_validate(item) for item in payloads]
+
+
+def user_model_validate(batch: int) -> Callable[[], Any]:
+    users = [UserCreate.model_validate(user_payload(i)) for i in range(batch)]
+    return lambda: [
+        User.model_validate(user, update=user_search_keys(user.model_dump()))
+        for user in users
+    ]
+
+
+def user_read_from_orm(batch: int) -> Callable[[], Any]:
+    users = orm_users(batch)
+    return lambda: [UserRead.model_validate(user) for user in users]
+
+
+def post_read_from_orm(batch: int) -> Callable[[], Any]:
+    posts = orm_posts(batch)
+    return lambda: [PostRead.model_validate(post) for post in posts]
+
+
+def user_read_dump_json(batch: int) -> Callable[[], Any]:
+    adapter = TypeAdapter(list[UserRead])
+    users = [UserRead.model_validate(user) for user in orm_users(batch)]
+    return lambda: adapter.dump_json(users)
+
+
+def post_read_dump_json(batch: int) -> Callable[[], Any]:
+    adapter = TypeAdapter(list[PostRead])
+    posts = [PostRead.model_validate(post) for post in orm_posts(batch)]
+    return lambda: adapter.dump_json(posts)
+
+
+def user_render_json(batch: int) -> Callable[[], Any]:
+    rows = [
+        UserRead.model_validate(user).model_dump()
+        for user in orm_users(batch)
+    ]
+    return lambda: render_json(rows)
+
+
+def post_render_json(batch: int) -> Callable[[], Any]:
+    rows = [
+        PostRead.model_validate(post).model_dump()
+        for post in orm_posts(batch)
+    ]
+    return lambda: render_json(rows)
+
+
+CASES = {
+    case.__name__: case
+    for case in (
+        user_create_validate,
+        user_create_validate_without_email,
+        post_create_validate,
+        user_model_validate,
+        user_read_from_orm,
+        post_read_from_orm,
+        user_read_dump_json,
+        post_read_dump_json,
+        user_render_json,
+        post_render_json,
+    )
+}
+
+
+def measure(run: Callable[[], Any], rounds: int, min_time: float) -> float:
+    """Лучшее время одного вызова run из rounds замеров."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            run()
+        best = min(best, (time.perf_counter() - started) / loops)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batches", default="1,10,100,1000")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument(
+        "--cases",
+        default=",".join(CASES),
+        help="Случаи через запятую, по умолчанию все",
+    )
+    args = parser.parse_args()
+    batches = [int(size) for size in args.batches.split(",")]
+    names = [name.strip() for name in args.cases.split(",")]
+    unknown = set(names) - CASES.keys()
+    if unknown:
+        parser.error(f"неизвестные случаи: {', '.join(sorted(unknown))}")
+    environment = {
+        "python": platform.python_version(),
+        "pydantic": pydantic.VERSION,
+    }
+    for name in names:
+        for batch in batches:
+            seconds = measure(CASES[name](batch), args.rounds, args.min_time)
+            print(
+                json.dumps(
+                    {
+                        "case": name,
+                        "batch": batch,
+                        "seconds": seconds,
+                        "us_per_item": seconds / batch * 1e6,
+                        "items_per_second": batch / seconds,
+                        **environment,
+                    }
+                ),
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
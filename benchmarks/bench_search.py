@@ -0,0 +1,96 @@
+"""Бенчмарк полнотекстового поиска постов против LIKE-скана.
+
+Поиск идёт через эндпоинт GET /posts/search/ (индекс FTS5), LIKE-скан
+для сравнения выполняется прямо в SQLite: такого эндпоинта нет.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_search --posts 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import seed_database, summarize
+
+USERS = 10_000
+# Редкое слово (номер поста) и слово, которое есть в каждом посте.
+QUERIES = ("{rare}", "Пост {rare}", "содержание")
+LIKE_SQL = (
+    "SELECT id, user_id, title FROM post "
+    "WHERE title LIKE ? OR content LIKE ? ORDER BY id LIMIT 20"
+)
+
+
+def like_scan(path: Path, query: str, requests: int) -> list[float]:
+    connection = sqlite3.connect(path)
+    pattern = f"%{query}%"
+    samples = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            connection.execute(LIKE_SQL, (pattern, pattern)).fetchall()
+            samples.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+    return samples
+
+
+async def fts_search(query: str, requests: int) -> tuple[list[float], int]:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    samples = []
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get(
+                "/posts/search/", params={"q": query, "limit": 20}
+            )
+            samples.append(time.perf_counter() - started)
+    return samples, len(response.json())
+
+
+def report(label: str, samples: list[float]) -> None:
+    stats = summarize(samples)
+    print(
+        f"{label:>28}: p50 {stats['p50']:>9.2f} ms, "
+        f"p95 {stats['p95']:>9.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    rare = str(args.posts // 2 + 7)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "bench_search.db"
+        started = time.perf_counter()
+        seed_database(path, users=USERS, posts=args.posts)
+        print(
+            f"Наполнение {args.posts} постов с индексом: "
+            f"{time.perf_counter() - started:.1f} с"
+        )
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+        for template in QUERIES:
+            query = template.format(rare=rare)
+            samples, found = asyncio.run(fts_search(query, args.requests))
+            report(f"FTS5 '{query}' ({found})", samples)
+            report(
+                f"LIKE '{query}'",
+                like_scan(path, query, max(1, args.requests // 4)),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Бенчмарк задержки GET /users/{id}/ во время загрузки больших фото.
+
+Запуск из папки с проектом:
+    python -m benchmarks.bench_upload --uploads 20
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from PIL import Image
+
+from benchmarks.common import seed_database, summarize
+
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+def make_large_jpeg(side: int) -> bytes:
+    """Создаёт плохо сжимаемое JPEG-изображение заданного размера."""
+    image = Image.effect_noise((side, side), 64).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+async def read_user(client: httpx.AsyncClient, samples: list[float]) -> None:
+    """Один запрос профиля с замером задержки."""
+    started = time.perf_counter()
+    response = await client.get("/users/1/")
+    samples.append(time.perf_counter() - started)
+    response.raise_for_status()
+
+
+async def run(uploads: int, photo: bytes, idle_requests: int) -> None:
+    """Замеры профиля без нагрузки и на фоне параллельных загрузок.
+
+    Тело multipart-запроса кодируется один раз заранее, чтобы клиент,
+    работающий в том же цикле событий, не искажал замеры сервера, и
+    отправляется частями, как его передаёт ASGI-сервер.
+    """
+    from app.core.storage import remove_photo_files
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        idle = []
+        for _ in range(idle_requests):
+            await read_user(client, idle)
+
+        # Хвост после маркера конца JPEG делает файлы разными для
+        # хранилища по хешу, не меняя декодируемое изображение.
+        photos = {
+            user_id: photo + user_id.to_bytes(4, "big")
+            for user_id in range(2, uploads + 2)
+        }
+        bodies = {}
+        for user_id, user_photo in photos.items():
+            encoded = httpx.Request(
+                "POST",
+                "http://bench/",
+                files={"file": ("photo.jpg", user_photo, "image/jpeg")},
+            )
+            bodies[user_id] = (encoded.read(), encoded.headers)
+
+        async def body_chunks(body: bytes):
+            for start in range(0, len(body), BODY_CHUNK_SIZE):
+                yield body[start:start + BODY_CHUNK_SIZE]
+
+        async def upload(user_id: int) -> None:
+            body, headers = bodies[user_id]
+            response = await client.post(
+                f"/users_photo/{user_id}/",
+                content=body_chunks(body),
+                headers={"Content-Type": headers["Content-Type"]},
+            )
+            response.raise_for_status()
+
+        busy = []
+        started = time.perf_counter()
+        upload_tasks = [
+            asyncio.create_task(upload(user_id))
+            for user_id in range(2, uploads + 2)
+        ]
+        while not all(task.done() for task in upload_tasks):
+            await read_user(client, busy)
+            await asyncio.sleep(0)
+        await asyncio.gather(*upload_tasks)
+        elapsed = time.perf_counter() - started
+    for user_photo in photos.values():
+        await remove_photo_files(hashlib.sha256(user_photo).hexdigest())
+    print(f"photo size: {len(photo) / 1024 / 1024:.1f} MiB")
+    print(f"{uploads} uploads finished in {elapsed:.2f} s")
+    for name, samples in (("idle", idle), ("during uploads", busy)):
+        stats = summarize(samples)
+        print(
+            f"GET /users/1/ {name:>15}: n={len(samples):<5} "
+            f"p50={stats['p50']:.2f} ms p99={stats['p99']:.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--image-side", type=int, default=2500)
+    parser.add_argument("--idle-requests", type=int, default=500)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "bench_upload.db"
+        seed_database(path, users=args.uploads + 1)
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+        photo = make_large_jpeg(args.image_side)
+        asyncio.run(run(args.uploads, photo, args.idle_requests))
+
+
+if __name__ == "__main__":
+    main()
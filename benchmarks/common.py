@@ -0,0 +1,96 @@
+"""Общие утилиты для бенчмарков: наполнение БД и статистика замеров."""
+
+import sqlite3
+import statistics
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.db.init_db import upgrade_database
+from app.db.search import user_search_keys
+
+SEED_BATCH_SIZE = 50_000
+
+
+def create_schema(path: Path) -> None:
+    """Создаёт таблицы приложения в файловой БД SQLite миграциями."""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        upgrade_database(connection)
+    engine.dispose()
+
+
+def _insert_batches(path: Path, sql: str, rows) -> None:
+    """Вставляет строки пачками в одной транзакции."""
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == SEED_BATCH_SIZE:
+                    connection.executemany(sql, batch)
+                    batch.clear()
+            if batch:
+                connection.executemany(sql, batch)
+    finally:
+        connection.close()
+
+
+def _user_row(i: int) -> tuple:
+    user = {
+        "first_name": f"Имя{i}",
+        "second_name": f"Фамилия{i}",
+        "patronymic": f"Отчество{i}",
+        "email": f"user{i}@example.ru",
+        "address": f"ул. Тестовая, д.{i}",
+    }
+    return (*user.values(), *user_search_keys(user).values())
+
+
+def seed_users(path: Path, count: int) -> None:
+    """Наполняет таблицу user детерминированными пользователями."""
+    _insert_batches(
+        path,
+        "INSERT INTO user (first_name, second_name, patronymic, email, "
+        "address, second_name_key, first_name_key, patronymic_key, "
+        "email_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (_user_row(i) for i in range(1, count + 1)),
+    )
+
+
+def seed_posts(path: Path, count: int, users: int) -> None:
+    """Наполняет таблицу post постами, равномерно раскиданными по авторам."""
+    _insert_batches(
+        path,
+        "INSERT INTO post (title, content, user_id) VALUES (?, ?, ?)",
+        (
+            (f"Пост {i}", f"Содержание поста {i} " * 8, i % users + 1)
+            for i in range(1, count + 1)
+        ),
+    )
+
+
+def seed_database(path: Path, users: int, posts: int = 0) -> None:
+    """Создаёт схему и наполняет БД заданным числом записей."""
+    create_schema(path)
+    seed_users(path, users)
+    if posts:
+        seed_posts(path, posts, users)
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Возвращает перцентиль выборки (fraction от 0 до 1)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Сводка по замерам в миллисекундах."""
+    return {
+        "mean": statistics.fmean(samples) * 1000,
+        "p50": percentile(samples, 0.50) * 1000,
+        "p95": percentile(samples, 0.95) * 1000,
+        "p99": percentile(samples, 0.99) * 1000,
+    }
@@ -2,14 +2,17 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy.ext.asyncio import (
-    AsyncSession, async_sessionmaker, create_async_engine
-)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlmodel import SQLModel
 
+from app.core.cache import entity_cache
 from app.core.config import settings
 from app.db.models import User, Post
-from app.db.session import get_async_session
+from app.db.session import (
+    build_async_engine,
+    get_async_session,
+    get_read_session_maker,
+)
 from app.main import app
 
 
@@ -23,10 +26,7 @@ def client():
 @pytest.fixture
 async def session():
     """Фикстура для тестового движка и инициализации сессии для тестовой БД."""
-    test_engine = create_async_engine(
-        settings.TEST_DATABASE_URL,
-        echo=True
-    )
+    test_engine = build_async_engine(settings.TEST_DATABASE_URL, echo=True)
     async with test_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
     async_session = async_sessionmaker(
@@ -39,10 +39,20 @@ async def session():
     await test_engine.dispose()
 
 
+@pytest.fixture(autouse=True)
+def strict_query_budget(monkeypatch: pytest.MonkeyPatch):
+    """Превышение бюджета SQL-запросов маршрута — ошибка теста."""
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", True)
+
+
 @pytest.fixture(autouse=True)
 async def override_get_session(session: AsyncSession):
     """Переопределение зависимостей для тестов."""
     app.dependency_overrides[get_async_session] = lambda: session
+    app.dependency_overrides[get_read_session_maker] = (
+        lambda: async_sessionmaker(session.bind, expire_on_commit=False)
+    )
+    entity_cache.clear()
     yield
     app.dependency_overrides.clear()
 
@@ -0,0 +1,91 @@
+"""Модуль для тестирования кеша сущностей и его сброса в воркерах."""
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import SQLModel
+
+from app.core.cache import EntityCache, post_key, user_key
+from app.core.config import settings
+from app.db.cache_sync import CacheInvalidationSync, record_invalidation
+from app.db.session import build_async_engine
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entity_cache_lru_ttl_and_counters():
+    """Тест вытеснения LRU, истечения по TTL и счётчиков кеша."""
+    clock = FakeClock()
+    cache = EntityCache(max_size=2, ttl=10, clock=clock)
+    cache.put(user_key(1), b"1", cache.generation)
+    cache.put(user_key(2), b"2", cache.generation)
+    assert cache.get(user_key(1)) == b"1"
+    cache.put(user_key(3), b"3", cache.generation)
+    assert cache.get(user_key(2)) is None
+    clock.now = 10
+    assert cache.get(user_key(1)) is None
+    assert cache.stats() == {
+        "size": 1,
+        "max_size": 2,
+        "hits": 1,
+        "misses": 2,
+        "evictions": 1,
+        "expirations": 1,
+        "invalidations": 0,
+    }
+
+
+def test_entity_cache_invalidation():
+    """Тест сброса записей, в том числе каскадного и во время чтения."""
+    cache = EntityCache(max_size=10, ttl=60)
+    generation = cache.generation
+    cache.put(user_key(1), b"user", generation)
+    cache.put(post_key(1), b"post", generation, parent=user_key(1))
+    cache.put(post_key(2), b"post", generation, parent=user_key(2))
+    cache.invalidate([user_key(1)])
+    assert cache.get(post_key(1)) == b"post"
+    cache.invalidate([user_key(1), user_key(2)], cascade=True)
+    assert len(cache) == 0
+    # Ответ, прочитанный из БД до сброса, не должен попасть в кеш.
+    assert not cache.put(user_key(1), b"stale", generation)
+    assert cache.get(user_key(1)) is None
+
+
+@pytest.mark.asyncio
+async def test_invalidation_sync_between_workers(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Тест сброса кеша одного воркера после записи в другом."""
+    monkeypatch.setattr(settings, "ENTITY_CACHE_SHARED", True)
+    engine = build_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    cache = EntityCache(max_size=10, ttl=60)
+    sync = CacheInvalidationSync(
+        cache, session_maker, session_maker, interval=60
+    )
+    async with session_maker() as session:
+        await record_invalidation(session, [user_key(1)])
+        await session.commit()
+    await sync.start()
+    cache.put(user_key(1), b"user", cache.generation)
+    cache.put(post_key(5), b"post", cache.generation, parent=user_key(2))
+    async with session_maker() as session:
+        await record_invalidation(session, [user_key(2)], cascade=True)
+        await session.commit()
+    assert await sync.poll() == 1
+    assert cache.get(user_key(1)) == b"user"
+    assert cache.get(post_key(5)) is None
+    assert await sync.poll() == 0
+    await sync.stop()
+    await engine.dispose()
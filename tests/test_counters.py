@@ -0,0 +1,63 @@
+"""Модуль для тестирования счётчиков пользователей и постов."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.counters import reconcile_counts
+
+
+def total(client: TestClient, url: str) -> int:
+    return int(client.get(url).headers["X-Total-Count"])
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_writes(
+        client: TestClient, session: AsyncSession
+):
+    """Тест счётчиков при создании, смене автора и каскадном удалении."""
+    assert total(client, "/users/") == 0
+    ivan = client.post("/users/", json={"first_name": "Иван"}).json()["id"]
+    petr = client.post("/users/", json={"first_name": "Пётр"}).json()["id"]
+    response = client.post("/posts/bulk/", json=[
+        {"user_id": ivan, "title": f"Пост {i}"} for i in range(3)
+    ])
+    post_ids = [item["id"] for item in response.json()["items"]]
+    client.post("/posts/", json={"user_id": petr, "title": "Пост Петра"})
+    assert total(client, "/users/") == 2
+    assert total(client, "/posts/") == 4
+    assert total(client, f"/posts/?user_id={ivan}") == 3
+    assert total(client, f"/users/{petr}/posts/") == 1
+
+    client.patch(
+        f"/posts/{post_ids[0]}/", json={"user_id": petr, "content": "Текст"}
+    )
+    client.delete(f"/posts/{post_ids[1]}/")
+    assert total(client, f"/users/{ivan}/posts/") == 1
+    assert total(client, f"/users/{petr}/posts/") == 2
+    assert total(client, "/posts/") == 3
+
+    session.expunge_all()
+    client.delete(f"/users/{petr}/")
+    assert total(client, "/users/") == 1
+    assert total(client, "/posts/") == 1
+    assert total(client, f"/posts/?user_id={petr}") == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_counts(client: TestClient, session: AsyncSession):
+    """Тест исправления расхождения счётчиков с таблицами."""
+    user_id = client.post(
+        "/users/", json={"first_name": "Иван"}
+    ).json()["id"]
+    client.post("/posts/", json={"user_id": user_id, "title": "Пост"})
+    connection = await session.connection()
+    await connection.exec_driver_sql(
+        "UPDATE row_count SET count = 10 WHERE name = 'post'"
+    )
+    await connection.exec_driver_sql("DELETE FROM user_post_count")
+    assert await connection.run_sync(reconcile_counts) == 2
+    assert await connection.run_sync(reconcile_counts) == 0
+    await session.commit()
+    assert total(client, "/posts/") == 1
+    assert total(client, f"/users/{user_id}/posts/") == 1
@@ -0,0 +1,86 @@
+"""Модуль для тестирования настройки движка и сессий БД."""
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.db.session import (
+    async_engine,
+    async_read_engine,
+    build_async_engine,
+    get_async_session,
+    read_only_url,
+)
+
+
+@pytest.mark.asyncio
+async def test_file_engine_pool_and_pragmas(tmp_path: Path):
+    """Тест настроек пула и PRAGMA для файловой БД."""
+    engine = build_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    )
+    async with engine.connect() as conn:
+        pragmas = {
+            name: (await conn.exec_driver_sql(f"PRAGMA {name}")).scalar()
+            for name in (
+                "journal_mode",
+                "synchronous",
+                "busy_timeout",
+                "cache_size",
+                "mmap_size",
+            )
+        }
+    assert pragmas == {
+        "journal_mode": "wal",
+        "synchronous": 1,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+    }
+    assert engine.pool.size() == settings.DB_POOL_SIZE
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_memory_engine():
+    """Тест создания движка для БД в памяти без настроек пула."""
+    engine = build_async_engine(settings.TEST_DATABASE_URL)
+    async with engine.connect() as conn:
+        assert (await conn.exec_driver_sql("SELECT 1")).scalar() == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_read_only_engine(tmp_path: Path):
+    """Тест движка только для чтения поверх файла, открытого писателем."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    writer = build_async_engine(url, writer=True)
+    reader = build_async_engine(read_only_url(url))
+    async with writer.begin() as conn:
+        await conn.exec_driver_sql("CREATE TABLE item (id INTEGER)")
+        await conn.exec_driver_sql("INSERT INTO item VALUES (1)")
+    async with reader.connect() as conn:
+        result = await conn.exec_driver_sql("SELECT count(*) FROM item")
+        assert result.scalar() == 1
+        with pytest.raises(OperationalError, match="readonly"):
+            await conn.exec_driver_sql("INSERT INTO item VALUES (2)")
+    await reader.dispose()
+    await writer.dispose()
+
+
+@pytest.mark.parametrize("method,engine", [
+    ("GET", async_read_engine),
+    ("POST", async_engine),
+    ("PATCH", async_engine),
+])
+@pytest.mark.asyncio
+async def test_session_routing_by_method(method: str, engine):
+    """Тест выбора движка сессии по HTTP-методу запроса."""
+    request = Request({"type": "http", "method": method, "headers": []})
+    sessions = get_async_session(request)
+    session = await anext(sessions)
+    assert session.bind is engine
+    await sessions.aclose()
@@ -0,0 +1,70 @@
+"""Модуль для тестирования группового коммита записей."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import SQLModel, func, select
+
+from app.db.models import User
+from app.db.session import build_async_engine
+from app.db.writer import GroupCommitWriter
+
+
+def make_user(number: int) -> User:
+    return User(
+        first_name="Иван",
+        second_name="Иванов",
+        email=f"user{number}@example.ru",
+        address="ул. Пушкина, д.10",
+    )
+
+
+@pytest.mark.asyncio
+async def test_group_commit_batches_and_isolates_errors(tmp_path: Path):
+    """Тест фиксации пачки одним commit и отката только ошибочной записи."""
+    engine = build_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", writer=True
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    commits = []
+    event.listen(
+        engine.sync_engine, "commit", lambda conn: commits.append(conn)
+    )
+    writer = GroupCommitWriter(
+        async_sessionmaker(engine, expire_on_commit=False),
+        window=0.05,
+        max_batch=64,
+    )
+    writer.start()
+
+    def insert(number: int):
+        async def operation(session: AsyncSession) -> User:
+            user = make_user(number)
+            session.add(user)
+            await session.flush()
+            if number == 3:
+                raise ValueError("ошибка в операции")
+            return user
+
+        return operation
+
+    results = await asyncio.gather(
+        *(writer.submit(insert(number)) for number in range(8)),
+        return_exceptions=True,
+    )
+    await writer.stop()
+
+    assert isinstance(results.pop(3), ValueError)
+    assert all(isinstance(result, User) for result in results)
+    assert len(commits) == 1
+    async with AsyncSession(engine) as session:
+        emails = set(
+            (await session.execute(select(User.email))).scalars().all()
+        )
+        assert await session.scalar(select(func.count(User.id))) == 7
+    assert "user3@example.ru" not in emails
+    await engine.dispose()
@@ -0,0 +1,136 @@
+"""Модуль для тестирования офлайн-импорта пользователей и постов."""
+
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.db.import_data import build_import_engine, run_import
+from app.db.models import Post, User
+
+
+class InterruptAfterFirstBatch:
+    """Поток прогресса, прерывающий импорт после первой пачки."""
+
+    def write(self, text: str) -> None:
+        raise KeyboardInterrupt
+
+    def flush(self) -> None:
+        pass
+
+
+@pytest.fixture
+def engine(tmp_path: Path):
+    engine = build_import_engine(f"sqlite+aiosqlite:///{tmp_path / 'db'}")
+    yield engine
+    engine.dispose()
+
+
+def count(engine, model) -> int:
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(model))
+
+
+def test_import_users_and_posts(engine, tmp_path: Path):
+    """Тест импорта с проверкой email, автора и отчётом об отказах."""
+    users = tmp_path / "users.csv"
+    users.write_text(
+        "id,first_name,email\n"
+        "10,Иван,ivan@example.ru\n"
+        "11,Пётр,ivan@example.ru\n"
+        "12,Анна,не-почта\n"
+        "13,Олег,\n",
+        encoding="utf-8",
+    )
+    counts = run_import(engine, "users", users)
+    assert (counts["imported"], counts["rejected"]) == (2, 2)
+    rejected = [
+        json.loads(line)["record"]
+        for line in (tmp_path / "users.csv.rejected").read_text().splitlines()
+    ]
+    assert rejected == [2, 3]
+    posts = tmp_path / "posts.ndjson"
+    posts.write_text(
+        '{"user_id": 10, "title": "Пост"}\n'
+        '{"user_id": 11, "title": "Без автора"}\n'
+        "не json\n"
+        '{"user_id": 13, "title": "Ещё пост"}\n',
+        encoding="utf-8",
+    )
+    counts = run_import(engine, "posts", posts)
+    assert (counts["imported"], counts["rejected"]) == (2, 2)
+    assert count(engine, User) == 2
+    assert count(engine, Post) == 2
+
+
+def test_import_resumes_after_interruption(engine, tmp_path: Path):
+    """Тест продолжения импорта с последней сохранённой пачки."""
+    users = tmp_path / "users.ndjson"
+    users.write_text(
+        "".join(
+            json.dumps({"email": f"user{i}@example.ru"}) + "\n"
+            for i in range(5)
+        ),
+        encoding="utf-8",
+    )
+    with pytest.raises(KeyboardInterrupt):
+        run_import(
+            engine,
+            "users",
+            users,
+            batch_size=2,
+            progress=InterruptAfterFirstBatch(),
+        )
+    assert count(engine, User) == 2
+    counts = run_import(engine, "users", users, batch_size=2)
+    assert (counts["skipped"], counts["imported"]) == (2, 3)
+    assert count(engine, User) == 5
+    with engine.connect() as conn:
+        indexes = conn.exec_driver_sql("PRAGMA index_list('user')").all()
+    assert any(row[1] == "ix_user_photo_hash" for row in indexes)
+
+
+def index_names(engine, table: str) -> set[str]:
+    with engine.connect() as conn:
+        return {
+            row[1]
+            for row in conn.exec_driver_sql(f"PRAGMA index_list('{table}')")
+        }
+
+
+def test_import_failure_keeps_indexes(engine, tmp_path: Path):
+    """Тест уникального индекса email во время загрузки и восстановления
+    остальных индексов после ошибки импорта."""
+    users = tmp_path / "users.ndjson"
+    users.write_text(
+        "".join(
+            json.dumps({"email": f"user{i}@example.ru"}) + "\n"
+            for i in range(3)
+        ),
+        encoding="utf-8",
+    )
+    indexes_during_load = []
+
+    class FailingProgress:
+        def write(self, text: str) -> None:
+            indexes_during_load.append(index_names(engine, "user"))
+            raise RuntimeError("диск заполнен")
+
+        def flush(self) -> None:
+            pass
+
+    with pytest.raises(RuntimeError):
+        run_import(
+            engine, "users", users, batch_size=2, progress=FailingProgress()
+        )
+    assert "ix_user_email" in indexes_during_load[0]
+    assert "ix_user_photo_hash" not in indexes_during_load[0]
+    assert {"ix_user_email", "ix_user_photo_hash"} <= index_names(
+        engine, "user"
+    )
+    with engine.begin() as conn, pytest.raises(IntegrityError):
+        conn.execute(
+            insert(User.__table__).values(email="user0@example.ru")
+        )
@@ -0,0 +1,73 @@
+"""Модуль для тестирования метрик в формате Prometheus."""
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.core.metrics import (
+    Counter, Histogram, MetricsRegistry, http_request_duration
+)
+from app.db.models import User
+
+
+def test_registry_render():
+    """Тест вывода счётчика и накопленных корзин гистограммы."""
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("bytes_total", "Байты"))
+    histogram = registry.register(
+        Histogram("latency_seconds", "Время", ("path",), buckets=(0.1, 1))
+    )
+    counter.inc(amount=1.5)
+    histogram.observe(0.05, '/a"b')
+    histogram.observe(0.1, '/a"b')
+    histogram.observe(3, '/a"b')
+    assert registry.render().splitlines() == [
+        "# HELP bytes_total Байты",
+        "# TYPE bytes_total counter",
+        "bytes_total 1.5",
+        "# HELP latency_seconds Время",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{path="/a\\"b",le="0.1"} 2',
+        'latency_seconds_bucket{path="/a\\"b",le="1"} 2',
+        'latency_seconds_bucket{path="/a\\"b",le="+Inf"} 3',
+        'latency_seconds_sum{path="/a\\"b"} 3.15',
+        'latency_seconds_count{path="/a\\"b"} 3',
+    ]
+    with pytest.raises(ValueError):
+        registry.register(Counter("bytes_total", "Байты"))
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: TestClient, test_user: User):
+    """Тест метрик запросов по шаблону маршрута и метрик БД."""
+    route = "/users/{user_id}/"
+    before = http_request_duration.count("GET", route, "200")
+    client.get(f"/users/{test_user.id}/")
+    client.get("/users/0/")
+    client.get("/no-such-page/")
+    assert http_request_duration.count("GET", route, "200") == before + 1
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith(
+        "text/plain; version=0.0.4"
+    )
+    lines = response.text.splitlines()
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+    assert any(
+        line.startswith(
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/users/{user_id}/",status="404"}'
+        )
+        for line in lines
+    )
+    assert any('route="<unmatched>",status="404"' in line for line in lines)
+    assert 'http_requests_in_flight{method="GET"} 1' in lines
+    assert any(
+        line.startswith(
+            'db_statement_duration_seconds_count{engine="shared",'
+            'operation="SELECT"}'
+        )
+        for line in lines
+    )
+    assert "# TYPE db_pool_checkout_wait_seconds histogram" in lines
+    assert "# TYPE photo_upload_bytes_total counter" in lines
@@ -0,0 +1,185 @@
+"""Модуль для тестирования цепочки миграций Alembic."""
+
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+from sqlmodel import SQLModel
+
+from app.core.config import settings
+from app.db.init_db import upgrade_db
+from app.db.search import SEARCH_TABLES
+from app.db.session import build_async_engine, read_only_url
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+ALEMBIC_DIR = PROJECT_DIR / "alembic"
+# Схема таблиц, которые создавала через create_all первая версия
+# приложения, без alembic_version.
+BASELINE_SCHEMA = (
+    "CREATE TABLE user (id INTEGER PRIMARY KEY, first_name VARCHAR, "
+    "second_name VARCHAR, patronymic VARCHAR, email VARCHAR, "
+    "address VARCHAR, photo_url VARCHAR)",
+    "CREATE TABLE post (id INTEGER PRIMARY KEY, title VARCHAR, "
+    "content VARCHAR, user_id INTEGER REFERENCES user (id))",
+)
+BOOT_APP = """
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+with TestClient(app) as client:
+    response = client.get("/users/")
+    assert response.status_code == 200, response.text
+    print(len(response.json()))
+"""
+
+
+def alembic_config(url: str) -> Config:
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and name in SEARCH_TABLES)
+
+
+def test_migrations_match_models(tmp_path: Path):
+    """Тест соответствия схемы после миграций моделям и отката миграций."""
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    config = alembic_config(url)
+    command.upgrade(config, "head")
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        context = MigrationContext.configure(
+            conn,
+            opts={
+                "render_as_batch": True,
+                "include_object": include_object,
+            },
+        )
+        assert compare_metadata(context, SQLModel.metadata) == []
+        indexes = {
+            index["name"]: index["unique"]
+            for index in inspect(conn).get_indexes("user")
+        }
+    assert indexes["ix_user_email"]
+    with engine.connect() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO user (first_name) VALUES ('Иван')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO post (title, content, user_id) "
+            "VALUES ('Погода', 'Сегодня солнечно', 1)"
+        )
+        assert conn.exec_driver_sql(
+            "SELECT rowid FROM post_fts WHERE post_fts MATCH 'солнечно'"
+        ).scalar() == 1
+        assert conn.exec_driver_sql(
+            "SELECT count FROM row_count WHERE name = 'post'"
+        ).scalar() == 1
+        conn.rollback()
+    command.downgrade(config, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    engine.dispose()
+
+
+def test_migrations_keep_tables_created_by_app(tmp_path: Path):
+    """Тест обновления БД, таблицы которой созданы через create_all."""
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(BASELINE_SCHEMA[0])
+        conn.exec_driver_sql(
+            "INSERT INTO user (first_name, email) "
+            "VALUES ('Иван', 'ivan@example.ru')"
+        )
+    command.upgrade(alembic_config(url), "head")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql(
+            "SELECT email FROM user"
+        ).scalar() == "ivan@example.ru"
+        assert conn.exec_driver_sql(
+            "SELECT first_name_key FROM user"
+        ).scalar() == "иван"
+    engine.dispose()
+
+
+@pytest.mark.parametrize("baseline", [True, False], ids=["baseline", "empty"])
+def test_app_startup_migrates_database(tmp_path: Path, baseline: bool):
+    """Тест запуска приложения на старой и пустой БД и миграций после."""
+    path = tmp_path / "test.db"
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    if baseline:
+        with engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.exec_driver_sql(statement)
+            conn.exec_driver_sql(
+                "INSERT INTO user (first_name, email) "
+                "VALUES ('Иван', 'ivan@example.ru')"
+            )
+    output = subprocess.run(
+        [sys.executable, "-c", BOOT_APP],
+        cwd=PROJECT_DIR,
+        env={**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{path}"},
+        capture_output=True,
+        text=True,
+    )
+    assert output.returncode == 0, output.stderr
+    assert output.stdout.split()[-1] == ("1" if baseline else "0")
+    config = alembic_config(url)
+    head = ScriptDirectory.from_config(config).get_current_head()
+    with engine.connect() as conn:
+        assert MigrationContext.configure(conn).get_current_revision() == head
+    command.upgrade(config, "head")
+    command.downgrade(config, "base")
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("current", [True, False], ids=["head", "behind"])
+async def test_startup_migrations_wait_for_write_lock(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, current: bool
+):
+    """Тест запуска воркера, пока другой держит блокировку записи.
+
+    На последней ревизии блокировка не нужна; иначе воркер ждёт её
+    дольше busy_timeout и применяет миграции.
+    """
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT", 100)
+    path = tmp_path / "test.db"
+    url = f"sqlite:///{path}"
+    config = alembic_config(url)
+    command.upgrade(config, "head")
+    if not current:
+        command.downgrade(config, "-1")
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    asyncio.get_running_loop().call_later(1.0, holder.commit)
+    async_url = f"sqlite+aiosqlite:///{path}"
+    engine = build_async_engine(async_url, writer=True)
+    read_engine = build_async_engine(read_only_url(async_url))
+    try:
+        await upgrade_db(engine, read_engine, lock_timeout=30)
+    finally:
+        await engine.dispose()
+        await read_engine.dispose()
+    assert holder.in_transaction == current
+    holder.close()
+    head = ScriptDirectory.from_config(config).get_current_head()
+    sync_engine = create_engine(url)
+    with sync_engine.connect() as conn:
+        assert MigrationContext.configure(conn).get_current_revision() == head
+    sync_engine.dispose()
@@ -1,11 +1,18 @@
 """Модуль для тестирования API-эндпоинтов для Post."""
 
+import json
+
 import pytest
 from fastapi import status
+from fastapi.responses import JSONResponse
 from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 
 from app.db.models import Post, User
+from app.schemas.post import PostRead
 
 
 @pytest.mark.asyncio
@@ -15,6 +22,63 @@ async def test_get_posts(client):
     assert response.status_code == status.HTTP_200_OK
 
 
+@pytest.mark.asyncio
+async def test_get_posts_cursor_pagination_by_author(
+        client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест обхода постов одного автора по курсору."""
+    other_user = User(first_name="Пётр")
+    session.add(other_user)
+    await session.commit()
+    for i in range(3):
+        session.add(Post(user_id=test_user.id, title=f"Пост {i}"))
+        session.add(Post(user_id=other_user.id, title=f"Чужой пост {i}"))
+    await session.commit()
+    params = {"user_id": test_user.id, "limit": 2}
+    response = client.get("/posts/", params=params)
+    assert response.status_code == status.HTTP_200_OK
+    posts = response.json()
+    response = client.get(
+        "/posts/",
+        params={**params, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    posts += response.json()
+    assert "X-Next-Cursor" not in response.headers
+    assert [post["title"] for post in posts] == ["Пост 0", "Пост 1", "Пост 2"]
+    response = client.get(
+        "/posts/", params={"limit": 2, "user_id": other_user.id}
+    )
+    response = client.get(
+        "/posts/",
+        params={**params, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get("/posts/", params={**params, "limit": -1})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_export_posts(
+        client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест потоковой выгрузки постов одного автора."""
+    other_user = User(first_name="Пётр")
+    session.add(other_user)
+    await session.commit()
+    for i in range(3):
+        session.add(Post(user_id=test_user.id, title=f"Пост {i}"))
+        session.add(Post(user_id=other_user.id, title=f"Чужой пост {i}"))
+    await session.commit()
+    response = client.get("/posts/export/", params={"user_id": test_user.id})
+    assert response.status_code == status.HTTP_200_OK
+    assert 'filename="posts.ndjson"' in response.headers[
+        "content-disposition"
+    ]
+    posts = [json.loads(line) for line in response.text.splitlines()]
+    assert [post["title"] for post in posts] == ["Пост 0", "Пост 1", "Пост 2"]
+    assert set(posts[0]) == {"id", "user_id", "title", "content"}
+
+
 @pytest.mark.asyncio
 async def test_create_post(
         client: TestClient, session: AsyncSession, test_user: User
@@ -148,6 +212,42 @@ async def test_partial_update_post(
     assert test_user_post.content == updated_post_data["content"]
 
 
+@pytest.mark.asyncio
+async def test_posts_bulk(
+        client: TestClient,
+        session: AsyncSession,
+        test_user: User,
+        test_user_post: Post,
+):
+    """Тест массового создания и частичного обновления постов."""
+    response = client.post("/posts/bulk/", json=[
+        {"user_id": test_user.id, "title": "Пост 1"},
+        {"user_id": 999, "title": "Пост без автора"},
+        {"user_id": test_user.id, "title": "Пост 2"},
+    ])
+    assert response.status_code == status.HTTP_200_OK
+    items = response.json()["items"]
+    assert [item["status"] for item in items] == [
+        status.HTTP_201_CREATED,
+        status.HTTP_404_NOT_FOUND,
+        status.HTTP_201_CREATED,
+    ]
+    new_post_id = items[2]["id"]
+    response = client.patch("/posts/bulk/", json=[
+        {"id": test_user_post.id, "user_id": test_user.id, "content": "А"},
+        {"id": 999, "user_id": test_user.id, "content": "Б"},
+        {"id": new_post_id, "user_id": test_user.id, "content": "В"},
+    ])
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (2, 1)
+    assert result["items"][1]["status"] == status.HTTP_404_NOT_FOUND
+    await session.refresh(test_user_post)
+    assert test_user_post.content == "А"
+    new_post = await session.get(Post, new_post_id)
+    assert (new_post.title, new_post.content) == ("Пост 2", "В")
+
+
 @pytest.mark.asyncio
 async def test_delete_post(
         client: TestClient, session: AsyncSession, test_user_post: Post
@@ -160,3 +260,217 @@ async def test_delete_post(
     assert deleted_user_post is None
     response_for_nonexistent = client.delete(f"/posts/{test_user_post.id}/")
     assert response_for_nonexistent.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_update_post_missing_author(
+        client: TestClient, test_user_post: Post
+):
+    """Тест смены автора поста на несуществующего пользователя."""
+    post_id = test_user_post.id
+    response = client.patch(
+        f"/posts/{post_id}/", json={"user_id": 999, "content": "Текст"}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Пользователь не найден"
+    response = client.patch("/posts/bulk/", json=[
+        {"id": post_id, "user_id": 999, "content": "Текст"},
+    ])
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["items"][0]["status"] == (
+        status.HTTP_404_NOT_FOUND
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_post_cache_invalidation(
+        client: TestClient,
+        session: AsyncSession,
+        test_user: User,
+        test_user_post: Post,
+):
+    """Тест кеша ответа поста и его сброса при удалении автора."""
+    user_id, post_id = test_user.id, test_user_post.id
+    url = f"/posts/{post_id}/"
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["title"] == "Название поста"
+    assert client.get(url).headers["X-Cache"] == "HIT"
+    client.patch("/posts/bulk/", json=[
+        {"id": post_id, "user_id": user_id, "content": "Новый"},
+    ])
+    assert client.get(url).json()["content"] == "Новый"
+    assert client.get(url).headers["X-Cache"] == "HIT"
+    client.delete(f"/users/{user_id}/")
+    # Тестовая сессия общая для запросов: пост остался бы в её identity map.
+    session.expunge_all()
+    assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_get_posts_etag(
+        client: TestClient, test_user: User, test_user_post: Post
+):
+    """Тест ETag страницы постов и его смены при изменении поста."""
+    user_id, post_id = test_user.id, test_user_post.id
+    etag = client.get("/posts/").headers["ETag"]
+    response = client.get("/posts/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = client.get(
+        f"/posts/{post_id}/", headers={"If-None-Match": "*"}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    client.put(f"/posts/{post_id}/", json={
+        "user_id": user_id, "title": "Другой", "content": "Текст"
+    })
+    response = client.get("/posts/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["title"] == "Другой"
+    client.post("/posts/", json={"user_id": user_id, "title": "Новый"})
+    assert client.get("/posts/").headers["ETag"] != (
+        response.headers["ETag"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_post_mutations_single_statement(
+        client: TestClient,
+        session: AsyncSession,
+        test_user: User,
+        test_user_post: Post,
+):
+    """Тест изменения и удаления поста одним запросом к БД."""
+    user_id, post_id = test_user.id, test_user_post.id
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        if not statement.startswith("BEGIN"):
+            statements.append(statement)
+
+    event.listen(
+        session.bind.sync_engine, "before_cursor_execute", count_statement
+    )
+    url = f"/posts/{post_id}/"
+    response = client.put(
+        url, json={"user_id": user_id, "title": "Т", "content": "К"}
+    )
+    assert response.json()["title"] == "Т"
+    response = client.patch(url, json={"user_id": user_id, "content": "Н"})
+    assert response.json()["content"] == "Н"
+    assert client.delete(url).status_code == status.HTTP_204_NO_CONTENT
+    response = client.patch(url, json={"user_id": user_id, "content": "Н"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert len(statements) == 4
+    assert all("RETURNING" in statement for statement in statements)
+
+
+@pytest.mark.asyncio
+async def test_get_posts_fast_path_bytes(
+        client: TestClient,
+        session: AsyncSession,
+        test_user: User,
+        test_user_post: Post,
+):
+    """Тест совпадения тела списка постов с ответом по response_model."""
+    session.add(Post(user_id=test_user.id, title="Ёлка", content=None))
+    await session.commit()
+    db_posts = [test_user_post, *(
+        await session.scalars(select(Post).where(Post.title == "Ёлка"))
+    )]
+    adapter = TypeAdapter(list[PostRead])
+    expected = JSONResponse(
+        adapter.dump_python(
+            adapter.validate_python(db_posts, from_attributes=True),
+            mode="json",
+        )
+    ).body
+    assert client.get("/posts/").content == expected
+
+
+@pytest.mark.asyncio
+async def test_get_posts_sparse_fields(
+        client: TestClient,
+        session: AsyncSession,
+        test_user: User,
+        test_user_post: Post,
+):
+    """Тест чтения постов без колонки content через fields=."""
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(session.bind.sync_engine, "before_cursor_execute", capture)
+    for url in (
+        "/posts/?fields=id,title",
+        f"/users/{test_user.id}/posts/?fields=id,title",
+    ):
+        response = client.get(url)
+        assert response.json() == [
+            {"id": test_user_post.id, "title": "Название поста"}
+        ]
+        assert "content" not in statements[-1]
+    response = client.get(f"/posts/{test_user_post.id}/?fields=content")
+    assert response.json() == {"content": "Топовый контент"}
+    response = client.get("/posts/999/?fields=content")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_search_posts(
+        client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест полнотекстового поиска постов, синхронизации и курсора."""
+    titles = ["Погода в Москве", "Новости", "Рецепт", "Заметка"]
+    contents = [
+        "Сегодня солнечно",
+        "Погода испортилась к вечеру",
+        "Пирог к чаю",
+        "Погода, погода и снова погода",
+    ]
+    posts = [
+        Post(user_id=test_user.id, title=title, content=content)
+        for title, content in zip(titles, contents)
+    ]
+    session.add_all(posts)
+    await session.commit()
+    response = client.get("/posts/search/", params={"q": "ПОГОДА"})
+    assert response.status_code == status.HTTP_200_OK
+    found = response.json()
+    assert {post["id"] for post in found} == {
+        posts[0].id, posts[1].id, posts[3].id
+    }
+    assert found[0]["id"] == posts[0].id
+    assert "<mark>Погода</mark>" in found[0]["snippet"]
+
+    pages = []
+    params = {"q": "погода", "limit": 2}
+    while True:
+        response = client.get("/posts/search/", params=params)
+        pages += response.json()
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert pages == found
+
+    response = client.patch(
+        f"/posts/{posts[2].id}/",
+        json={"user_id": test_user.id, "content": "Погода для пикника"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    client.delete(f"/posts/{posts[0].id}/")
+    response = client.get(
+        "/posts/search/", params={"q": 'погода "OR'}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert {post["id"] for post in response.json()} == set()
+    response = client.get("/posts/search/", params={"q": "погода"})
+    assert {post["id"] for post in response.json()} == {
+        posts[1].id, posts[2].id, posts[3].id
+    }
+    response = client.get("/posts/search/", params={"q": "!!!"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    session.expunge_all()
+    client.delete(f"/users/{test_user.id}/")
+    response = client.get("/posts/search/", params={"q": "погода"})
+    assert response.json() == []
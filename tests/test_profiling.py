@@ -0,0 +1,63 @@
+"""Модуль для тестирования учёта SQL-запросов и лога медленных запросов."""
+
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import profiling
+from app.api.profiling import QueryBudgetExceeded
+from app.core.config import settings
+from app.db.models import User
+
+
+@pytest.mark.asyncio
+async def test_server_timing(
+    client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест заголовка Server-Timing с числом и временем SQL-запросов."""
+    session.expunge_all()
+    response = client.get(f"/users/{test_user.id}/")
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("db;dur=")
+    assert timing.endswith('desc="SQL: 1"')
+    response = client.get(f"/users/{test_user.id}/")
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.headers["Server-Timing"].endswith('desc="SQL: 0"')
+
+
+@pytest.mark.asyncio
+async def test_statement_budget(
+    client: TestClient, test_user: User, monkeypatch: pytest.MonkeyPatch
+):
+    """Тест ошибки при превышении бюджета SQL-запросов маршрута."""
+    monkeypatch.setitem(
+        profiling.STATEMENT_BUDGETS, ("GET", "/users/{user_id}/posts/"), 1
+    )
+    with pytest.raises(QueryBudgetExceeded, match="2 SQL-запросов"):
+        client.get(f"/users/{test_user.id}/posts/")
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", False)
+    assert client.get(f"/users/{test_user.id}/posts/").status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log(
+    client: TestClient,
+    session: AsyncSession,
+    test_user: User,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+):
+    """Тест записи медленного запроса с параметрами и планом."""
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    session.expunge_all()
+    with caplog.at_level(logging.WARNING, logger="app.db.profiling"):
+        client.get(f"/users/{test_user.id}/")
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(
+        message.startswith("Медленный SQL-запрос")
+        and f"параметры: ({test_user.id},)" in message
+        and "SEARCH user USING INTEGER PRIMARY KEY" in message
+        for message in messages
+    )
@@ -1,11 +1,21 @@
 """Модуль для тестирования API-эндпоинтов для User."""
 
+import csv
+import io
+import json
+
 import pytest
 from fastapi import status
+from fastapi.responses import JSONResponse
 from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
 
-from app.db.models import User
+from app.db.models import Post, User
+from app.schemas.user import UserRead, UserReadWithPosts
 
 
 @pytest.mark.asyncio
@@ -15,6 +25,141 @@ async def test_get_users(client):
     assert response.status_code == status.HTTP_200_OK
 
 
+@pytest.mark.asyncio
+async def test_get_users_cursor_pagination(
+        client: TestClient, session: AsyncSession
+):
+    """Тест обхода пользователей по курсору."""
+    session.add_all(User(first_name=f"Пользователь {i}") for i in range(5))
+    await session.commit()
+    response = client.get("/users/", params={"limit": 2})
+    first_page = [user["id"] for user in response.json()]
+    next_cursor = response.headers["X-Next-Cursor"]
+    response = client.get(
+        "/users/", params={"limit": 2, "cursor": next_cursor}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    second_page = [user["id"] for user in response.json()]
+    assert second_page == [first_page[-1] + 1, first_page[-1] + 2]
+    response = client.get(
+        "/users/", params={"limit": 2, "cursor": "не курсор"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get(
+        "/users/", params={"offset": 2, "cursor": next_cursor}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get(
+        "/users/", params={"limit": -1, "cursor": next_cursor}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_export_users(
+        client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест потоковой выгрузки пользователей в NDJSON и CSV."""
+    session.add(User(first_name="Пётр", photo_variants={"64": "a.webp"}))
+    await session.commit()
+    response = client.get("/users/export/")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == client.get(
+        f"/users/{test_user.id}/"
+    ).json()
+    assert json.loads(lines[1])["photo_variants"] == {"64": "a.webp"}
+    response = client.get("/users/export/", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["email"] for row in rows] == [test_user.email, ""]
+    assert json.loads(rows[1]["photo_variants"]) == {"64": "a.webp"}
+
+
+@pytest.mark.asyncio
+async def test_get_users_include_posts_query_count(
+        client: TestClient, session: AsyncSession
+):
+    """Тест загрузки постов страницы пользователей без N+1 запросов."""
+    for i in range(10):
+        user = User(first_name=f"Пользователь {i}")
+        user.posts = [Post(title=f"Пост {i}.{j}") for j in range(2)]
+        session.add(user)
+    await session.commit()
+    statements = []
+
+    def count_select(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(
+        session.bind.sync_engine, "before_cursor_execute", count_select
+    )
+    counts = []
+    for limit in (2, 10):
+        statements.clear()
+        response = client.get(
+            "/users/", params={"limit": limit, "include": "posts"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        users = response.json()
+        assert len(users) == limit
+        assert [post["title"] for post in users[1]["posts"]] == [
+            "Пост 1.0", "Пост 1.1"
+        ]
+        counts.append(len(statements))
+    # Страница, её посты и счётчик X-Total-Count.
+    assert counts == [3, 3]
+    assert "X-Next-Cursor" in response.headers
+    assert "posts" not in client.get("/users/").json()[0]
+
+
+@pytest.mark.asyncio
+async def test_get_users_openapi_schema(client: TestClient):
+    """Тест описания ответа списка пользователей с постами в OpenAPI."""
+    operation = client.get("/openapi.json").json()["paths"]["/users/"]["get"]
+    content = operation["responses"]["200"]["content"]
+    item_refs = {
+        variant["items"]["$ref"]
+        for variant in content["application/json"]["schema"]["anyOf"]
+    }
+    assert item_refs == {
+        "#/components/schemas/UserRead",
+        "#/components/schemas/UserReadWithPosts",
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_user_posts(
+        client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест постраничного получения постов пользователя."""
+    other_user = User(first_name="Пётр")
+    session.add(other_user)
+    await session.commit()
+    for i in range(3):
+        session.add(Post(user_id=test_user.id, title=f"Пост {i}"))
+        session.add(Post(user_id=other_user.id, title=f"Чужой пост {i}"))
+    await session.commit()
+    url = f"/users/{test_user.id}/posts/"
+    response = client.get(url, params={"limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    posts = response.json()
+    response = client.get(
+        url, params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]}
+    )
+    posts += response.json()
+    assert "X-Next-Cursor" not in response.headers
+    assert [post["title"] for post in posts] == ["Пост 0", "Пост 1", "Пост 2"]
+    response = client.get(f"/users/{other_user.id + 1}/posts/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    for limit in (-1, 0):
+        response = client.get(url, params={"limit": limit})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 @pytest.mark.asyncio
 async def test_get_user(
         client: TestClient, session: AsyncSession, test_user: User
@@ -83,6 +228,58 @@ async def test_create_user_duplicate_email(client: TestClient):
     )
 
 
+@pytest.mark.asyncio
+async def test_create_users_bulk(
+        client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест массового создания пользователей с ошибками в части элементов."""
+    users_data = [
+        {"first_name": "Пётр", "email": "peter@example.ru"},
+        {"first_name": "Павел", "email": test_user.email},
+        {"first_name": "", "email": "empty@example.ru"},
+        {"first_name": "Пётр", "email": "peter@example.ru"},
+        {"first_name": "Анна"},
+    ]
+    response = client.post("/users/bulk/", json=users_data)
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (2, 3)
+    assert [item["status"] for item in result["items"]] == [
+        status.HTTP_201_CREATED,
+        status.HTTP_400_BAD_REQUEST,
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+        status.HTTP_400_BAD_REQUEST,
+        status.HTTP_201_CREATED,
+    ]
+    created = await session.get(User, result["items"][0]["id"])
+    assert created.email == "peter@example.ru"
+
+
+@pytest.mark.asyncio
+async def test_create_users_bulk_ndjson(client: TestClient):
+    """Тест массового создания пользователей из NDJSON."""
+    body = (
+        '{"first_name": "Пётр"}\n'
+        "не json\n"
+        "\n"
+        '{"first_name": "Анна"}\n'
+    )
+    response = client.post(
+        "/users/bulk/",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    items = response.json()["items"]
+    assert [item["status"] for item in items] == [
+        status.HTTP_201_CREATED,
+        status.HTTP_400_BAD_REQUEST,
+        status.HTTP_201_CREATED,
+    ]
+    response = client.post("/users/bulk/", json={"first_name": "Пётр"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.asyncio
 async def test_update_user(
         client: TestClient, session: AsyncSession, test_user: User
@@ -147,6 +344,24 @@ async def test_partial_update_user(
     assert test_user.email == updated_user_data["email"]
 
 
+@pytest.mark.asyncio
+async def test_partial_update_user_duplicate_email(
+        client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест смены email на занятый и на собственный."""
+    other_user = User(first_name="Пётр", email="peter@example.ru")
+    session.add(other_user)
+    await session.commit()
+    url = f"/users/{other_user.id}/"
+    response = client.patch(url, json={"email": test_user.email})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.patch(url, json={"email": "peter@example.ru"})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.patch(url, json={"first_name": "Павел"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["email"] == "peter@example.ru"
+
+
 @pytest.mark.asyncio
 async def test_delete_user(
         client: TestClient, session: AsyncSession, test_user: User
@@ -159,3 +374,300 @@ async def test_delete_user(
     assert deleted_user is None
     response_for_nonexistent = client.delete(f"/users/{test_user.id}/")
     assert response_for_nonexistent.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_delete_user_cascades_posts(
+        client: TestClient,
+        session: AsyncSession,
+        test_user: User,
+        test_user_post: Post,
+):
+    """Тест удаления постов пользователя вместе с ним на уровне БД."""
+    post_id = test_user_post.id
+    response = client.delete(f"/users/{test_user.id}/")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    session.expunge_all()
+    assert await session.get(Post, post_id) is None
+
+
+@pytest.mark.asyncio
+async def test_get_user_cache_invalidation(
+        client: TestClient, test_user: User
+):
+    """Тест кеша ответа пользователя и его сброса после изменения."""
+    url = f"/users/{test_user.id}/"
+    before = client.get("/cache/stats/").json()
+    first = client.get(url)
+    assert first.headers["X-Cache"] == "MISS"
+    second = client.get(url)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    response = client.patch(url, json={"first_name": "Пётр"})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.get(url)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json() == client.patch(url, json={}).json()
+    assert response.json()["first_name"] == "Пётр"
+    client.delete(url)
+    assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
+    stats = client.get("/cache/stats/").json()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["invalidations"] - before["invalidations"] == 3
+
+
+@pytest.mark.asyncio
+async def test_get_user_etag(client: TestClient, test_user: User):
+    """Тест ETag пользователя и ответа 304 на If-None-Match."""
+    url = f"/users/{test_user.id}/"
+    etag = client.get(url).headers["ETag"]
+    for _ in range(2):
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not response.content
+        assert response.headers["ETag"] == etag
+    client.patch(url, json={"first_name": "Пётр"})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    assert response.json()["first_name"] == "Пётр"
+
+
+@pytest.mark.asyncio
+async def test_etag_not_reused_after_delete(
+        client: TestClient, test_user: User
+):
+    """Тест смены ETag, когда удалённый id достаётся новой записи."""
+    user = {"first_name": "Пётр", "email": "peter@example.ru"}
+    user_id = client.post("/users/", json=user).json()["id"]
+    post = {"user_id": user_id, "title": "Пост"}
+    post_id = client.post("/posts/", json=post).json()["id"]
+    client.patch(f"/users/{user_id}/", json={"first_name": "Павел"})
+    urls = ("/users/", f"/users/{user_id}/", f"/posts/{post_id}/")
+    etags = {url: client.get(url).headers["ETag"] for url in urls}
+    assert client.delete(f"/users/{user_id}/").status_code == (
+        status.HTTP_204_NO_CONTENT
+    )
+    response = client.post("/users/", json={**user, "first_name": "Анна"})
+    assert response.json()["id"] == user_id
+    response = client.post("/posts/", json={**post, "title": "Другой"})
+    assert response.json()["id"] == post_id
+    for url, etag in etags.items():
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_get_users_etag(
+        client: TestClient, test_user: User, test_user_post: Post
+):
+    """Тест ETag страницы пользователей, в том числе с постами."""
+    for url in ("/users/", "/users/?include=posts"):
+        etag = client.get(url).headers["ETag"]
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not response.content
+    etag = client.get("/users/?include=posts").headers["ETag"]
+    client.patch(
+        f"/posts/{test_user_post.id}/",
+        json={"user_id": test_user.id, "content": "Новый"},
+    )
+    response = client.get(
+        "/users/?include=posts", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert client.get("/users/?limit=1").headers["ETag"] != (
+        client.get("/users/").headers["ETag"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_user_mutations_single_statement(
+        client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест изменения и удаления пользователя одним запросом к БД.
+
+    PUT перед изменением читает прежнее фото, а после сброса фото
+    проверяет, что оно больше никому не нужно.
+    """
+    user_id = test_user.id
+    test_user.photo_hash = "a" * 64
+    test_user.photo_variants = {"64": "a.webp"}
+    await session.commit()
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        if not statement.startswith("BEGIN"):
+            statements.append(statement)
+
+    event.listen(
+        session.bind.sync_engine, "before_cursor_execute", count_statement
+    )
+    url = f"/users/{user_id}/"
+    data = {
+        "first_name": "Пётр",
+        "second_name": "Петров",
+        "patronymic": "Петрович",
+        "email": "peter@example.ru",
+        "address": "ул. Ленина, д.1",
+        "photo_url": test_user.photo_url,
+    }
+    response = client.put(url, json=data)
+    assert response.json()["photo_variants"] == {"64": "a.webp"}
+    response = client.put(url, json={**data, "photo_url": None})
+    assert response.json()["photo_variants"] is None
+    response = client.patch(url, json={"first_name": "Павел"})
+    assert response.json()["first_name"] == "Павел"
+    assert client.delete(url).status_code == status.HTTP_204_NO_CONTENT
+    assert client.delete(url).status_code == status.HTTP_404_NOT_FOUND
+    assert client.patch(url, json={}).status_code == (
+        status.HTTP_404_NOT_FOUND
+    )
+    assert len(statements) == 9
+    changes = [
+        statement for statement in statements
+        if statement.startswith(("UPDATE", "DELETE"))
+    ]
+    assert len(changes) == 5
+    assert all("RETURNING" in statement for statement in changes)
+
+
+@pytest.mark.asyncio
+async def test_get_users_fast_path_bytes(
+        client: TestClient, session: AsyncSession, test_user_post: Post
+):
+    """Тест совпадения тела списка с ответом по response_model."""
+    session.add(User(first_name="Пётр", photo_variants={"64": "a.webp"}))
+    await session.commit()
+    session.expunge_all()
+    for url, schema in (
+        ("/users/", UserRead),
+        ("/users/?include=posts", UserReadWithPosts),
+    ):
+        db_users = (
+            await session.scalars(
+                select(User).order_by(User.id).options(
+                    selectinload(User.posts)
+                )
+            )
+        ).all()
+        adapter = TypeAdapter(list[schema])
+        expected = JSONResponse(
+            adapter.dump_python(
+                adapter.validate_python(db_users, from_attributes=True),
+                mode="json",
+            )
+        ).body
+        assert client.get(url).content == expected
+
+
+@pytest.mark.asyncio
+async def test_get_users_sparse_fields(
+        client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест выбора полей ответа пользователей через fields=."""
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(session.bind.sync_engine, "before_cursor_execute", capture)
+    response = client.get("/users/?fields=photo_url,id,first_name")
+    assert response.json() == [{
+        "id": test_user.id,
+        "first_name": "Иван",
+        "photo_url": test_user.photo_url,
+    }]
+    assert "email" not in statements[-1]
+    url = f"/users/{test_user.id}/?fields=email"
+    response = client.get(url)
+    assert response.json() == {"email": "ivan@example.ru"}
+    etag = response.headers["ETag"]
+    assert etag != client.get(f"/users/{test_user.id}/").headers["ETag"]
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = client.get("/users/?fields=id,password")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Неизвестные поля: password"
+    assert client.get("/users/?fields=,").status_code == (
+        status.HTTP_400_BAD_REQUEST
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_users(client: TestClient, session: AsyncSession):
+    """Тест поиска пользователей по префиксу и плана запроса поиска."""
+    response = client.post("/users/", json={
+        "first_name": "Пётр", "second_name": "Ёлкин",
+        "email": "PETR@Example.ru",
+    })
+    elkin_id = response.json()["id"]
+    response = client.post("/users/bulk/", json=[
+        {"first_name": "Иван", "second_name": "Иванов"},
+        {"first_name": "Мария", "second_name": "Иванова"},
+    ])
+    ivanov_id, ivanova_id = (
+        result["id"] for result in response.json()["items"]
+    )
+
+    def found(q: str) -> list[int]:
+        response = client.get("/users/search/", params={"q": q})
+        assert response.status_code == status.HTTP_200_OK
+        return [user["id"] for user in response.json()]
+
+    assert found("ИВАН") == [ivanov_id, ivanova_id]
+    assert found("иванова") == [ivanova_id]
+    assert found("иван мар") == [ivanova_id]
+    assert found("елк") == [elkin_id]
+    assert found("Пётр") == [elkin_id]
+    assert found("petr@EX") == [elkin_id]
+    assert found("example") == []
+
+    client.patch(f"/users/{ivanova_id}/", json={"second_name": "Сидорова"})
+    assert found("иван") == [ivanov_id]
+    assert found("сидор") == [ivanova_id]
+    response = client.put(f"/users/{elkin_id}/", json={
+        "first_name": "Пётр", "second_name": "Ежов",
+        "patronymic": "Петрович", "email": "petr@example.ru",
+        "address": "ул. Ленина, д.1", "photo_url": None,
+    })
+    assert response.status_code == status.HTTP_200_OK
+    assert found("ёлкин") == []
+    assert found("ЕЖОВ") == [elkin_id]
+    response = client.get(
+        "/users/search/", params={"q": "ежов", "fields": "second_name"}
+    )
+    assert response.json() == [{"second_name": "Ежов"}]
+    response = client.get("/users/search/", params={"q": "   "})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    queries = []
+
+    def capture(conn, cursor, statement, parameters, *args):
+        if statement.startswith("SELECT"):
+            queries.append((statement, parameters))
+
+    event.listen(session.bind.sync_engine, "before_cursor_execute", capture)
+    try:
+        found("иван мар")
+    finally:
+        event.remove(
+            session.bind.sync_engine, "before_cursor_execute", capture
+        )
+    statement, parameters = queries[-1]
+    connection = await session.connection()
+    plan = [
+        row[-1]
+        for row in await connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        )
+    ]
+    user_plan = [line for line in plan if " user " in f"{line} "]
+    assert user_plan
+    assert not [line for line in user_plan if line.startswith("SCAN")]
+    assert all(
+        line.startswith("SEARCH user USING INDEX ix_user_")
+        and "_key>? AND " in line
+        for line in user_plan
+    )
@@ -1,33 +1,171 @@
 """Модуль для тестирования API-эндпоинта для загрузки фото пользователей."""
 
+import hashlib
 import io
 import os
+from pathlib import Path
 
+import httpx
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
 from PIL import Image
+from pydantic import ValidationError
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import SQLModel, select
 
-from app.core.constants import UPLOAD_DIR
+from app.core.config import Settings, settings
+from app.core.constants import PHOTO_VARIANT_SIZES, UPLOAD_DIR, VARIANTS_DIR
+from app.core.images import ImageProcessingError
+from app.core.metrics import upload_bytes
+from app.db import backfill_photo_variants as backfill
 from app.db.models import User
+from app.db.session import build_async_engine, read_only_url
+from app.main import app
+
+BOUNDARY = "photo-boundary"
+
+
+def multipart_chunks(
+    head: bytes, filler_chunks: int, consumed: list[bytes]
+):
+    """Тело multipart по частям без Content-Length.
+
+    Отданные части складываются в consumed, чтобы проверить, сколько
+    тела прочитал сервер.
+    """
+    parts = [
+        (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="file"; '
+            'filename="photo.jpg"\r\n'
+            "Content-Type: image/jpeg\r\n\r\n"
+        ).encode() + head,
+        *([b"\x00" * 1024] * filler_chunks),
+        f"\r\n--{BOUNDARY}--\r\n".encode(),
+    ]
+
+    async def chunks():
+        for part in parts:
+            consumed.append(part)
+            yield part
+
+    return chunks()
+
+
+async def post_stream(user_id: int, body) -> httpx.Response:
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        return await client.post(
+            f"/users_photo/{user_id}/",
+            content=body,
+            headers={
+                "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"
+            },
+        )
+
+
+def make_image(color: str, image_format: str = "JPEG") -> bytes:
+    """Создаёт тестовое изображение 100x100."""
+    image_bytes = io.BytesIO()
+    Image.new("RGB", (100, 100), color=color).save(
+        image_bytes, format=image_format
+    )
+    return image_bytes.getvalue()
+
+
+def stored_files(digest: str) -> list[Path]:
+    """Оригинал и уменьшенные копии фото с указанным хешем."""
+    return [
+        *UPLOAD_DIR.glob(f"{digest}.*"),
+        *VARIANTS_DIR.glob(f"{digest}_*"),
+    ]
 
 
 @pytest.mark.asyncio
 async def test_upload_user_photo(client: TestClient, test_user: User):
     """Тест загрузки фото для пользователя."""
-    image = Image.new("RGB", (100, 100), color="red")
-    image_bytes = io.BytesIO()
-    image.save(image_bytes, format="JPEG")
-    image_bytes.seek(0)
-    photo_file = {"file": ("photo_test.jpg", image_bytes, "image/jpeg")}
+    image = make_image("red")
+    digest = hashlib.sha256(image).hexdigest()
+    photo_file = {"file": ("photo_test.jpg", image, "image/jpeg")}
+    uploaded_before = upload_bytes.value()
     response = client.post(f"/users_photo/{test_user.id}/", files=photo_file)
     assert response.status_code == status.HTTP_201_CREATED
+    assert upload_bytes.value() - uploaded_before == len(image)
     response_data = response.json()
     assert "photo_url" in response_data
-    assert response_data["photo_url"] is not None
-    uploaded_files = list(UPLOAD_DIR.glob(f"photo_user_{test_user.id}*"))
-    assert len(uploaded_files) == 1
-    for file in uploaded_files:
+    assert response_data["photo_url"].endswith(f"/static/{digest}.jpg")
+    assert set(response_data["photo_variants"]) == {
+        str(size) for size in PHOTO_VARIANT_SIZES
+    }
+    assert (UPLOAD_DIR / f"{digest}.jpg").read_bytes() == image
+    with Image.open(VARIANTS_DIR / f"{digest}_64.webp") as variant:
+        assert variant.size == (64, 64)
+        assert "exif" not in variant.info
+    assert len(stored_files(digest)) == 1 + len(PHOTO_VARIANT_SIZES)
+    for file in stored_files(digest):
+        os.remove(file)
+
+
+@pytest.mark.asyncio
+async def test_upload_user_photo_deduplication(
+    client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест хранения одинаковых фото в одном экземпляре и удаления
+    неиспользуемых фото."""
+    other_user = User(first_name="Пётр")
+    session.add(other_user)
+    await session.commit()
+    red_image, blue_image = make_image("red"), make_image("blue")
+    red_digest = hashlib.sha256(red_image).hexdigest()
+    blue_digest = hashlib.sha256(blue_image).hexdigest()
+    photo_urls = []
+    for user_id in (test_user.id, other_user.id):
+        response = client.post(
+            f"/users_photo/{user_id}/",
+            files={"file": ("photo.jpg", red_image, "image/jpeg")},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        photo_urls.append(response.json()["photo_url"])
+    assert photo_urls[0] == photo_urls[1]
+    assert len(stored_files(red_digest)) == 1 + len(PHOTO_VARIANT_SIZES)
+    for user_id in (test_user.id, other_user.id):
+        response = client.post(
+            f"/users_photo/{user_id}/",
+            files={"file": ("photo.jpg", blue_image, "image/jpeg")},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        if user_id == test_user.id:
+            assert stored_files(red_digest)
+    assert not stored_files(red_digest)
+    for file in stored_files(blue_digest):
+        os.remove(file)
+
+
+@pytest.mark.asyncio
+async def test_static_photo_cache_headers(
+    client: TestClient, test_user: User
+):
+    """Тест неизменяемого кэширования фото, хранящихся под хешем."""
+    image = make_image("green", "PNG")
+    digest = hashlib.sha256(image).hexdigest()
+    response = client.post(
+        f"/users_photo/{test_user.id}/",
+        files={"file": ("photo.png", image, "image/png")},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    response = client.get(f"/static/{digest}.png")
+    assert response.status_code == status.HTTP_200_OK
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["etag"] == f'"{digest}.png"'
+    response = client.get(
+        f"/static/variants/{digest}_64.webp",
+        headers={"If-None-Match": f'"{digest}_64.webp"'},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    for file in stored_files(digest):
         os.remove(file)
 
 
@@ -53,3 +191,244 @@ async def test_upload_user_photo_invalid_file_type(
     response = client.post(f"/users_photo/{test_user.id}/", files=photo_file)
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert "Разрешены только файлы изображений" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_upload_user_photo_spoofed_content_type(
+    client: TestClient, test_user: User
+):
+    """Тест отклонения файла, выдающего себя за изображение."""
+    fake_image = b"<?php echo 'not an image'; ?>"
+    photo_file = {"file": ("photo.jpg", fake_image, "image/jpeg")}
+    response = client.post(f"/users_photo/{test_user.id}/", files=photo_file)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not stored_files(hashlib.sha256(fake_image).hexdigest())
+
+
+@pytest.mark.asyncio
+async def test_upload_user_photo_too_large(
+    client: TestClient, test_user: User, monkeypatch: pytest.MonkeyPatch
+):
+    """Тест отклонения файла, превышающего допустимый размер."""
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 1024)
+    image = b"\xff\xd8\xff\xe0" + b"\x00" * 4096
+    photo_file = {"file": ("photo.jpg", image, "image/jpeg")}
+    response = client.post(f"/users_photo/{test_user.id}/", files=photo_file)
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert not stored_files(hashlib.sha256(image).hexdigest())
+    assert not list(UPLOAD_DIR.glob(".upload-*"))
+
+
+@pytest.mark.asyncio
+async def test_upload_user_photo_corrupted_image(
+    client: TestClient, test_user: User
+):
+    """Тест отклонения файла с сигнатурой изображения, но без изображения."""
+    broken_image = b"\x89PNG\r\n\x1a\n" + b"\x00" * 128
+    photo_file = {"file": ("photo.png", broken_image, "image/png")}
+    response = client.post(f"/users_photo/{test_user.id}/", files=photo_file)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not stored_files(hashlib.sha256(broken_image).hexdigest())
+
+
+@pytest.mark.asyncio
+async def test_upload_user_photo_failed_processing_keeps_shared_photo(
+    client: TestClient,
+    session: AsyncSession,
+    test_user: User,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Тест сохранения опубликованного фото при ошибке обработки той же
+    картинки у другого пользователя."""
+    other_user = User(first_name="Пётр")
+    session.add(other_user)
+    await session.commit()
+    image = make_image("green")
+    digest = hashlib.sha256(image).hexdigest()
+    photo_file = {"file": ("photo.jpg", image, "image/jpeg")}
+    response = client.post(f"/users_photo/{test_user.id}/", files=photo_file)
+    assert response.status_code == status.HTTP_201_CREATED
+    published = sorted(stored_files(digest))
+
+    async def broken_variants(*args):
+        raise ImageProcessingError("photo.jpg")
+
+    monkeypatch.setattr(
+        "app.api.endpoints.upload_photo.create_photo_variants",
+        broken_variants,
+    )
+    response = client.post(f"/users_photo/{other_user.id}/", files=photo_file)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert sorted(stored_files(digest)) == published
+    assert not list(UPLOAD_DIR.glob(".upload-*"))
+    for file in published:
+        os.remove(file)
+
+
+@pytest.mark.asyncio
+async def test_replaced_and_deleted_user_photo_files_removed(
+    client: TestClient, session: AsyncSession, test_user: User
+):
+    """Тест удаления файлов фото, на которое больше никто не ссылается,
+    после PUT с другим photo_url и после удаления пользователя."""
+    other_user = User(first_name="Пётр")
+    session.add(other_user)
+    await session.commit()
+    image = make_image("yellow")
+    digest = hashlib.sha256(image).hexdigest()
+    for user_id in (test_user.id, other_user.id):
+        response = client.post(
+            f"/users_photo/{user_id}/",
+            files={"file": ("photo.jpg", image, "image/jpeg")},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+    response = client.put(
+        f"/users/{other_user.id}/",
+        json={
+            "first_name": "Пётр",
+            "second_name": "Петров",
+            "patronymic": "Петрович",
+            "email": "peter@example.ru",
+            "address": "ул. Ленина, д.1",
+            "photo_url": "https://example.ru/photo.jpg",
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["photo_variants"] is None
+    assert len(stored_files(digest)) == 1 + len(PHOTO_VARIANT_SIZES)
+    response = client.delete(f"/users/{test_user.id}/")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not stored_files(digest)
+
+
+@pytest.mark.asyncio
+async def test_upload_user_photo_streamed_too_large(
+    test_user: User, monkeypatch: pytest.MonkeyPatch
+):
+    """Тест отклонения большого файла без Content-Length по мере чтения."""
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 4096)
+    consumed = []
+    response = await post_stream(
+        test_user.id, multipart_chunks(b"\xff\xd8\xff\xe0", 100, consumed)
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert len(consumed) < 10
+    assert not list(UPLOAD_DIR.glob(".upload-*"))
+
+
+@pytest.mark.asyncio
+async def test_upload_user_photo_rejected_by_first_bytes(test_user: User):
+    """Тест отклонения не изображения до чтения остального тела."""
+    consumed = []
+    response = await post_stream(
+        test_user.id, multipart_chunks(b"MZ\x90\x00" * 4, 100, consumed)
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert len(consumed) == 1
+    assert not list(UPLOAD_DIR.glob(".upload-*"))
+
+
+@pytest.mark.asyncio
+async def test_upload_user_photo_without_file(
+    client: TestClient, test_user: User
+):
+    """Тест запроса без файла в поле file."""
+    response = client.post(
+        f"/users_photo/{test_user.id}/", data={"comment": "нет файла"}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_backfill_photo_variants_without_write_lock(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Тест создания копий фото без блокировки записи на время
+    обработки изображений."""
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT", 0)
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    engine = build_async_engine(url, writer=True)
+    other_writer = build_async_engine(url, writer=True)
+    read_engine = build_async_engine(read_only_url(url))
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    image = make_image("purple")
+    digest = hashlib.sha256(image).hexdigest()
+    (UPLOAD_DIR / f"{digest}.jpg").write_bytes(image)
+    photo_url = f"http://testserver/static/{digest}.jpg"
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as session:
+        session.add_all(
+            User(first_name=name, photo_url=photo_url)
+            for name in ("Иван", "Пётр")
+        )
+        await session.commit()
+    render = backfill.create_photo_variants
+
+    async def render_with_write(*args):
+        # Пока идёт обработка, другой писатель меняет фото второго
+        # пользователя: блокировка записи не должна быть занята.
+        async with other_writer.begin() as conn:
+            await conn.execute(
+                update(User)
+                .where(User.first_name == "Пётр")
+                .values(photo_url="https://example.ru/photo.jpg")
+            )
+        return await render(*args)
+
+    monkeypatch.setattr(backfill, "create_photo_variants", render_with_write)
+    filled = await backfill.backfill_photo_variants(
+        session_maker=session_maker,
+        read_session_maker=async_sessionmaker(read_engine),
+    )
+    assert filled == 1
+    async with session_maker() as session:
+        users = (
+            await session.execute(select(User).order_by(User.id))
+        ).scalars().all()
+    assert set(users[0].photo_variants) == {
+        str(size) for size in PHOTO_VARIANT_SIZES
+    }
+    assert users[1].photo_variants is None
+    assert len(stored_files(digest)) == 1 + len(PHOTO_VARIANT_SIZES)
+    assert not list(UPLOAD_DIR.glob(".upload-*"))
+    for file in stored_files(digest):
+        os.remove(file)
+    for test_engine in (engine, other_writer, read_engine):
+        await test_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_backfill_photo_variants_only_uploaded_originals(
+    tmp_path: Path, session: AsyncSession
+):
+    """Тест отказа создавать копии файлов вне загруженных оригиналов."""
+    outside = tmp_path / "secret.jpg"
+    outside.write_bytes(make_image("black"))
+    legacy = UPLOAD_DIR / "photo_user_1.jpg"
+    legacy.write_bytes(make_image("white"))
+    traversal = "../" * len(UPLOAD_DIR.resolve().parts) + str(outside)[1:]
+    photo_urls = [
+        f"http://testserver/static/{traversal}",
+        f"http://testserver/static/{'a' * 64}.jpg/../../{outside.name}",
+        "http://testserver/static/photo_user_1.jpg",
+    ]
+    session.add_all(User(photo_url=photo_url) for photo_url in photo_urls)
+    await session.commit()
+    session_maker = async_sessionmaker(session.bind, expire_on_commit=False)
+    try:
+        filled = await backfill.backfill_photo_variants(
+            session_maker=session_maker, read_session_maker=session_maker
+        )
+    finally:
+        legacy.unlink()
+    assert filled == 0
+    assert not list(VARIANTS_DIR.glob("secret_*"))
+    assert not list(VARIANTS_DIR.glob("photo_user_1_*"))
+    assert not list(UPLOAD_DIR.glob(".upload-*"))
+
+
+def test_photo_variant_format_validated():
+    """Тест отказа в запуске с неподдерживаемым форматом копий."""
+    with pytest.raises(ValidationError):
+        Settings(PHOTO_VARIANT_FORMAT="PNG")